@@ -0,0 +1,168 @@
+"""
+Unified activity log
+
+Evaluations, goals, goal progress updates, trainings, leave requests and
+the employee self-service submissions (self-evaluations, goal submissions,
+training requests) append an ActivityEvent when they are created and
+whenever their status changes (approvals and rejections get their own
+action).  KPI.signals
+calls apply_change() for every save of a tracked model; deletes are not
+logged.
+
+Timelines read the log newest first with keyset pagination (see
+KPI.pagination), backed by the (employee, created_at, id) and
+(department, created_at, id) indexes, so a page costs the same however long
+the history is.
+"""
+
+from .models import (
+    ActivityEvent, Evaluation, EmployeeGoalSubmission, EmployeeLeaveRequest, EmployeeSelfEvaluation,
+    EmployeeTrainingRequest, Goal, GoalProgress, Training
+)
+from .pagination import keyset_page
+
+TIMELINE_ORDERING = ['-created_at', '-id']
+MAX_PAGE_SIZE = 100
+
+APPROVALS = {'approved': 'approved', 'rejected': 'rejected'}
+
+
+class EventSource:
+    """How one tracked model maps onto activity events"""
+
+    def __init__(self, subject, employee, department, columns, title, value=None, status='status', approvals=None):
+        self.subject = subject
+        self.employee = employee
+        self.department = department
+        self.columns = (employee, department, *columns)
+        self.title = title
+        self.value = value
+        self.status = status
+        self.approvals = approvals or {}
+
+
+def _leave_title(state):
+    leave_type = state['leave_type__name'] or state['leave_type_other'] or 'Leave'
+    return f"{leave_type} request {state['start_date']:%d %b %Y} - {state['end_date']:%d %b %Y}"
+
+
+EVENT_SOURCES = {
+    Evaluation: EventSource(
+        'evaluation', 'employee_id', 'employee__department_id',
+        ('status', 'overall_score', 'period__name'),
+        title=lambda state: f"Evaluation for {state['period__name']}",
+        value='overall_score',
+        approvals=APPROVALS,
+    ),
+    Goal: EventSource(
+        'goal', 'employee_id', 'employee__department_id',
+        ('status', 'progress', 'title'),
+        title=lambda state: state['title'],
+        value='progress',
+    ),
+    GoalProgress: EventSource(
+        'goal_progress', 'goal__employee_id', 'goal__employee__department_id',
+        ('goal_id', 'goal__title', 'progress_percentage'),
+        title=lambda state: f"{state['goal__title']}: {state['progress_percentage']:g}%",
+        value='progress_percentage',
+        status=None,
+    ),
+    Training: EventSource(
+        'training', 'employee_id', 'employee__department_id',
+        ('status', 'score', 'title'),
+        title=lambda state: state['title'],
+        value='score',
+    ),
+    EmployeeLeaveRequest: EventSource(
+        'leave_request', 'employee_id', 'employee__department_id',
+        ('status', 'leave_type__name', 'leave_type_other', 'start_date', 'end_date'),
+        title=_leave_title,
+        approvals={'first_approved': 'approved', **APPROVALS},
+    ),
+    EmployeeSelfEvaluation: EventSource(
+        'self_evaluation', 'employee_id', 'employee__department_id',
+        ('status', 'period__name'),
+        title=lambda state: f"Self-evaluation for {state['period__name']}",
+        approvals=APPROVALS,
+    ),
+    EmployeeGoalSubmission: EventSource(
+        'goal_submission', 'employee_id', 'employee__department_id',
+        ('status', 'progress', 'title'),
+        title=lambda state: state['title'],
+        value='progress',
+        approvals=APPROVALS,
+    ),
+    EmployeeTrainingRequest: EventSource(
+        'training_request', 'employee_id', 'employee__department_id',
+        ('status', 'title'),
+        title=lambda state: state['title'],
+        approvals=APPROVALS,
+    ),
+}
+
+
+def load_state(model, pk):
+    """Read the columns an event is built from, or None"""
+    if pk is None:
+        return None
+    return model.objects.filter(pk=pk).values('pk', *EVENT_SOURCES[model].columns).first()
+
+
+def event_for_change(model, old_state, new_state):
+    """The ActivityEvent a change produces (unsaved), or None if it is not logged"""
+    if new_state is None:
+        return None
+    source = EVENT_SOURCES[model]
+    status = new_state[source.status] if source.status else ''
+    if old_state is None:
+        action = 'created'
+    elif source.status and old_state[source.status] != status:
+        action = source.approvals.get(status, 'status_changed')
+    else:
+        return None
+    return ActivityEvent(
+        employee_id=new_state[source.employee],
+        department_id=new_state[source.department],
+        subject=source.subject,
+        action=action,
+        object_id=new_state['pk'],
+        title=source.title(new_state)[:200],
+        status=status,
+        value=new_state[source.value] if source.value else None,
+    )
+
+
+def apply_change(model, old_state, new_state):
+    event = event_for_change(model, old_state, new_state)
+    if event is not None:
+        event.save()
+
+
+def timeline(employee=None, department=None):
+    """Activity of one employee or one department, newest first"""
+    events = ActivityEvent.objects.all()
+    if employee is not None:
+        events = events.filter(employee=employee)
+    if department is not None:
+        events = events.filter(department=department)
+    return events.order_by(*TIMELINE_ORDERING)
+
+
+def timeline_page(events, cursor=None, size=20):
+    """One keyset page of a timeline; raises pagination.InvalidCursor for bad cursors"""
+    return keyset_page(events, TIMELINE_ORDERING, cursor=cursor, size=min(max(size, 1), MAX_PAGE_SIZE))
+
+
+def serialize_event(event):
+    return {
+        'id': event.id,
+        'employee_id': event.employee_id,
+        'department_id': event.department_id,
+        'subject': event.subject,
+        'action': event.action,
+        'object_id': event.object_id,
+        'title': event.title,
+        'status': event.status,
+        'value': float(event.value) if event.value is not None else None,
+        'created_at': event.created_at.isoformat(),
+    }
@@ -0,0 +1,232 @@
+"""
+Columnar analytics snapshots of evaluation data
+
+export_snapshot() writes one row per EvaluationDetail (an employee's score
+on one KPI in one evaluation) as a directory of .npy files, one per
+column, with a manifest.json describing them:
+
+    directory, manifest = export_snapshot('media/analytics/2024-06-30')
+    manifest, columns = load_snapshot('media/analytics/2024-06-30')
+    columns['score'][columns['department_id'] == 3].mean()
+
+Each column is a plain one-dimensional .npy array, so np.load(path,
+mmap_mode='r') maps it without reading it; analysts can scan the columns
+they need, with numpy or anything else that reads .npy.  Ids are int64
+(-1 for none), measures float64 (NaN for null).  Choice columns are
+dictionary-encoded as int8 codes into the manifest's "dictionaries"; the
+manifest's "lookups" give the names behind the id columns.
+
+Rows are read with a server-side iterator and appended to each column file
+chunk by chunk, so memory stays flat whatever the number of rows; the
+headers are rewritten with the final length at the end (the .npy header
+leaves room for the length to grow).  The snapshot is written to a
+temporary directory beside the target and renamed into place once the
+manifest is complete.
+
+numpy is imported only here, when a snapshot is written or read.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import cache
+from .models import KPI, Department, Employee, Evaluation, EvaluationDetail, EvaluationPeriod, KPICategory
+
+FORMAT = 'mentiga-analytics'
+FORMAT_VERSION = 1
+
+MANIFEST = 'manifest.json'
+
+ANALYTICS_DIR = 'analytics'
+
+CHUNK_SIZE = 10000
+# Ids per lookup query: under SQLite's limit on query parameters (999 before 3.32)
+LOOKUP_BATCH = 500
+
+ID = 'id'
+MEASURE = 'measure'
+CATEGORICAL = 'categorical'
+
+MISSING_ID = -1
+MISSING_CODE = -1
+
+# (column, lookup it is read from, kind, dtype)
+COLUMNS = [
+    ('detail_id', 'pk', ID, '<i8'),
+    ('evaluation_id', 'evaluation_id', ID, '<i8'),
+    ('employee_id', 'evaluation__employee_id', ID, '<i8'),
+    ('department_id', 'evaluation__employee__department_id', ID, '<i8'),
+    ('period_id', 'evaluation__period_id', ID, '<i8'),
+    ('kpi_id', 'kpi_id', ID, '<i8'),
+    ('kpi_category_id', 'kpi__category_id', ID, '<i8'),
+    ('score', 'score', MEASURE, '<f8'),
+    ('target_value', 'target_value', MEASURE, '<f8'),
+    ('actual_value', 'actual_value', MEASURE, '<f8'),
+    ('weight', 'weight', MEASURE, '<f8'),
+    ('evaluation_status', 'evaluation__status', CATEGORICAL, '|i1'),
+    ('performance_rating', 'evaluation__performance_rating', CATEGORICAL, '|i1'),
+]
+
+# The codes of each categorical column: positions in its model field's choices
+DICTIONARIES = {
+    'evaluation_status': [value for value, _ in Evaluation.EVALUATION_STATUS],
+    'performance_rating': [value for value, _ in Evaluation.PERFORMANCE_RATINGS],
+}
+
+SOURCES = [EvaluationDetail, Evaluation, Employee, Department, EvaluationPeriod, KPI, KPICategory]
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('Analytics snapshots need numpy (pip install numpy)') from None
+    return numpy
+
+
+def default_directory():
+    return Path(settings.MEDIA_ROOT) / ANALYTICS_DIR / f'{timezone.localtime():%Y%m%d-%H%M%S}'
+
+
+def _converter(kind, dictionary=None):
+    """Turns the values of one column into its dtype's representation of them"""
+    if kind == ID:
+        return lambda value: MISSING_ID if value is None else value
+    if kind == MEASURE:
+        return lambda value: float('nan') if value is None else float(value)
+    codes = {value: code for code, value in enumerate(dictionary)}
+    return lambda value: codes.get(value, MISSING_CODE)
+
+
+def _lookups(ids, batch_size=LOOKUP_BATCH):
+    """The names behind the values of each id column (`ids` maps it to the values seen), as {column: {id: ...}}"""
+    def by_id(model, column, *fields):
+        names = {}
+        seen = sorted(ids[column])
+        for start in range(0, len(seen), batch_size):
+            values = model.objects.filter(pk__in=seen[start:start + batch_size]).values_list('pk', *fields)
+            if len(fields) == 1:
+                names.update((str(pk), value) for pk, value in values)
+            else:
+                names.update((str(pk), dict(zip(fields, (str(value) for value in rest)))) for pk, *rest in values)
+        return names
+
+    return {
+        'employee_id': by_id(Employee, 'employee_id', 'employee_id'),
+        'department_id': by_id(Department, 'department_id', 'name'),
+        'period_id': by_id(EvaluationPeriod, 'period_id', 'name', 'start_date', 'end_date'),
+        'kpi_id': by_id(KPI, 'kpi_id', 'name', 'category_id'),
+        'kpi_category_id': by_id(KPICategory, 'kpi_category_id', 'name'),
+    }
+
+
+def _header(numpy, dtype, length):
+    return {'descr': numpy.lib.format.dtype_to_descr(numpy.dtype(dtype)), 'fortran_order': False, 'shape': (length,)}
+
+
+def _write_columns(numpy, directory, queryset, chunk_size):
+    """Append the queryset's rows to one .npy file per column; returns (row count, distinct ids per id column)"""
+    npy = numpy.lib.format
+    lookups = [lookup for _, lookup, _, _ in COLUMNS]
+    converters = [_converter(kind, DICTIONARIES.get(name)) for name, _, kind, _ in COLUMNS]
+    seen = {name: set() for name in ('employee_id', 'department_id', 'period_id', 'kpi_id', 'kpi_category_id')}
+    files = [open(directory / f'{name}.npy', 'wb') for name, _, _, _ in COLUMNS]
+    try:
+        for output, (_, _, _, dtype) in zip(files, COLUMNS):
+            npy.write_array_header_1_0(output, _header(numpy, dtype, 0))
+        data_start = [output.tell() for output in files]
+
+        count = 0
+        rows = queryset.values_list(*lookups).order_by('pk').iterator(chunk_size=chunk_size)
+        while True:
+            chunk = [row for _, row in zip(range(chunk_size), rows)]
+            if not chunk:
+                break
+            count += len(chunk)
+            for index, (name, _, _, dtype) in enumerate(COLUMNS):
+                values = [converters[index](row[index]) for row in chunk]
+                if name in seen:
+                    seen[name].update(values)
+                files[index].write(numpy.array(values, dtype=dtype).tobytes())
+
+        for output, start, (name, _, _, dtype) in zip(files, data_start, COLUMNS):
+            output.seek(0)
+            npy.write_array_header_1_0(output, _header(numpy, dtype, count))
+            if output.tell() != start:
+                raise RuntimeError(f'The header of {name}.npy outgrew its padding')
+    finally:
+        for output in files:
+            output.close()
+    return count, {name: ids - {MISSING_ID} for name, ids in seen.items()}
+
+
+def export_snapshot(directory=None, period=None, chunk_size=CHUNK_SIZE):
+    """
+    Write a snapshot of the evaluation details (of one evaluation period's
+    evaluations with `period`) to `directory`, which must not exist yet;
+    returns (directory, manifest).  Raises ImportError without numpy and
+    FileExistsError when the directory exists.
+    """
+    numpy = _numpy()
+    directory = Path(directory or default_directory())
+    if directory.exists():
+        raise FileExistsError(f'{directory} already exists')
+    directory.parent.mkdir(parents=True, exist_ok=True)
+
+    # Read the version before the rows, so a snapshot never claims data newer than it holds
+    data_version = max(cache.get_versions(SOURCES).values())
+    queryset = EvaluationDetail.objects.all()
+    if period is not None:
+        queryset = queryset.filter(evaluation__period_id=period)
+
+    temporary = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f'.{directory.name}-', suffix='.part'))
+    try:
+        count, ids = _write_columns(numpy, temporary, queryset, chunk_size)
+        manifest = {
+            'format': FORMAT,
+            'version': FORMAT_VERSION,
+            'table': 'evaluation_details',
+            'generated_at': timezone.now().isoformat(),
+            'data_version': data_version,
+            'filters': {'period': period} if period is not None else {},
+            'rows': count,
+            'columns': [
+                {
+                    'name': name,
+                    'file': f'{name}.npy',
+                    'dtype': dtype,
+                    'kind': kind,
+                    'missing': 'NaN' if kind == MEASURE else MISSING_ID,
+                    **({'dictionary': name} if kind == CATEGORICAL else {}),
+                }
+                for name, _, kind, dtype in COLUMNS
+            ],
+            'dictionaries': DICTIONARIES,
+            'lookups': _lookups(ids),
+        }
+        with open(temporary / MANIFEST, 'w') as output:
+            json.dump(manifest, output, indent=2)
+        os.rename(temporary, directory)
+    except BaseException:
+        shutil.rmtree(temporary, ignore_errors=True)
+        raise
+    return directory, manifest
+
+
+def load_snapshot(directory, mmap_mode='r'):
+    """(manifest, {column: array}) of a snapshot, its arrays memory-mapped read-only by default"""
+    numpy = _numpy()
+    directory = Path(directory)
+    with open(directory / MANIFEST) as manifest_file:
+        manifest = json.load(manifest_file)
+    columns = {
+        column['name']: numpy.load(directory / column['file'], mmap_mode=mmap_mode)
+        for column in manifest['columns']
+    }
+    return manifest, columns
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class KpiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'KPI'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,237 @@
+"""
+Namespaced, versioned caching for KPI read paths
+
+Every KPI source model has a namespace (its label, e.g. 'kpi.evaluation') with a
+version counter.  Cache keys embed the current version of each namespace they
+depend on, so invalidating everything derived from a model is a single
+counter increment: KPI.signals bumps the version of every model cached reads
+depend on when it is saved or deleted, and stale entries simply stop being
+read until they expire.
+
+    @cached(Evaluation, 'status-counts', ttl=300)
+    def evaluation_status_counts():
+        ...
+
+    stats = get_or_set([Employee, Department], f'headcount:{dept_id}', compute, ttl=600)
+
+The counters live in the database (CacheVersion), not in the cache: the
+web workers, the report worker and its pool processes must all agree on
+them, and the default locmem cache is per process.  Reading the versions of
+any number of namespaces is one indexed query.  Model changes bump their
+namespace once per transaction, when it commits (bump_on_commit()): a
+transaction saving a thousand rows issues one UPDATE, and a rolled back one
+none.  Entries may still live in a per-process cache: they are only ever
+read under the versions they were computed for.
+
+Versions are microsecond timestamps of the namespace's last change: a bump
+moves the version to max(version + 1, now), and missing versions (first use,
+or a wiped table) start from now rather than 1, so a lost counter can never
+fall back to a version whose entries are still cached.
+
+get_or_set() protects expensive computations against stampedes: only one
+thread per process computes a missing entry (in-process lock) and only one
+process computes it at a time (cache.add() lock); the others wait for the
+result.  Bulk operations bypass signals; call bump() after those.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import date
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import BigIntegerField, F, Value
+from django.db.models.functions import Greatest
+from django.views.decorators.http import condition
+
+from .models import CacheVersion
+
+DEFAULT_TTL = 300
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 10
+LOCK_POLL_INTERVAL = 0.05
+MAX_KEY_LENGTH = 200
+
+_MISSING = object()
+_LOCAL_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def namespace_name(namespace):
+    """Namespace for a model class, instance or plain string"""
+    if isinstance(namespace, str):
+        return namespace
+    if isinstance(namespace, models.Model) or (
+        isinstance(namespace, type) and issubclass(namespace, models.Model)
+    ):
+        return namespace._meta.label_lower
+    raise TypeError(f"Not a cache namespace: {namespace!r}")
+
+
+def _namespace_names(namespaces):
+    if isinstance(namespaces, (list, tuple, set, frozenset)):
+        return sorted({namespace_name(namespace) for namespace in namespaces})
+    return [namespace_name(namespaces)]
+
+
+def _timestamp_version():
+    return time.time_ns() // 1000
+
+
+def _read_versions(names):
+    return dict(CacheVersion.objects.filter(namespace__in=names).values_list('namespace', 'version'))
+
+
+def get_versions(namespaces):
+    """Current version of each namespace, initializing missing ones (one query when they all exist)"""
+    names = _namespace_names(namespaces)
+    versions = _read_versions(names)
+    missing = [name for name in names if name not in versions]
+    if missing:
+        version = _timestamp_version()
+        CacheVersion.objects.bulk_create(
+            [CacheVersion(namespace=name, version=version) for name in missing], ignore_conflicts=True,
+        )
+        # Another process may have created some of them first; theirs win
+        versions.update(_read_versions(missing))
+    return versions
+
+
+def get_version(namespace):
+    return get_versions(namespace)[namespace_name(namespace)]
+
+
+def bump(namespace):
+    """Invalidate every entry cached under the namespace"""
+    versions = CacheVersion.objects.filter(namespace=namespace_name(namespace))
+    new_version = Greatest(F('version') + 1, Value(_timestamp_version(), output_field=BigIntegerField()))
+    if not versions.update(version=new_version):
+        # First use: create the counter (or find the one another process just created), then bump it
+        get_versions(namespace)
+        versions.update(version=new_version)
+
+
+class _CommitBump:
+    """on_commit callback bumping one namespace"""
+
+    def __init__(self, name):
+        self.name = name
+        self.done = False
+
+    def __call__(self):
+        bump(self.name)
+        self.done = True
+
+
+def bump_on_commit(namespace):
+    """
+    Bump the namespace when the current transaction commits (at once outside
+    one), however many of its rows the transaction changes.  A bump pending
+    in a rolled back savepoint is dropped with it, so the next change
+    schedules a new one.
+    """
+    name = namespace_name(namespace)
+    connection = transaction.get_connection()
+    pending = (callback for _, callback, *_ in connection.run_on_commit)
+    if not any(isinstance(callback, _CommitBump) and callback.name == name and not callback.done
+               for callback in pending):
+        transaction.on_commit(_CommitBump(name))
+
+
+def bump_model_version(sender, **kwargs):
+    """Signal handler: bump the sender's namespace once the transaction that changed it commits"""
+    if kwargs.get('raw'):
+        return
+    bump_on_commit(sender)
+
+
+def make_key(namespaces, key):
+    """Cache key for `key` under the current versions of `namespaces`"""
+    versions = get_versions(namespaces)
+    prefix = ','.join(f'{name}@{version}' for name, version in sorted(versions.items()))
+    full_key = f'kpi:{prefix}:{key}'
+    if len(full_key) > MAX_KEY_LENGTH:
+        full_key = f'kpi:{hashlib.md5(full_key.encode()).hexdigest()}'
+    return full_key
+
+
+def _local_lock(key):
+    return _LOCAL_LOCKS[hash(key) % len(_LOCAL_LOCKS)]
+
+
+def get_or_set(namespaces, key, compute, ttl=DEFAULT_TTL):
+    """
+    Return the cached value for `key`, computing and storing it on a miss.
+
+    Concurrent misses for the same key compute it once: callers in this
+    process queue on a local lock, callers in other processes wait (up to
+    LOCK_WAIT seconds) for whoever holds the cache lock and then read its
+    result.  If the lock holder dies, the waiter computes the value itself.
+    """
+    full_key = make_key(namespaces, key)
+    value = cache.get(full_key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _local_lock(full_key):
+        value = cache.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f'{full_key}:lock'
+        if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            try:
+                value = compute()
+                cache.set(full_key, value, timeout=ttl)
+            finally:
+                cache.delete(lock_key)
+            return value
+
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = cache.get(full_key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return compute()
+
+
+def cached(namespace, key, ttl=DEFAULT_TTL):
+    """
+    Decorator version of get_or_set().  `key` is a string, or a callable
+    that builds the key from the decorated function's arguments.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if callable(key) else key
+            return get_or_set(namespace, cache_key, lambda: func(*args, **kwargs), ttl)
+        return wrapper
+    return decorator
+
+
+def conditional_on(*namespaces):
+    """
+    Answer If-None-Match with 304 before the view runs.
+
+    The ETag covers the namespaces' versions, the user, the CSRF cookie
+    (rendered forms embed it), the path, the querystring and today's date
+    (lists flag overdue items), so polling an unchanged page costs one
+    version query instead of its querysets and template.  The versions are
+    read from the database, so a change made through any process (another
+    gunicorn worker, the report worker) moves the ETag on every worker.
+    There is no Last-Modified: a date cannot carry the user, the cookie and
+    the querystring, so it would answer 304 where the ETag does not.
+    Put it below @login_required and any permission check, so anonymous and
+    unauthorized requests are still redirected.
+    """
+    def etag(request, *args, **kwargs):
+        versions = get_versions(namespaces)
+        parts = [
+            request.user.pk, request.user.is_staff, request.COOKIES.get('csrftoken', ''),
+            request.path, sorted(request.GET.lists()), date.today(), sorted(versions.items()),
+        ]
+        return hashlib.md5(repr(parts).encode()).hexdigest()
+
+    return condition(etag_func=etag)
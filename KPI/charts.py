@@ -0,0 +1,66 @@
+"""
+Chart data for the dashboard, served by lazy JSON endpoints
+
+The dashboard HTML only renders the snapshot counters; each chart fetches
+its series from its own endpoint, so the page no longer waits on the
+slowest aggregate.  Every series is cached under the namespaces of the
+models it reads (see KPI.cache) with its own TTL, and the views answer
+conditional GETs from the same namespaces.
+"""
+
+from . import cache, stats
+from .models import Department, Employee, Evaluation, EvaluationPeriod
+from .scorecards import department_performance
+from .snapshots import evaluation_trend, recent_months
+
+DEPARTMENT_PERFORMANCE_MODELS = (Department, Employee, Evaluation, EvaluationPeriod)
+DEPARTMENT_PERFORMANCE_TTL = 600
+
+EVALUATION_STATUS_MODELS = (Evaluation,)
+EVALUATION_STATUS_TTL = 60
+
+MONTHLY_TREND_MODELS = (Department, Employee, Evaluation, EvaluationPeriod)
+MONTHLY_TREND_TTL = 900
+
+
+def department_performance_chart():
+    def compute():
+        departments = department_performance()
+        return {
+            'labels': [dept['name'] for dept in departments],
+            'scores': [dept['score'] for dept in departments],
+            'employee_counts': [dept['employee_count'] for dept in departments],
+        }
+    return cache.get_or_set(DEPARTMENT_PERFORMANCE_MODELS, 'chart:department-performance', compute,
+                            ttl=DEPARTMENT_PERFORMANCE_TTL)
+
+
+def evaluation_status_chart():
+    def compute():
+        counts = {
+            row['status']: row['count']
+            for row in stats.grouped(Evaluation.objects.all(), ['status'], [stats.count('count')])
+        }
+        return {
+            'labels': [label for _, label in Evaluation.EVALUATION_STATUS],
+            'statuses': [status for status, _ in Evaluation.EVALUATION_STATUS],
+            'counts': [counts.get(status, 0) for status, _ in Evaluation.EVALUATION_STATUS],
+        }
+    return cache.get_or_set(EVALUATION_STATUS_MODELS, 'chart:evaluation-status', compute,
+                            ttl=EVALUATION_STATUS_TTL)
+
+
+def monthly_trend_chart(months=6):
+    def compute():
+        month_starts = recent_months(months)
+        trend = evaluation_trend(month_starts[0], month_starts[-1])
+        points = trend['series'][0]['points'] if trend['series'] else []
+        return {
+            'labels': [month.strftime('%b %Y') for month in month_starts],
+            'scores': [point['average'] or 0 for point in points] or [0] * len(month_starts),
+            'counts': [point['count'] for point in points] or [0] * len(month_starts),
+        }
+    # recent_months() depends on today, so the key carries the current month
+    current_month = recent_months(1)[0]
+    return cache.get_or_set(MONTHLY_TREND_MODELS, f'chart:monthly-trend:{current_month:%Y-%m}:{months}', compute,
+                            ttl=MONTHLY_TREND_TTL)
@@ -0,0 +1,77 @@
+"""
+Everything the employee pages, the employee JSON API and exports show about
+one employee, loaded with a fixed number of queries
+
+    profile = Employee360.load(employee_id)
+    profile.summary()              # stats, read from the persisted EmployeeScorecard
+    profile.evaluations            # with period and evaluator already joined
+
+Statistics come from EmployeeScorecard (see KPI.scorecards) instead of
+per-page COUNT/AVG queries; the history lists are one query each however
+long the employee's record is.
+"""
+
+from .activity import timeline
+from .models import Employee, EmployeeScorecard, Evaluation, Goal, Training
+from .scorecards import refresh_employee_scorecard
+
+
+class Employee360:
+    """One employee with their scorecard and (optionally) full history"""
+
+    def __init__(self, employee, history=True):
+        self.employee = employee
+        try:
+            self.scorecard = employee.scorecard
+        except EmployeeScorecard.DoesNotExist:
+            # Created before the scorecards existed or through a bulk insert
+            self.scorecard = refresh_employee_scorecard(employee.pk)
+        self.evaluations = self.goals = self.trainings = None
+        if history:
+            self.evaluations = list(Evaluation.objects.filter(employee=employee).select_related(
+                'period', 'evaluator'
+            ).order_by('-created_at'))
+            self.goals = list(Goal.objects.filter(employee=employee).order_by('-created_at'))
+            self.trainings = list(Training.objects.filter(employee=employee).order_by('-start_date'))
+
+    @staticmethod
+    def employee_queryset():
+        return Employee.objects.select_related('department', 'manager', 'scorecard')
+
+    @classmethod
+    def load(cls, employee_id, history=True):
+        """Raises Employee.DoesNotExist for unknown ids"""
+        return cls(cls.employee_queryset().get(pk=employee_id), history=history)
+
+    def summary(self):
+        scorecard = self.scorecard
+        return {
+            'avg_score': scorecard.avg_score,
+            'total_evaluations': scorecard.total_evaluations,
+            'completed_evaluations': scorecard.completed_evaluations,
+            'total_goals': scorecard.total_goals,
+            'completed_goals': scorecard.completed_goals,
+            'avg_progress': scorecard.avg_progress,
+            'total_trainings': scorecard.total_trainings,
+            'completed_trainings': scorecard.completed_trainings,
+            'avg_training_score': scorecard.avg_training_score,
+        }
+
+    def recent_activities(self, limit=5):
+        """Latest entries of the employee's activity log (lazy; queried when first iterated)"""
+        return timeline(employee=self.employee)[:limit]
+
+    def as_dict(self):
+        """JSON-friendly employee record with scorecard stats"""
+        employee = self.employee
+        return {
+            'id': employee.id,
+            'employee_id': employee.employee_id,
+            'full_name': employee.full_name,
+            'email': employee.email,
+            'department': employee.department.name,
+            'position': employee.position,
+            'hire_date': employee.hire_date.strftime('%Y-%m-%d'),
+            'status': employee.status,
+            'scorecard': self.summary(),
+        }
@@ -0,0 +1,128 @@
+"""
+Filter facet counts for the list pages
+
+Next to every filter option the list pages show how many rows picking it
+would return, given the other filters in place:
+
+    facets = facet_counts('goal_list', request.GET)
+    facets['status']   # [FacetOption(value='pending', label='Pending', count=4, selected=False), ...]
+
+Each dimension is one GROUP BY over the page's rows (built by KPI.listings)
+with every filter applied except the dimension's own, so choosing a status
+still shows the counts of the other statuses.  GROUPING SETS cannot express
+that (every dimension would need a different WHERE clause), so a page with
+four dimensions costs four grouped queries on a miss.
+
+Results are cached per view and filter signature under the namespaces of
+the models the rows read (see KPI.cache), so any write to them invalidates
+the counts.
+"""
+
+import hashlib
+
+from django.http import QueryDict
+
+from . import cache, stats
+from .listings import LISTINGS
+from .models import Department, Employee, EmployeeLeaveRequest, Evaluation, EvaluationPeriod, Goal, Training
+
+FACET_TTL = 300
+
+
+class FacetOption:
+    def __init__(self, value, label, count, selected):
+        self.value = value
+        self.label = label
+        self.count = count
+        self.selected = selected
+
+    def __repr__(self):
+        return f'FacetOption({self.value!r}, {self.label!r}, count={self.count}, selected={self.selected})'
+
+
+class Dimension:
+    """
+    A facet: the querystring parameter it filters on and the column it
+    groups by.  Options come from the model field's choices, or from the
+    Department table for department facets.
+    """
+
+    def __init__(self, param, field, model=None):
+        self.param = param
+        self.field = field
+        self.model = model
+
+    def choices(self, departments):
+        if self.model is None:
+            return departments
+        return [(str(value), label) for value, label in self.model._meta.get_field(self.field).choices]
+
+
+class FacetSpec:
+    def __init__(self, namespaces, dimensions):
+        self.namespaces = namespaces
+        self.dimensions = dimensions
+
+
+FACETS = {
+    'evaluation_list': FacetSpec((Evaluation, Employee, EvaluationPeriod, Department), [
+        Dimension('department', 'employee__department'),
+        Dimension('status', 'status', Evaluation),
+        Dimension('rating', 'performance_rating', Evaluation),
+    ]),
+    'goal_list': FacetSpec((Goal, Employee, Department), [
+        Dimension('department', 'employee__department'),
+        Dimension('status', 'status', Goal),
+        Dimension('priority', 'priority', Goal),
+        Dimension('goal_type', 'goal_type', Goal),
+    ]),
+    'training_list': FacetSpec((Training, Employee, Department), [
+        Dimension('department', 'employee__department'),
+        Dimension('status', 'status', Training),
+        Dimension('training_type', 'training_type', Training),
+    ]),
+    'leave_requests_list': FacetSpec((EmployeeLeaveRequest, Employee, Department), [
+        Dimension('department', 'employee__department'),
+        Dimension('status', 'status', EmployeeLeaveRequest),
+    ]),
+}
+
+
+def _without(params, param):
+    params = params.copy() if isinstance(params, QueryDict) else dict(params)
+    params.pop(param, None)
+    return params
+
+
+def _signature(listing):
+    return hashlib.md5(repr(sorted(listing.filters.items())).encode()).hexdigest()
+
+
+def compute_counts(view, params):
+    """{param: {value: count}} plus the department labels, straight from the database"""
+    build = LISTINGS[view]
+    counts = {}
+    for dimension in FACETS[view].dimensions:
+        rows = build(_without(params, dimension.param)).rows
+        counts[dimension.param] = {
+            str(row[dimension.field]): row['count']
+            for row in stats.grouped(rows, [dimension.field], [stats.count('count')])
+        }
+    departments = [(str(pk), name) for pk, name in Department.objects.values_list('pk', 'name')]
+    return {'counts': counts, 'departments': departments}
+
+
+def facet_counts(view, params):
+    """{param: [FacetOption]} for list view `view` under querystring `params` (cached)"""
+    spec = FACETS[view]
+    key = f'facets:{view}:{_signature(LISTINGS[view](params))}'
+    result = cache.get_or_set(spec.namespaces, key, lambda: compute_counts(view, params), ttl=FACET_TTL)
+    facets = {}
+    for dimension in spec.dimensions:
+        counts = result['counts'][dimension.param]
+        selected = params.get(dimension.param, '')
+        facets[dimension.param] = [
+            FacetOption(value, label, counts.get(value, 0), value == selected)
+            for value, label in dimension.choices(result['departments'])
+        ]
+    return facets
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.exceptions import ValidationError
 from django.forms import inlineformset_factory
+from django.urls import reverse_lazy
 from .models import (
     Employee, Department, Evaluation, EvaluationDetail, Goal, Training,
     KPICategory, KPI, EvaluationPeriod, Competency, CompetencyAssessment,
@@ -8,6 +10,33 @@ from .models import (
     LeaveBalance, LeaveType, LeaveApprovalLevel
 )
 
+class EmployeeAutocompleteSelect(forms.Select):
+    """
+    Employee <select> that renders only the selected option; the others are
+    fetched from the autocomplete endpoint as the user types, so form pages
+    no longer load and ship every employee.
+    """
+    template_name = 'KPI/widgets/lazy_select.html'
+
+    def __init__(self, attrs=None, url=reverse_lazy('KPI:employee_autocomplete')):
+        super().__init__({'class': 'form-select', 'data-autocomplete-url': url, **(attrs or {})})
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = [v for v in value if v not in (None, '')]
+        options = []
+        if field.empty_label is not None:
+            options.append(self.create_option(name, '', field.empty_label, not selected, 0))
+        if selected:
+            try:
+                instances = list(self.choices.queryset.filter(**{f"{field.to_field_name or 'pk'}__in": selected}))
+            except (ValueError, TypeError, ValidationError):
+                instances = []
+            for index, instance in enumerate(instances, start=len(options)):
+                option_value, label = self.choices.choice(instance)
+                options.append(self.create_option(name, option_value, label, True, index))
+        return [(None, options, 0)]
+
 class EmployeeForm(forms.ModelForm):
     class Meta:
         model = Employee
@@ -21,6 +50,7 @@ class EmployeeForm(forms.ModelForm):
             'hire_date': forms.DateInput(attrs={'type': 'date'}),
             'date_of_birth': forms.DateInput(attrs={'type': 'date'}),
             'address': forms.Textarea(attrs={'rows': 3}),
+            'manager': EmployeeAutocompleteSelect(),
         }
 
 class DepartmentForm(forms.ModelForm):
@@ -74,6 +104,7 @@ class EvaluationForm(forms.ModelForm):
             'areas_for_improvement': forms.Textarea(attrs={'rows': 3}),
             'development_plan': forms.Textarea(attrs={'rows': 3}),
             'overall_score': forms.NumberInput(attrs={'min': '0', 'max': '100', 'step': '0.01'}),
+            'employee': EmployeeAutocompleteSelect(),
         }
 
 class EvaluationDetailForm(forms.ModelForm):
@@ -128,6 +159,7 @@ class GoalForm(forms.ModelForm):
             'obstacles': forms.Textarea(attrs={'rows': 3}),
             'support_needed': forms.Textarea(attrs={'rows': 3}),
             'progress': forms.NumberInput(attrs={'min': '0', 'max': '100', 'step': '0.01'}),
+            'employee': EmployeeAutocompleteSelect(),
         }
 
 class GoalProgressForm(forms.ModelForm):
@@ -158,6 +190,7 @@ class TrainingForm(forms.ModelForm):
             'duration_hours': forms.NumberInput(attrs={'min': '0', 'step': '0.5'}),
             'cost': forms.NumberInput(attrs={'min': '0', 'step': '0.01'}),
             'score': forms.NumberInput(attrs={'min': '0', 'max': '100', 'step': '0.01'}),
+            'employee': EmployeeAutocompleteSelect(),
         }
 
 class PerformanceImprovementPlanForm(forms.ModelForm):
@@ -408,11 +441,10 @@ class LeaveBalanceForm(forms.ModelForm):
     """Form for HR to manage employee leave balances"""
     class Meta:
         model = LeaveBalance
-        fields = ['allocated_days', 'carried_over_days', 'notes']
+        fields = ['allocated_days', 'carried_over_days']
         widgets = {
             'allocated_days': forms.NumberInput(attrs={'min': '0', 'step': '0.5', 'class': 'form-control'}),
             'carried_over_days': forms.NumberInput(attrs={'min': '0', 'step': '0.5', 'class': 'form-control'}),
-            'notes': forms.Textarea(attrs={'rows': 3, 'class': 'form-control', 'placeholder': 'Notes about this leave balance...'}),
         }
 
 class LeaveTypeForm(forms.ModelForm):
@@ -0,0 +1,280 @@
+"""
+Querysets behind the HR list pages
+
+Each builder turns a list page's GET parameters into a Listing: the
+filtered rows (what statistics and exports read), the rows to page through
+(with any sort annotations) and their keyset ordering, plus the filter
+values the template echoes back.  Views, `manage.py explain_views` and
+anything else that needs "the rows this page shows" share the builders:
+
+    listing = listings.goal_listing(request.GET)
+    stats.compute(listing.rows, ...)
+    KeysetPaginator(listing.page_rows, listing.ordering, 20)
+"""
+
+from decimal import Decimal
+
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from . import search
+from .models import Employee, EmployeeLeaveRequest, EmployeeProfile, Evaluation, Goal, Training
+
+
+class Listing:
+    def __init__(self, rows, ordering, filters, sort_by=None, page_rows=None):
+        self.rows = rows
+        self.page_rows = rows if page_rows is None else page_rows
+        self.ordering = ordering
+        self.filters = filters
+        self.sort_by = sort_by
+
+    def context(self):
+        """Filter values (and the sort) for the template"""
+        context = dict(self.filters)
+        if self.sort_by is not None:
+            context['sort_by'] = self.sort_by
+        return context
+
+
+def _sorted(rows, params, sort_options, default, search_query, annotations=None):
+    """(page_rows, ordering, sort_by) for the requested sort, relevance first while searching"""
+    sort_by = params.get('sort', 'relevance' if search_query else default)
+    if sort_by != 'relevance' and sort_by not in sort_options:
+        sort_by = default
+    page_rows = rows
+    if sort_by == 'relevance':
+        page_rows = search.ranked(rows, search_query)
+        ordering = ['-search_rank']
+    else:
+        ordering = sort_options[sort_by]
+    if annotations:
+        page_rows = page_rows.annotate(**annotations)
+    return page_rows, ordering, sort_by
+
+
+# Unscored rows sort first, as NULLs did before keyset pagination
+_SORT_SCORE = Decimal('-1')
+
+
+def employee_listing(params):
+    employees = Employee.objects.select_related('department', 'manager')
+
+    # Search functionality
+    search_query = params.get('search', '')
+    if search_query:
+        employees = search.matching(employees, search_query)
+
+    # Filter by department
+    department_filter = params.get('department', '')
+    if department_filter:
+        employees = employees.filter(department_id=department_filter)
+
+    # Filter by status
+    status_filter = params.get('status', '')
+    if status_filter:
+        employees = employees.filter(status=status_filter)
+
+    page_rows, ordering, sort_by = _sorted(employees, params, {
+        'first_name': ['first_name'],
+        'last_name': ['last_name'],
+        'employee_id': ['employee_id'],
+        'department': ['department__name'],
+        'position': ['position'],
+        'hire_date': ['hire_date'],
+    }, 'first_name', search_query)
+    return Listing(employees, ordering, {
+        'search_query': search_query,
+        'department_filter': department_filter,
+        'status_filter': status_filter,
+    }, sort_by, page_rows)
+
+
+def evaluation_listing(params):
+    evaluations = Evaluation.objects.select_related(
+        'employee', 'employee__department', 'evaluator', 'period'
+    )
+
+    # Search functionality
+    search_query = params.get('search', '')
+    if search_query:
+        evaluations = search.matching(evaluations, search_query)
+
+    # Filter by department
+    department_filter = params.get('department', '')
+    if department_filter:
+        evaluations = evaluations.filter(employee__department_id=department_filter)
+
+    # Filter by status
+    status_filter = params.get('status', '')
+    if status_filter:
+        evaluations = evaluations.filter(status=status_filter)
+
+    # Filter by period
+    period_filter = params.get('period', '')
+    if period_filter:
+        evaluations = evaluations.filter(period_id=period_filter)
+
+    # Filter by performance rating
+    rating_filter = params.get('rating', '')
+    if rating_filter:
+        evaluations = evaluations.filter(performance_rating=rating_filter)
+
+    page_rows, ordering, sort_by = _sorted(evaluations, params, {
+        'created_at': ['created_at'],
+        '-created_at': ['-created_at'],
+        'employee__first_name': ['employee__first_name'],
+        'overall_score': ['sort_score'],
+        'status': ['status'],
+    }, '-created_at', search_query, {'sort_score': Coalesce('overall_score', Value(_SORT_SCORE))})
+    return Listing(evaluations, ordering, {
+        'search_query': search_query,
+        'department_filter': department_filter,
+        'status_filter': status_filter,
+        'period_filter': period_filter,
+        'rating_filter': rating_filter,
+    }, sort_by, page_rows)
+
+
+def goal_listing(params):
+    goals = Goal.objects.select_related('employee', 'employee__department')
+
+    # Search functionality
+    search_query = params.get('search', '')
+    if search_query:
+        goals = search.matching(goals, search_query)
+
+    # Filter by goal type
+    goal_type_filter = params.get('goal_type', '')
+    if goal_type_filter:
+        goals = goals.filter(goal_type=goal_type_filter)
+
+    # Filter by status
+    status_filter = params.get('status', '')
+    if status_filter:
+        goals = goals.filter(status=status_filter)
+
+    # Filter by department
+    department_filter = params.get('department', '')
+    if department_filter:
+        goals = goals.filter(employee__department_id=department_filter)
+
+    # Filter by priority
+    priority_filter = params.get('priority', '')
+    if priority_filter:
+        goals = goals.filter(priority=priority_filter)
+
+    page_rows, ordering, sort_by = _sorted(goals, params, {
+        sort: [sort]
+        for sort in ['created_at', '-created_at', 'target_date', '-target_date', 'progress', '-progress', 'priority']
+    }, '-created_at', search_query)
+    return Listing(goals, ordering, {
+        'search_query': search_query,
+        'goal_type_filter': goal_type_filter,
+        'status_filter': status_filter,
+        'department_filter': department_filter,
+        'priority_filter': priority_filter,
+    }, sort_by, page_rows)
+
+
+def training_listing(params):
+    trainings = Training.objects.select_related('employee', 'employee__department')
+
+    # Search functionality
+    search_query = params.get('search', '')
+    if search_query:
+        trainings = search.matching(trainings, search_query)
+
+    # Filter by training type
+    training_type_filter = params.get('training_type', '')
+    if training_type_filter:
+        trainings = trainings.filter(training_type=training_type_filter)
+
+    # Filter by status
+    status_filter = params.get('status', '')
+    if status_filter:
+        trainings = trainings.filter(status=status_filter)
+
+    # Filter by department
+    department_filter = params.get('department', '')
+    if department_filter:
+        trainings = trainings.filter(employee__department_id=department_filter)
+
+    page_rows, ordering, sort_by = _sorted(trainings, params, {
+        'start_date': ['start_date'],
+        '-start_date': ['-start_date'],
+        'end_date': ['end_date'],
+        'score': ['sort_score'],
+    }, '-start_date', search_query, {'sort_score': Coalesce('score', Value(_SORT_SCORE))})
+    return Listing(trainings, ordering, {
+        'search_query': search_query,
+        'training_type_filter': training_type_filter,
+        'status_filter': status_filter,
+        'department_filter': department_filter,
+    }, sort_by, page_rows)
+
+
+def leave_request_listing(params):
+    leave_requests = EmployeeLeaveRequest.objects.select_related(
+        'employee', 'employee__department', 'leave_type'
+    )
+
+    status_filter = params.get('status', '')
+    if status_filter:
+        leave_requests = leave_requests.filter(status=status_filter)
+
+    department_filter = params.get('department', '')
+    if department_filter:
+        leave_requests = leave_requests.filter(employee__department_id=department_filter)
+
+    date_from = params.get('date_from', '')
+    if date_from:
+        leave_requests = leave_requests.filter(start_date__gte=date_from)
+
+    date_to = params.get('date_to', '')
+    if date_to:
+        leave_requests = leave_requests.filter(end_date__lte=date_to)
+
+    return Listing(leave_requests, ['-submitted_at'], {
+        'status_filter': status_filter,
+        'department_filter': department_filter,
+        'date_from': date_from,
+        'date_to': date_to,
+    })
+
+
+def employee_profile_listing(params):
+    profiles = EmployeeProfile.objects.select_related('employee', 'employee__department')
+
+    # Search functionality
+    search_query = params.get('search', '')
+    if search_query:
+        profiles = search.matching(profiles, search_query)
+
+    # Filter by department
+    department_filter = params.get('department', '')
+    if department_filter:
+        profiles = profiles.filter(employee__department_id=department_filter)
+
+    # Filter by profile completion
+    completion_filter = params.get('completion', '')
+    if completion_filter == 'complete':
+        profiles = profiles.filter(is_profile_complete=True)
+    elif completion_filter == 'incomplete':
+        profiles = profiles.filter(is_profile_complete=False)
+
+    return Listing(profiles, ['employee__first_name', 'employee__last_name'], {
+        'search_query': search_query,
+        'department_filter': department_filter,
+        'completion_filter': completion_filter,
+    })
+
+
+LISTINGS = {
+    'employee_list': employee_listing,
+    'evaluation_list': evaluation_listing,
+    'goal_list': goal_listing,
+    'training_list': training_listing,
+    'leave_requests_list': leave_request_listing,
+    'admin_employee_profiles': employee_profile_listing,
+}
@@ -0,0 +1,95 @@
+import multiprocessing
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import django
+from django.core.management.base import BaseCommand
+
+from KPI import exports
+from KPI.streaming import buffered, csv_lines, jsonl_lines
+from KPI.xlsx import xlsx_chunks
+
+FORMATS = ['csv', 'jsonl', 'xlsx']
+
+
+def synthetic_rows(count):
+    """Rows shaped like the evaluation list export"""
+    created = datetime(2024, 1, 1, 9, 30)
+    for number in range(1, count + 1):
+        yield [
+            number, f'E{number:05d}', f'Employee {number} Surname', 'Information Technology', 'Q1 2024',
+            'Manager Surname', 'Approved', Decimal(f'{60 + number % 40}.50'), 'Very Good',
+            created + timedelta(minutes=number),
+        ]
+
+
+def measure(export_format, count, view):
+    """
+    Write one export to nowhere in this (fresh) process: (rows, seconds,
+    bytes, peak RSS in KiB, its growth while writing in KiB)
+    """
+    if view:
+        rows = exports.export_rows(view, {})
+        header = next(rows)
+    else:
+        header = [column.header for column in exports.EXPORT_COLUMNS['evaluation_list']]
+        rows = synthetic_rows(count)
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    rows = _Counted(rows)
+    if export_format == 'csv':
+        pieces = buffered(csv_lines(header, rows))
+    elif export_format == 'jsonl':
+        pieces = buffered(jsonl_lines(dict(zip(header, row)) for row in rows))
+    else:
+        pieces = xlsx_chunks(header, rows)
+    size = 0
+    for piece in pieces:
+        size += len(piece.encode() if isinstance(piece, str) else piece)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rows.count, elapsed, size, peak, peak - baseline
+
+
+class _Counted:
+    """Rows, counted as they are read"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+class Command(BaseCommand):
+    help = 'Compare the throughput and peak memory of the CSV, JSON Lines and xlsx export writers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Synthetic rows to write')
+        parser.add_argument('--view', choices=list(exports.EXPORT_COLUMNS),
+                            help='Export this list page from the database instead of synthetic rows')
+        parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS)
+
+    def handle(self, *args, **options):
+        source = f"the {options['view']} export" if options['view'] else f"{options['rows']} synthetic rows"
+        self.stdout.write(f'Writing {source} (one fresh process per format)')
+        self.stdout.write(f"{'format':<8}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'MB out':>10}{'peak RSS MB':>13}{'growth MB':>11}")
+        for export_format in options['formats']:
+            # A fresh process per format, so each peak RSS is its own
+            with ProcessPoolExecutor(
+                1, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+            ) as pool:
+                count, elapsed, size, peak, growth = pool.submit(
+                    measure, export_format, options['rows'], options['view'],
+                ).result()
+            self.stdout.write(
+                f'{export_format:<8}{count:>10}{elapsed:>10.2f}{count / elapsed if elapsed else 0:>12.0f}'
+                f'{size / 1048576:>10.1f}{peak / 1024:>13.1f}{growth / 1024:>11.1f}'
+            )
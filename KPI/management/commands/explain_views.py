@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from KPI.listings import LISTINGS
+from KPI.query_plans import audit_listings
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the page query of each list view for representative filters and flag sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('views', nargs='*', choices=[[]] + list(LISTINGS), help='Only audit these views')
+        parser.add_argument('--plans', action='store_true', help='Print the full query plans')
+        parser.add_argument('--strict', action='store_true', help='Exit with an error if any sequential scan is found')
+
+    def handle(self, *args, **options):
+        results = audit_listings(options['views'] or None)
+        for result in results:
+            label = f"{result.view}?{result.params}" if result.params else result.view
+            if result.ok:
+                note = f' ({result.sorts} sort{"s" if result.sorts != 1 else ""})' if result.sorts else ''
+                self.stdout.write(self.style.SUCCESS(f'OK    {label}{note}'))
+            else:
+                tables = ', '.join(result.sequential_scans)
+                self.stdout.write(self.style.WARNING(f'SCAN  {label}: sequential scan of {tables}'))
+            if options['plans']:
+                for line in result.plan.splitlines():
+                    self.stdout.write(f'      {line}')
+
+        flagged = sum(not result.ok for result in results)
+        summary = f'{len(results)} queries explained, {flagged} with sequential scans'
+        if flagged and options['strict']:
+            raise CommandError(summary)
+        self.stdout.write(summary)
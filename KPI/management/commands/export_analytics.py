@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from KPI.analytics import CHUNK_SIZE, export_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write a columnar snapshot of the evaluation details as memory-mappable .npy files with a manifest'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Directory to create (default: MEDIA_ROOT/analytics/<timestamp>)')
+        parser.add_argument('--period', type=int, help='Only export the evaluations of this evaluation period')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows read and written per chunk')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            directory, manifest = export_snapshot(options['output'], options['period'], options['chunk_size'])
+        except (ImportError, FileExistsError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Analytics snapshot written to {directory}: {manifest['rows']} rows, "
+            f"{len(manifest['columns'])} columns in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from KPI.snapshots import rebuild_dashboard_snapshot
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized dashboard snapshot from the source tables'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding dashboard snapshot...')
+        snapshot = rebuild_dashboard_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f'Dashboard snapshot rebuilt: {snapshot.total_employees} active employees, '
+            f'{snapshot.total_evaluations} evaluations, {snapshot.total_goals} goals, '
+            f'{snapshot.total_trainings} trainings'
+        ))
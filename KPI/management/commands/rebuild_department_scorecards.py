@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from KPI.scorecards import rebuild_department_scorecards
+
+class Command(BaseCommand):
+    help = 'Rebuild the department x evaluation period scorecards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', type=int, help='Only rebuild the scorecards of this evaluation period')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding department scorecards...')
+        scorecard_count = rebuild_department_scorecards(options['period'])
+        self.stdout.write(self.style.SUCCESS(f'Department scorecards rebuilt: {scorecard_count} scorecards'))
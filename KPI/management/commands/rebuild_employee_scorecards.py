@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from KPI.scorecards import rebuild_employee_scorecards
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-employee evaluation, goal and training scorecards'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding employee scorecards...')
+        scorecard_count = rebuild_employee_scorecards()
+        self.stdout.write(self.style.SUCCESS(f'Employee scorecards rebuilt: {scorecard_count} scorecards'))
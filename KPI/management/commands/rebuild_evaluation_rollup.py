@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from KPI.snapshots import rebuild_monthly_rollup
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly evaluation score rollup used by trend charts'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding monthly evaluation rollup...')
+        bucket_count = rebuild_monthly_rollup()
+        self.stdout.write(self.style.SUCCESS(f'Monthly evaluation rollup rebuilt: {bucket_count} buckets'))
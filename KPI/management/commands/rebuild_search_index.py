@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from KPI.search import rebuild
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index used by the list views'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding search index...')
+        counts = rebuild()
+        for model_name, count in counts.items():
+            self.stdout.write(f'  {model_name}: {count} documents')
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt: {sum(counts.values())} documents'))
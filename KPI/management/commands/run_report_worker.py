@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from KPI.report_jobs import run_worker
+
+class Command(BaseCommand):
+    help = 'Process queued report jobs (thread pool, plus a process pool for CPU-heavy formats)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Worker threads (0 runs jobs inline)')
+        parser.add_argument('--processes', type=int, default=2,
+                            help='Worker processes for PDF and Excel reports (0 uses the threads)')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between queue polls')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Processing report jobs...')
+        processed = run_worker(
+            threads=options['threads'],
+            processes=options['processes'],
+            poll_interval=options['poll_interval'],
+            burst=options['burst'],
+            log=lambda message: self.stdout.write(f'  {message}'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Report worker stopped: {processed} job(s) processed'))
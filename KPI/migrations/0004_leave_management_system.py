@@ -0,0 +1,188 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('KPI', '0003_employeetrainingrequest_employeeprofile_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('default_allocation', models.DecimalField(decimal_places=1, help_text='Default annual allocation in days', max_digits=5)),
+                ('is_active', models.BooleanField(default=True)),
+                ('requires_approval', models.BooleanField(default=True)),
+                ('color', models.CharField(default='#007bff', help_text='Hex color for display', max_length=7)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RemoveField(
+            model_name='employeeleaverequest',
+            name='approved_date',
+        ),
+        migrations.RemoveField(
+            model_name='employeeleaverequest',
+            name='review_comments',
+        ),
+        migrations.RemoveField(
+            model_name='employeeleaverequest',
+            name='review_date',
+        ),
+        migrations.RemoveField(
+            model_name='employeeleaverequest',
+            name='reviewed_by',
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='attachments',
+            field=models.FileField(blank=True, help_text='Supporting documents', null=True, upload_to='leave_attachments/'),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='contact_email',
+            field=models.EmailField(blank=True, help_text='Emergency contact email', max_length=254),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='first_approval_comments',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='first_approval_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='first_approver',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='first_approved_leaves', to='KPI.employee'),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='half_day_type',
+            field=models.CharField(blank=True, choices=[('morning', 'Morning'), ('afternoon', 'Afternoon')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='is_half_day',
+            field=models.BooleanField(default=False, help_text='Is this a half-day leave?'),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='leave_type_other',
+            field=models.CharField(blank=True, help_text="Specify if 'Other' is selected", max_length=100),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='notes',
+            field=models.TextField(blank=True, help_text='Additional notes'),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='rejected_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rejected_leaves', to='KPI.employee'),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='rejection_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='second_approval_comments',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='second_approval_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='second_approver',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='second_approved_leaves', to='KPI.employee'),
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='employeeleaverequest',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('submitted', 'Submitted'), ('first_approval_pending', 'First Approval Pending'), ('first_approved', 'First Level Approved'), ('second_approval_pending', 'Second Approval Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('cancelled', 'Cancelled')], default='draft', max_length=30),
+        ),
+        migrations.CreateModel(
+            name='LeaveRequestDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(choices=[('pdf', 'PDF'), ('docx', 'Word Document')], max_length=20)),
+                ('file_path', models.CharField(max_length=500)),
+                ('generated_at', models.DateTimeField(auto_now_add=True)),
+                ('generated_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('leave_request', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='document', to='KPI.employeeleaverequest')),
+            ],
+            options={
+                'ordering': ['-generated_at'],
+            },
+        ),
+        migrations.RemoveField(
+            model_name='employeeleaverequest',
+            name='leave_type',
+        ),
+        migrations.AddField(
+            model_name='employeeleaverequest',
+            name='leave_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='KPI.leavetype'),
+        ),
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('allocated_days', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('used_days', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('pending_days', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('carried_over_days', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to='KPI.employee')),
+                ('leave_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='KPI.leavetype')),
+            ],
+            options={
+                'ordering': ['-year', 'leave_type__name'],
+                'unique_together': {('employee', 'leave_type', 'year')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaveApprovalLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.IntegerField(choices=[(1, 'First Level Approval'), (2, 'Second Level Approval')])),
+                ('approver_role', models.CharField(help_text='Role required for approval (e.g., Manager, HR Manager)', max_length=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='KPI.department')),
+            ],
+            options={
+                'ordering': ['level', 'department__name'],
+                'unique_together': {('level', 'department')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0004_leave_management_system'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_employees', models.IntegerField(default=0)),
+                ('total_departments', models.IntegerField(default=0)),
+                ('new_employees_month', models.DateField(blank=True, help_text='First day of the month counted in new_employees_this_month', null=True)),
+                ('new_employees_this_month', models.IntegerField(default=0)),
+                ('total_evaluations', models.IntegerField(default=0)),
+                ('pending_evaluations', models.IntegerField(default=0)),
+                ('completed_evaluations', models.IntegerField(default=0)),
+                ('evaluation_score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('evaluation_score_count', models.IntegerField(default=0)),
+                ('total_goals', models.IntegerField(default=0)),
+                ('completed_goals', models.IntegerField(default=0)),
+                ('overdue_goals', models.IntegerField(default=0)),
+                ('goal_progress_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_trainings', models.IntegerField(default=0)),
+                ('completed_trainings', models.IntegerField(default=0)),
+                ('ongoing_trainings', models.IntegerField(default=0)),
+                ('training_score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('training_score_count', models.IntegerField(default=0)),
+                ('department_stats', models.JSONField(blank=True, default=dict)),
+                ('monthly_scores', models.JSONField(blank=True, default=dict)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dashboard Snapshot',
+                'verbose_name_plural': 'Dashboard Snapshots',
+            },
+        ),
+    ]
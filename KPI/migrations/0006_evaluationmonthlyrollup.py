@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:50
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+
+def backfill_rollup(apps, schema_editor):
+    """Fill the rollup for existing evaluations with one GROUP BY per score source"""
+    Evaluation = apps.get_model('KPI', 'Evaluation')
+    EvaluationDetail = apps.get_model('KPI', 'EvaluationDetail')
+    EvaluationMonthlyRollup = apps.get_model('KPI', 'EvaluationMonthlyRollup')
+
+    def metrics(field):
+        return dict(score_sum=Sum(field), score_count=Count(field), score_min=Min(field), score_max=Max(field))
+
+    overall = Evaluation.objects.filter(overall_score__isnull=False).annotate(
+        month=TruncMonth('created_at', output_field=models.DateField())
+    ).order_by().values('month', 'employee__department_id', 'period_id').annotate(**metrics('overall_score'))
+    by_category = EvaluationDetail.objects.filter(score__isnull=False).annotate(
+        month=TruncMonth('evaluation__created_at', output_field=models.DateField())
+    ).order_by().values(
+        'month', 'evaluation__employee__department_id', 'evaluation__period_id', 'kpi__category_id'
+    ).annotate(**metrics('score'))
+
+    buckets = [
+        EvaluationMonthlyRollup(
+            month=row['month'], department_id=row['employee__department_id'], period_id=row['period_id'],
+            score_sum=row['score_sum'], score_count=row['score_count'],
+            score_min=row['score_min'], score_max=row['score_max'],
+        )
+        for row in overall
+    ] + [
+        EvaluationMonthlyRollup(
+            month=row['month'], department_id=row['evaluation__employee__department_id'],
+            period_id=row['evaluation__period_id'], category_id=row['kpi__category_id'],
+            score_sum=row['score_sum'], score_count=row['score_count'],
+            score_min=row['score_min'], score_max=row['score_max'],
+        )
+        for row in by_category
+    ]
+    EvaluationMonthlyRollup.objects.bulk_create(buckets, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0005_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='dashboardsnapshot',
+            name='monthly_scores',
+        ),
+        migrations.CreateModel(
+            name='EvaluationMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month the evaluations were created in')),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('score_count', models.IntegerField(default=0)),
+                ('score_min', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('score_max', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, help_text='KPI category for detail-score rows; empty for overall scores', null=True, on_delete=django.db.models.deletion.CASCADE, to='KPI.kpicategory')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='KPI.department')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='KPI.evaluationperiod')),
+            ],
+            options={
+                'verbose_name': 'Evaluation Monthly Rollup',
+                'verbose_name_plural': 'Evaluation Monthly Rollups',
+                'ordering': ['month', 'department', 'period'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='evaluationmonthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('month', 'department', 'period'), name='unique_overall_rollup_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='evaluationmonthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('month', 'department', 'period', 'category'), name='unique_category_rollup_bucket'),
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
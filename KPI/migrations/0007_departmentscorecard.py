@@ -0,0 +1,108 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:53
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+RATINGS = ['excellent', 'very_good', 'good', 'satisfactory', 'needs_improvement']
+
+
+def backfill_scorecards(apps, schema_editor):
+    """Build a scorecard for every (department, period) pair from the existing evaluations"""
+    Department = apps.get_model('KPI', 'Department')
+    Employee = apps.get_model('KPI', 'Employee')
+    Evaluation = apps.get_model('KPI', 'Evaluation')
+    EvaluationPeriod = apps.get_model('KPI', 'EvaluationPeriod')
+    DepartmentScorecard = apps.get_model('KPI', 'DepartmentScorecard')
+
+    headcounts = dict(
+        Employee.objects.filter(status='active').order_by().values('department_id')
+        .annotate(headcount=Count('pk')).values_list('department_id', 'headcount')
+    )
+    totals = {
+        (row['employee__department_id'], row['period_id']): row
+        for row in Evaluation.objects.order_by().values('employee__department_id', 'period_id').annotate(
+            evaluation_count=Count('pk'),
+            approved_count=Count('pk', filter=Q(status='approved')),
+            score_sum=Sum('overall_score'),
+            score_count=Count('overall_score'),
+            **{f'{rating}_count': Count('pk', filter=Q(performance_rating=rating)) for rating in RATINGS},
+        )
+    }
+    scores = defaultdict(list)
+    for department_id, period_id, score in Evaluation.objects.filter(overall_score__isnull=False).order_by(
+        'overall_score'
+    ).values_list('employee__department_id', 'period_id', 'overall_score'):
+        scores[(department_id, period_id)].append(score)
+
+    department_ids = list(Department.objects.values_list('pk', flat=True))
+    scorecards = []
+    for period_id in EvaluationPeriod.objects.values_list('pk', flat=True):
+        for department_id in department_ids:
+            row = totals.get((department_id, period_id), {})
+            values = scores[(department_id, period_id)]
+            middle = len(values) // 2
+            median = None
+            if values:
+                median = values[middle] if len(values) % 2 else (
+                    (values[middle - 1] + values[middle]) / 2
+                ).quantize(Decimal('0.01'))
+            score_count = row.get('score_count', 0)
+            scorecards.append(DepartmentScorecard(
+                department_id=department_id, period_id=period_id,
+                headcount=headcounts.get(department_id, 0),
+                evaluation_count=row.get('evaluation_count', 0),
+                approved_count=row.get('approved_count', 0),
+                score_sum=row.get('score_sum') or 0,
+                score_count=score_count,
+                avg_score=(row['score_sum'] / score_count).quantize(Decimal('0.01')) if score_count else None,
+                median_score=median,
+                **{f'{rating}_count': row.get(f'{rating}_count', 0) for rating in RATINGS},
+            ))
+    DepartmentScorecard.objects.bulk_create(scorecards, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0006_evaluationmonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='dashboardsnapshot',
+            name='department_stats',
+        ),
+        migrations.CreateModel(
+            name='DepartmentScorecard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('headcount', models.IntegerField(default=0, help_text='Active employees in the department')),
+                ('evaluation_count', models.IntegerField(default=0)),
+                ('approved_count', models.IntegerField(default=0)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('score_count', models.IntegerField(default=0)),
+                ('avg_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('median_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('excellent_count', models.IntegerField(default=0)),
+                ('very_good_count', models.IntegerField(default=0)),
+                ('good_count', models.IntegerField(default=0)),
+                ('satisfactory_count', models.IntegerField(default=0)),
+                ('needs_improvement_count', models.IntegerField(default=0)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scorecards', to='KPI.department')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scorecards', to='KPI.evaluationperiod')),
+            ],
+            options={
+                'verbose_name': 'Department Scorecard',
+                'verbose_name_plural': 'Department Scorecards',
+                'ordering': ['department__name', '-period__start_date'],
+                'unique_together': {('department', 'period')},
+            },
+        ),
+        migrations.RunPython(backfill_scorecards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:58
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+import django.db.models.deletion
+
+
+def backfill_scorecards(apps, schema_editor):
+    """Build a scorecard for every employee with one GROUP BY per source table"""
+    Employee = apps.get_model('KPI', 'Employee')
+    EmployeeScorecard = apps.get_model('KPI', 'EmployeeScorecard')
+    sources = {
+        'Evaluation': dict(
+            total_evaluations=Count('pk'),
+            completed_evaluations=Count('pk', filter=Q(status='approved')),
+            evaluation_score_sum=Sum('overall_score'),
+            evaluation_score_count=Count('overall_score'),
+            last_evaluated_at=Max('created_at'),
+        ),
+        'Goal': dict(
+            total_goals=Count('pk'),
+            completed_goals=Count('pk', filter=Q(status='completed')),
+            goal_progress_sum=Sum('progress'),
+        ),
+        'Training': dict(
+            total_trainings=Count('pk'),
+            completed_trainings=Count('pk', filter=Q(status='completed')),
+            training_score_sum=Sum('score'),
+            training_score_count=Count('score'),
+        ),
+    }
+    totals = defaultdict(dict)
+    for model_name, aggregates in sources.items():
+        rows = apps.get_model('KPI', model_name).objects.order_by().values('employee_id').annotate(**aggregates)
+        for row in rows:
+            employee_id = row.pop('employee_id')
+            totals[employee_id].update({name: value for name, value in row.items() if value is not None})
+    EmployeeScorecard.objects.bulk_create([
+        EmployeeScorecard(employee_id=employee_id, **totals[employee_id])
+        for employee_id in Employee.objects.values_list('pk', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0007_departmentscorecard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeScorecard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_evaluations', models.IntegerField(default=0)),
+                ('completed_evaluations', models.IntegerField(default=0)),
+                ('evaluation_score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('evaluation_score_count', models.IntegerField(default=0)),
+                ('last_evaluated_at', models.DateTimeField(blank=True, null=True)),
+                ('total_goals', models.IntegerField(default=0)),
+                ('completed_goals', models.IntegerField(default=0)),
+                ('goal_progress_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_trainings', models.IntegerField(default=0)),
+                ('completed_trainings', models.IntegerField(default=0)),
+                ('training_score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('training_score_count', models.IntegerField(default=0)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='scorecard', to='KPI.employee')),
+            ],
+            options={
+                'verbose_name': 'Employee Scorecard',
+                'verbose_name_plural': 'Employee Scorecards',
+            },
+        ),
+        migrations.RunPython(backfill_scorecards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_created_events(apps, schema_editor):
+    """Seed the log with a 'created' event for every existing row, dated when the row was created"""
+    ActivityEvent = apps.get_model('KPI', 'ActivityEvent')
+    sources = [
+        ('evaluation', 'Evaluation', 'employee', ('status', 'overall_score', 'period__name'),
+         lambda row: (f"Evaluation for {row['period__name']}", row['status'], row['overall_score'])),
+        ('goal', 'Goal', 'employee', ('status', 'progress', 'title'),
+         lambda row: (row['title'], row['status'], row['progress'])),
+        ('goal_progress', 'GoalProgress', 'goal__employee', ('goal__title', 'progress_percentage'),
+         lambda row: (f"{row['goal__title']}: {row['progress_percentage']:g}%", '', row['progress_percentage'])),
+        ('training', 'Training', 'employee', ('status', 'score', 'title'),
+         lambda row: (row['title'], row['status'], row['score'])),
+        ('leave_request', 'EmployeeLeaveRequest', 'employee',
+         ('status', 'leave_type__name', 'leave_type_other', 'start_date', 'end_date'),
+         lambda row: (
+             f"{row['leave_type__name'] or row['leave_type_other'] or 'Leave'} request "
+             f"{row['start_date']:%d %b %Y} - {row['end_date']:%d %b %Y}",
+             row['status'], None,
+         )),
+    ]
+    for subject, model_name, employee, columns, describe in sources:
+        rows = apps.get_model('KPI', model_name).objects.order_by('created_at', 'pk').values(
+            'pk', 'created_at', f'{employee}_id', f'{employee}__department_id', *columns
+        )
+        events = []
+        for row in rows.iterator(chunk_size=2000):
+            title, status, value = describe(row)
+            events.append(ActivityEvent(
+                employee_id=row[f'{employee}_id'], department_id=row[f'{employee}__department_id'],
+                subject=subject, action='created', object_id=row['pk'],
+                title=title[:200], status=status, value=value, created_at=row['created_at'],
+            ))
+        ActivityEvent.objects.bulk_create(events, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0008_employeescorecard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(choices=[('evaluation', 'Evaluation'), ('goal', 'Goal'), ('goal_progress', 'Goal Progress'), ('training', 'Training'), ('leave_request', 'Leave Request')], max_length=20)),
+                ('action', models.CharField(choices=[('created', 'Created'), ('status_changed', 'Status Changed'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('status', models.CharField(blank=True, max_length=30)),
+                ('value', models.DecimalField(blank=True, decimal_places=2, help_text='Score or progress at the time of the event', max_digits=5, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('department', models.ForeignKey(blank=True, help_text="Employee's department when the event happened", null=True, on_delete=django.db.models.deletion.SET_NULL, to='KPI.department')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_events', to='KPI.employee')),
+            ],
+            options={
+                'verbose_name': 'Activity Event',
+                'verbose_name_plural': 'Activity Events',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['employee', '-created_at', '-id'], name='activity_employee_timeline'), models.Index(fields=['department', '-created_at', '-id'], name='activity_department_timeline')],
+            },
+        ),
+        migrations.RunPython(backfill_created_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+import re
+
+from django.db import migrations
+
+# Frozen copy of KPI.search as of this migration: later changes to the module
+# must not change what this migration creates.
+SEARCH_TABLE = 'kpi_search_index'
+BATCH_SIZE = 1000
+
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+]
+SQLITE_INSERT = f'INSERT INTO {SEARCH_TABLE} (rowid, body) VALUES (%s * 16 + %s, %s)'
+
+POSTGRES_CREATE = [
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+    f"entity smallint NOT NULL, object_id bigint NOT NULL, body text NOT NULL, "
+    f"document tsvector GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED, "
+    f"PRIMARY KEY (entity, object_id))",
+    f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING gin (document)',
+]
+POSTGRES_INSERT = (
+    f'INSERT INTO {SEARCH_TABLE} (object_id, entity, body) VALUES (%s, %s, %s) '
+    f'ON CONFLICT (entity, object_id) DO UPDATE SET body = EXCLUDED.body'
+)
+
+# (model, entity code, document columns)
+ENTITIES = [
+    ('Employee', 1, ('first_name', 'last_name', 'employee_id', 'email', 'position')),
+    ('Evaluation', 2, (
+        'employee__first_name', 'employee__last_name', 'evaluator__first_name', 'evaluator__last_name',
+    )),
+    ('Goal', 3, ('title', 'employee__first_name', 'employee__last_name')),
+    ('Training', 4, ('title', 'provider', 'employee__first_name', 'employee__last_name')),
+    ('EmployeeProfile', 5, ('employee__first_name', 'employee__last_name', 'employee__employee_id')),
+]
+
+_WORDS = re.compile(r'\w+')
+
+
+def document(values):
+    return ' '.join(word for value in values if value for word in _WORDS.findall(str(value).lower()))
+
+
+def create_search_index(apps, schema_editor):
+    """Create the full-text index table for this database and fill it"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        create, insert = SQLITE_CREATE, SQLITE_INSERT
+    elif vendor == 'postgresql':
+        create, insert = POSTGRES_CREATE, POSTGRES_INSERT
+    else:
+        return
+    alias = schema_editor.connection.alias
+    with schema_editor.connection.cursor() as cursor:
+        for statement in create:
+            cursor.execute(statement)
+        for model_name, code, fields in ENTITIES:
+            rows = apps.get_model('KPI', model_name)._default_manager.using(alias).order_by().values_list(
+                'pk', *fields
+            )
+            batch = []
+            for pk, *values in rows.iterator(chunk_size=BATCH_SIZE):
+                batch.append((pk, code, document(values)))
+                if len(batch) >= BATCH_SIZE:
+                    cursor.executemany(insert, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(insert, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0009_activityevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
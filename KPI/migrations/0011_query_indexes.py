@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['status', 'department'], name='employee_status_department'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['first_name', 'id'], name='employee_first_name_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeleaverequest',
+            index=models.Index(fields=['status', '-submitted_at', '-id'], name='leave_status_submitted'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeleaverequest',
+            index=models.Index(fields=['-submitted_at', '-id'], name='leave_submitted_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeleaverequest',
+            index=models.Index(condition=models.Q(('status__in', ['submitted', 'first_approval_pending', 'first_approved', 'second_approval_pending'])), fields=['-submitted_at', '-id'], name='leave_pending_submitted'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(condition=models.Q(('is_profile_complete', False)), fields=['employee'], name='profile_incomplete'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='evaluation_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['-created_at', '-id'], name='evaluation_created_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['status', 'target_date'], name='goal_status_target_date'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='goal_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['-created_at', '-id'], name='goal_created_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read', '-created_at', '-id'], name='notification_inbox'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', '-created_at', '-id'], name='notification_unread'),
+        ),
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(fields=['status', 'start_date'], name='training_status_start_date'),
+        ),
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(fields=['-start_date', '-id'], name='training_start_keyset'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0011_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='report',
+            name='format',
+            field=models.CharField(choices=[('pdf', 'PDF'), ('excel', 'Excel'), ('csv', 'CSV'), ('json', 'JSON'), ('jsonl', 'JSON Lines'), ('html', 'HTML')], default='pdf', max_length=10),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0013_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='competencyassessment',
+            index=models.Index(fields=['evaluation', 'competency', 'rating'], name='assessment_evaluation_rating'),
+        ),
+        migrations.AddIndex(
+            model_name='competencyassessment',
+            index=models.Index(fields=['competency', 'rating'], name='assessment_competency_rating'),
+        ),
+    ]
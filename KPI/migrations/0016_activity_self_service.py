@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0015_cache_versions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activityevent',
+            name='subject',
+            field=models.CharField(choices=[('evaluation', 'Evaluation'), ('goal', 'Goal'), ('goal_progress', 'Goal Progress'), ('training', 'Training'), ('leave_request', 'Leave Request'), ('self_evaluation', 'Self-Evaluation'), ('goal_submission', 'Goal Submission'), ('training_request', 'Training Request')], max_length=20),
+        ),
+    ]
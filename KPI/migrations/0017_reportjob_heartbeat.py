@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:13
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_heartbeats(apps, schema_editor):
+    """Jobs already running count as alive since they started, as they did before heartbeats"""
+    ReportJob = apps.get_model('KPI', 'ReportJob')
+    ReportJob.objects.filter(status='running').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('KPI', '0016_activity_self_service'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last sign of life from the worker running the job', null=True),
+        ),
+        migrations.AddField(
+            model_name='reportjob',
+            name='worker',
+            field=models.CharField(blank=True, help_text='Worker running the job', max_length=100),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
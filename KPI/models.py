@@ -6,6 +6,8 @@ from django.core.exceptions import ValidationError
 import uuid
 from datetime import date
 
+from .stats import ratio
+
 class Department(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -66,6 +68,10 @@ class Employee(models.Model):
     
     class Meta:
         ordering = ['first_name', 'last_name']
+        indexes = [
+            models.Index(fields=['status', 'department'], name='employee_status_department'),
+            models.Index(fields=['first_name', 'id'], name='employee_first_name_keyset'),
+        ]
 
 class Competency(models.Model):
     name = models.CharField(max_length=100)
@@ -185,6 +191,10 @@ class Evaluation(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['employee', 'period']
+        indexes = [
+            models.Index(fields=['status', '-created_at', '-id'], name='evaluation_status_created'),
+            models.Index(fields=['-created_at', '-id'], name='evaluation_created_keyset'),
+        ]
 
 class EvaluationDetail(models.Model):
     evaluation = models.ForeignKey(Evaluation, on_delete=models.CASCADE, related_name='details')
@@ -212,6 +222,11 @@ class CompetencyAssessment(models.Model):
     
     class Meta:
         ordering = ['competency__category', 'competency__name']
+        indexes = [
+            # Cover the competency report's GROUP BY, filtered by evaluation or not
+            models.Index(fields=['evaluation', 'competency', 'rating'], name='assessment_evaluation_rating'),
+            models.Index(fields=['competency', 'rating'], name='assessment_competency_rating'),
+        ]
 
 class Goal(models.Model):
     GOAL_STATUS = [
@@ -248,6 +263,11 @@ class Goal(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'target_date'], name='goal_status_target_date'),
+            models.Index(fields=['status', '-created_at', '-id'], name='goal_status_created'),
+            models.Index(fields=['-created_at', '-id'], name='goal_created_keyset'),
+        ]
 
 class GoalProgress(models.Model):
     goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name='progress_updates')
@@ -304,6 +324,10 @@ class Training(models.Model):
     
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['status', 'start_date'], name='training_status_start_date'),
+            models.Index(fields=['-start_date', '-id'], name='training_start_keyset'),
+        ]
 
 class Report(models.Model):
     REPORT_TYPES = [
@@ -320,6 +344,8 @@ class Report(models.Model):
         ('pdf', 'PDF'),
         ('excel', 'Excel'),
         ('csv', 'CSV'),
+        ('json', 'JSON'),
+        ('jsonl', 'JSON Lines'),
         ('html', 'HTML'),
     ]
     
@@ -339,6 +365,42 @@ class Report(models.Model):
     class Meta:
         ordering = ['-generated_at']
 
+class ReportJob(models.Model):
+    """A report queued for generation by `manage.py run_report_worker`"""
+    JOB_STATUS = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    report_type = models.CharField(max_length=30, choices=Report.REPORT_TYPES)
+    format = models.CharField(max_length=10, choices=Report.REPORT_FORMATS)
+    parameters = models.JSONField(default=dict, blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_jobs')
+    status = models.CharField(max_length=20, choices=JOB_STATUS, default='queued')
+    report = models.OneToOneField(Report, on_delete=models.SET_NULL, null=True, blank=True, related_name='job')
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True, help_text="Worker running the job")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True,
+                                        help_text="Last sign of life from the worker running the job")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.get_report_type_display()} ({self.get_status_display()})"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at', 'id'], name='report_job_queue'),
+        ]
+
 class PerformanceImprovementPlan(models.Model):
     PIP_STATUS = [
         ('active', 'Active'),
@@ -387,6 +449,12 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'is_read', '-created_at', '-id'], name='notification_inbox'),
+            models.Index(
+                fields=['recipient', '-created_at', '-id'], condition=models.Q(is_read=False), name='notification_unread'
+            ),
+        ]
 
 class EmployeeProfile(models.Model):
     """Employee self-service profile for updates and submissions"""
@@ -426,6 +494,10 @@ class EmployeeProfile(models.Model):
         return (filled_fields / len(fields)) * 100
     
     class Meta:
+        indexes = [
+            # HR's follow-up list of profiles still missing information
+            models.Index(fields=['employee'], condition=models.Q(is_profile_complete=False), name='profile_incomplete'),
+        ]
         verbose_name = "Employee Profile"
         verbose_name_plural = "Employee Profiles"
 
@@ -633,6 +705,7 @@ class EmployeeLeaveRequest(models.Model):
         ('rejected', 'Rejected'),
         ('cancelled', 'Cancelled'),
     ]
+    PENDING_STATUSES = ['submitted', 'first_approval_pending', 'first_approved', 'second_approval_pending']
     
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_requests')
     leave_type = models.ForeignKey(LeaveType, on_delete=models.CASCADE, null=True, blank=True)
@@ -736,6 +809,18 @@ class EmployeeLeaveRequest(models.Model):
     
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['status', '-submitted_at', '-id'], name='leave_status_submitted'),
+            models.Index(fields=['-submitted_at', '-id'], name='leave_submitted_keyset'),
+            # HR's approval queue
+            models.Index(
+                fields=['-submitted_at', '-id'],
+                condition=models.Q(status__in=[
+                    'submitted', 'first_approval_pending', 'first_approved', 'second_approval_pending'
+                ]),
+                name='leave_pending_submitted',
+            ),
+        ]
         verbose_name = "Employee Leave Request"
         verbose_name_plural = "Employee Leave Requests"
 
@@ -752,3 +837,226 @@ class LeaveRequestDocument(models.Model):
     
     class Meta:
         ordering = ['-generated_at']
+
+class DashboardSnapshot(models.Model):
+    """Materialized dashboard counters, kept current by the signal handlers in KPI.signals"""
+    total_employees = models.IntegerField(default=0)
+    total_departments = models.IntegerField(default=0)
+    new_employees_month = models.DateField(null=True, blank=True, help_text="First day of the month counted in new_employees_this_month")
+    new_employees_this_month = models.IntegerField(default=0)
+    
+    total_evaluations = models.IntegerField(default=0)
+    pending_evaluations = models.IntegerField(default=0)
+    completed_evaluations = models.IntegerField(default=0)
+    evaluation_score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    evaluation_score_count = models.IntegerField(default=0)
+    
+    total_goals = models.IntegerField(default=0)
+    completed_goals = models.IntegerField(default=0)
+    overdue_goals = models.IntegerField(default=0)
+    goal_progress_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    total_trainings = models.IntegerField(default=0)
+    completed_trainings = models.IntegerField(default=0)
+    ongoing_trainings = models.IntegerField(default=0)
+    training_score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    training_score_count = models.IntegerField(default=0)
+    
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Dashboard snapshot ({self.updated_at})"
+    
+    @property
+    def avg_score(self):
+        return ratio(self.evaluation_score_sum, self.evaluation_score_count)
+    
+    @property
+    def avg_progress(self):
+        return ratio(self.goal_progress_sum, self.total_goals)
+    
+    @property
+    def avg_training_score(self):
+        return ratio(self.training_score_sum, self.training_score_count)
+    
+    class Meta:
+        verbose_name = "Dashboard Snapshot"
+        verbose_name_plural = "Dashboard Snapshots"
+
+class EvaluationMonthlyRollup(models.Model):
+    """Monthly evaluation score aggregates per department and period, maintained by KPI.snapshots"""
+    month = models.DateField(help_text="First day of the month the evaluations were created in")
+    department = models.ForeignKey(Department, on_delete=models.CASCADE)
+    period = models.ForeignKey(EvaluationPeriod, on_delete=models.CASCADE)
+    category = models.ForeignKey(KPICategory, on_delete=models.CASCADE, null=True, blank=True,
+                                 help_text="KPI category for detail-score rows; empty for overall scores")
+    score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    score_count = models.IntegerField(default=0)
+    score_min = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    score_max = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.month:%b %Y} - {self.department} - {self.period.name}"
+    
+    @property
+    def average(self):
+        return round(float(self.score_sum) / self.score_count, 2) if self.score_count else 0
+    
+    class Meta:
+        ordering = ['month', 'department', 'period']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month', 'department', 'period'],
+                condition=models.Q(category__isnull=True),
+                name='unique_overall_rollup_bucket',
+            ),
+            models.UniqueConstraint(
+                fields=['month', 'department', 'period', 'category'],
+                condition=models.Q(category__isnull=False),
+                name='unique_category_rollup_bucket',
+            ),
+        ]
+        verbose_name = "Evaluation Monthly Rollup"
+        verbose_name_plural = "Evaluation Monthly Rollups"
+
+class DepartmentScorecard(models.Model):
+    """Evaluation results per department and period, maintained by KPI.scorecards"""
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='scorecards')
+    period = models.ForeignKey(EvaluationPeriod, on_delete=models.CASCADE, related_name='scorecards')
+    headcount = models.IntegerField(default=0, help_text="Active employees in the department")
+    evaluation_count = models.IntegerField(default=0)
+    approved_count = models.IntegerField(default=0)
+    score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    score_count = models.IntegerField(default=0)
+    avg_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    median_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    
+    # Rating distribution, one column per Evaluation.PERFORMANCE_RATINGS value
+    excellent_count = models.IntegerField(default=0)
+    very_good_count = models.IntegerField(default=0)
+    good_count = models.IntegerField(default=0)
+    satisfactory_count = models.IntegerField(default=0)
+    needs_improvement_count = models.IntegerField(default=0)
+    
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.department} - {self.period.name}"
+    
+    @property
+    def rating_distribution(self):
+        return {
+            rating: getattr(self, f'{rating}_count')
+            for rating, _ in Evaluation.PERFORMANCE_RATINGS
+        }
+    
+    class Meta:
+        ordering = ['department__name', '-period__start_date']
+        unique_together = ['department', 'period']
+        verbose_name = "Department Scorecard"
+        verbose_name_plural = "Department Scorecards"
+
+class EmployeeScorecard(models.Model):
+    """Rolling evaluation, goal and training stats for one employee, maintained by KPI.scorecards"""
+    employee = models.OneToOneField(Employee, on_delete=models.CASCADE, related_name='scorecard')
+    
+    total_evaluations = models.IntegerField(default=0)
+    completed_evaluations = models.IntegerField(default=0)
+    evaluation_score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    evaluation_score_count = models.IntegerField(default=0)
+    last_evaluated_at = models.DateTimeField(null=True, blank=True)
+    
+    total_goals = models.IntegerField(default=0)
+    completed_goals = models.IntegerField(default=0)
+    goal_progress_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    total_trainings = models.IntegerField(default=0)
+    completed_trainings = models.IntegerField(default=0)
+    training_score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    training_score_count = models.IntegerField(default=0)
+    
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Scorecard for {self.employee}"
+    
+    @property
+    def avg_score(self):
+        return ratio(self.evaluation_score_sum, self.evaluation_score_count)
+    
+    @property
+    def avg_progress(self):
+        return ratio(self.goal_progress_sum, self.total_goals)
+    
+    @property
+    def avg_training_score(self):
+        return ratio(self.training_score_sum, self.training_score_count)
+    
+    class Meta:
+        verbose_name = "Employee Scorecard"
+        verbose_name_plural = "Employee Scorecards"
+
+class ActivityEvent(models.Model):
+    """Append-only activity log written by KPI.activity; never updated once stored"""
+    SUBJECTS = [
+        ('evaluation', 'Evaluation'),
+        ('goal', 'Goal'),
+        ('goal_progress', 'Goal Progress'),
+        ('training', 'Training'),
+        ('leave_request', 'Leave Request'),
+        ('self_evaluation', 'Self-Evaluation'),
+        ('goal_submission', 'Goal Submission'),
+        ('training_request', 'Training Request'),
+    ]
+    
+    ACTIONS = [
+        ('created', 'Created'),
+        ('status_changed', 'Status Changed'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    ]
+    
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='activity_events')
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True,
+                                   help_text="Employee's department when the event happened")
+    subject = models.CharField(max_length=20, choices=SUBJECTS)
+    action = models.CharField(max_length=20, choices=ACTIONS)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=200)
+    status = models.CharField(max_length=30, blank=True)
+    value = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True,
+                                help_text="Score or progress at the time of the event")
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.get_subject_display()} {self.get_action_display().lower()}: {self.title}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Activity events are append-only")
+        super().save(*args, **kwargs)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['employee', '-created_at', '-id'], name='activity_employee_timeline'),
+            models.Index(fields=['department', '-created_at', '-id'], name='activity_department_timeline'),
+        ]
+        verbose_name = "Activity Event"
+        verbose_name_plural = "Activity Events"
+
+class CacheVersion(models.Model):
+    """Version counter of a KPI.cache namespace, kept in the database so every process sees the same one"""
+    namespace = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(help_text="Microsecond timestamp of the namespace's last change")
+    
+    def __str__(self):
+        return f"{self.namespace}@{self.version}"
+    
+    class Meta:
+        verbose_name = "Cache Version"
+        verbose_name_plural = "Cache Versions"
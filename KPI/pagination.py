@@ -0,0 +1,251 @@
+"""
+Keyset (cursor) pagination
+
+OFFSET pagination reads and discards every row before the requested page,
+so deep pages get slower as tables grow.  Keyset pagination remembers the
+sort key of the last row served and asks for rows after it, which an index
+on the ordering columns answers in O(page size):
+
+    page = keyset_page(events, ['-created_at', '-id'], cursor=request.GET.get('cursor'), size=20)
+    page.items, page.next_cursor, page.previous_cursor
+
+HTML lists use KeysetPaginator, which adds the primary key as tie-breaker,
+builds Previous/Next querystrings that keep the list's filters and only
+counts the whole result set when a template asks for it (cached per query,
+see KPI.cache):
+
+    paginator = KeysetPaginator(employees, ['last_name'], 20, count_namespaces=(Employee,))
+    page = paginator.get_page(request.GET.get('cursor'), request.GET)
+
+Cursors are opaque to clients (URL-safe base64 of the boundary row's sort
+key and the direction).  The ordering must end with a unique column
+(normally the primary key) and its columns must not be NULL; sort nullable
+columns through a Coalesce() annotation.
+"""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model, Q
+from django.http import QueryDict
+
+from . import cache
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder rounds to milliseconds, which would skip or repeat rows
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, backwards=False):
+    """Cursor for the rows after `values` (or before them when `backwards`)"""
+    payload = json.dumps([int(backwards), *values], cls=_CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """(values, backwards) stored in a cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Malformed cursor')
+    if not isinstance(payload, list) or len(payload) != length + 1 or payload[0] not in (0, 1):
+        raise InvalidCursor('Cursor does not match this listing')
+    return payload[1:], bool(payload[0])
+
+
+def _field_name(ordering):
+    return ordering.lstrip('-')
+
+
+def _reversed(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+def with_tiebreaker(ordering, field='id'):
+    """`ordering` ending with the unique `field`, in the direction of its first column"""
+    ordering = list(ordering)
+    if ordering and _field_name(ordering[-1]) in (field, 'pk'):
+        return ordering
+    descending = bool(ordering) and ordering[0].startswith('-')
+    return ordering + [f'-{field}' if descending else field]
+
+
+def _sort_value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    value = row
+    for part in field.split('__'):
+        value = getattr(value, part)
+    return value.pk if isinstance(value, Model) else value
+
+
+def after(ordering, values):
+    """
+    Q matching rows that sort after `values` in `ordering`:
+    (a > x) OR (a = x AND b > y) OR ..., with < for descending columns.
+    """
+    condition = Q()
+    for index, (field, value) in enumerate(zip(ordering, values)):
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{_field_name(field)}__{lookup}': value})
+        for previous, previous_value in zip(ordering[:index], values[:index]):
+            step &= Q(**{_field_name(previous): previous_value})
+        condition |= step
+    return condition
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, previous_cursor=None, paginator=None, params=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.paginator = paginator
+        self.params = params
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _query(self, cursor):
+        params = self.params.copy() if self.params is not None else QueryDict(mutable=True)
+        params.pop('page', None)
+        params.pop('cursor', None)
+        if cursor:
+            params['cursor'] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        """Querystring of the next page, keeping the current filters"""
+        return self._query(self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self._query(self.previous_cursor)
+
+    @property
+    def first_query(self):
+        return self._query(None)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_page(queryset, ordering, cursor=None, size=20, row_factory=None):
+    """
+    One page of `queryset` in `ordering`, starting at `cursor`.
+
+    Fetches size + 1 rows to learn whether another page exists in the
+    direction of travel, so a page costs a single query.  Backward cursors
+    read the reversed ordering and flip the rows back.  Raises
+    InvalidCursor for tampered cursors.  `row_factory`, when given, turns
+    each fetched row into the page's item (cursors are read before).
+    """
+    backwards = False
+    seek = ordering
+    if cursor:
+        values, backwards = decode_cursor(cursor, len(ordering))
+        seek = _reversed(ordering) if backwards else ordering
+        try:
+            queryset = queryset.filter(after(seek, values))
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor('Cursor does not match this listing')
+    rows = list(queryset.order_by(*seek)[:size + 1])
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return KeysetPage(rows, None)
+
+    def boundary(row, to_previous):
+        return encode_cursor([_sort_value(row, _field_name(field)) for field in ordering], backwards=to_previous)
+
+    # Arriving through a cursor means there are rows on the side we came from
+    has_next = has_more if not backwards else True
+    has_previous = has_more if backwards else bool(cursor)
+    return KeysetPage(
+        [row_factory(row) for row in rows] if row_factory else rows,
+        boundary(rows[-1], False) if has_next else None,
+        boundary(rows[0], True) if has_previous else None,
+    )
+
+
+def cached_count(queryset, namespaces, ttl=cache.DEFAULT_TTL):
+    """COUNT(*) of `queryset`, cached under `namespaces` and keyed by its SQL"""
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(repr((sql, params)).encode()).hexdigest()
+    return cache.get_or_set(namespaces, f'count:{queryset.model._meta.label_lower}:{digest}', queryset.count, ttl=ttl)
+
+
+class KeysetPaginator:
+    """
+    Keyset counterpart of django.core.paginator.Paginator for HTML lists.
+
+    Pages only know their neighbours, never their number: there is no
+    page_range and no COUNT(*) per request.  `count` is computed on first
+    access (cached under `count_namespaces` when given).  With a
+    `projection` (see KPI.projections) pages hold its lean rows instead of
+    model instances.
+    """
+
+    def __init__(self, queryset, ordering, per_page=20, count_namespaces=None, count_ttl=cache.DEFAULT_TTL,
+                 projection=None):
+        self.queryset = queryset
+        self.ordering = with_tiebreaker(ordering)
+        self.per_page = per_page
+        self.count_namespaces = count_namespaces
+        self.count_ttl = count_ttl
+        self.projection = projection
+        self._count = None
+
+    @property
+    def count(self):
+        if self._count is None:
+            queryset = self.queryset.order_by()
+            if self.count_namespaces:
+                self._count = cached_count(queryset, self.count_namespaces, self.count_ttl)
+            else:
+                self._count = queryset.count()
+        return self._count
+
+    def page(self, cursor=None, params=None):
+        """Raises InvalidCursor for cursors from another listing or sort order"""
+        queryset, row_factory = self.queryset, None
+        if self.projection is not None:
+            queryset = self.projection.queryset(queryset, self.ordering)
+            row_factory = self.projection.row
+        page = keyset_page(queryset, self.ordering, cursor=cursor, size=self.per_page, row_factory=row_factory)
+        page.paginator = self
+        page.params = params
+        return page
+
+    def get_page(self, cursor=None, params=None):
+        """Like page(), but falls back to the first page for invalid cursors"""
+        try:
+            return self.page(cursor, params)
+        except InvalidCursor:
+            return self.page(None, params)
@@ -0,0 +1,204 @@
+"""
+Paginated PDF reports
+
+Renders report rows as a landscape table with reportlab's platypus:
+
+    pdf_chunks(header, rows, title='Goal Progress Report')   # bytes, chunk by chunk
+
+Rows are read lazily.  They are cut into one Table per page, each starting
+with the header row (repeatRows=1, so a table that still overflows repeats
+it too), and the tables are handed to the document template through a
+story that pulls them from a generator as the layout consumes them.  At
+any time only the page being laid out holds rows or flowables.
+
+reportlab itself is not streaming, though: the canvas keeps every finished
+page's compressed content stream in its document until save().  Memory
+still grows with the page count, by the size of each page rather than by the
+rows and flowables of the whole report (about 20 KB per full page of
+table, measured).  So a PDF holds at most MAX_PAGES pages (MAX_ROWS rows),
+about 4 MB: longer reports raise ReportTooLarge, a ValueError, as soon as
+their rows overflow the last page, and are meant to be downloaded as CSV
+or Excel, which stream in constant memory.  The document is written to an
+anonymous temporary file, not to memory, and read back in chunks.
+
+LazyStory depends on how reportlab's BaseDocTemplate.build() walks its
+story, which is not a public API; reportlab is pinned in requirements.txt
+and PdfReportTests fails if build() starts using other list operations.
+"""
+
+import tempfile
+from datetime import date, datetime
+from itertools import islice
+
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import inch
+from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle
+
+CONTENT_TYPE = 'application/pdf'
+
+CHUNK_SIZE = 64 * 1024
+
+PAGE_SIZE = landscape(A4)
+MARGIN = 0.5 * inch
+# Room above the table for the title (first page) or running header
+TOP_MARGIN = 1.1 * inch
+
+FONT = 'Helvetica'
+FONT_BOLD = 'Helvetica-Bold'
+FONT_SIZE = 8
+ROW_HEIGHT = 14
+
+# Data rows per page: the frame's padding takes 12pt, the header one row
+ROWS_PER_PAGE = int((PAGE_SIZE[1] - TOP_MARGIN - MARGIN - 12) / ROW_HEIGHT) - 1
+
+MAX_PAGES = 200
+MAX_ROWS = ROWS_PER_PAGE * MAX_PAGES
+
+# Rows are one line high; longer values are cut to their column's width
+ELLIPSIS = '...'
+
+TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), FONT),
+    ('FONTSIZE', (0, 0), (-1, -1), FONT_SIZE),
+    ('FONTNAME', (0, 0), (-1, 0), FONT_BOLD),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#343a40')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f2f2f2')]),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#adb5bd')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+
+class ReportTooLarge(ValueError):
+    """The report has more rows than a PDF holds (MAX_ROWS)"""
+
+    def __init__(self):
+        super().__init__(f'PDF reports are limited to {MAX_ROWS} rows; download this one as CSV or Excel')
+
+
+class LazyStory(list):
+    """
+    The document's flowables, pulled from an iterator as the layout needs
+    them.  BaseDocTemplate.build() only calls len(), [0], del [0] and
+    slice assignment (for split parts) on its story, and never needs more
+    than the next couple of flowables.
+    """
+
+    def __init__(self, flowables, lookahead=2):
+        super().__init__()
+        self._pending = iter(flowables)
+        self._lookahead = lookahead
+
+    def _fill(self):
+        while self._pending is not None and list.__len__(self) < self._lookahead:
+            try:
+                list.append(self, next(self._pending))
+            except StopIteration:
+                self._pending = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def header_label(key):
+    return key.replace('_', ' ').title()
+
+
+def cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return f'{timezone.localtime(value) if timezone.is_aware(value) else value:%Y-%m-%d %H:%M}'
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def column_widths(header, rows, total_width):
+    """Widths proportional to each column's longest value in `rows` (at least 4, at most 40 characters)"""
+    lengths = [len(label) for label in header]
+    for row in rows:
+        lengths = [max(length, len(text)) for length, text in zip(lengths, row)]
+    weights = [min(max(length, 4), 40) for length in lengths]
+    return [total_width * weight / sum(weights) for weight in weights]
+
+
+def fit(text, width):
+    """`text` cut with an ellipsis to fit `width` points (Helvetica averages about 0.55 em per character)"""
+    limit = max(int((width - 4) / (FONT_SIZE * 0.55)), len(ELLIPSIS) + 1)
+    return text if len(text) <= limit else text[:limit - len(ELLIPSIS)] + ELLIPSIS
+
+
+def _story(header, rows, document):
+    per_page = ROWS_PER_PAGE
+    labels = [header_label(key) for key in header]
+    texts = ([cell_text(value) for value in row] for row in rows)
+    page = list(islice(texts, per_page))
+    # The first page's values size the columns of every page
+    widths = column_widths(labels, page, document.width - 12)
+    labels = [fit(label, width) for label, width in zip(labels, widths)]
+    pages = 0
+    while page:
+        pages += 1
+        if pages > MAX_PAGES:
+            raise ReportTooLarge()
+        if pages > 1:
+            yield PageBreak()
+        data = [labels] + [[fit(text, width) for text, width in zip(row, widths)] for row in page]
+        yield Table(data, colWidths=widths, rowHeights=ROW_HEIGHT, repeatRows=1, style=TABLE_STYLE)
+        page = list(islice(texts, per_page))
+
+
+def write_pdf(output, header, rows, title='Report', subtitle=''):
+    """Render `rows` (sequences of values, in `header` order) as a PDF to the binary file `output`"""
+    generated = f'Generated {timezone.localtime():%Y-%m-%d %H:%M}'
+
+    def first_page(canvas, document):
+        canvas.saveState()
+        canvas.setFont(FONT_BOLD, 16)
+        canvas.drawString(MARGIN, PAGE_SIZE[1] - MARGIN - 16, title)
+        canvas.setFont(FONT, 9)
+        canvas.drawString(MARGIN, PAGE_SIZE[1] - MARGIN - 32, ' | '.join(filter(None, [generated, subtitle])))
+        canvas.restoreState()
+        footer(canvas, document)
+
+    def later_pages(canvas, document):
+        canvas.saveState()
+        canvas.setFont(FONT_BOLD, 10)
+        canvas.drawString(MARGIN, PAGE_SIZE[1] - MARGIN - 10, title)
+        canvas.restoreState()
+        footer(canvas, document)
+
+    def footer(canvas, document):
+        canvas.saveState()
+        canvas.setFont(FONT, 8)
+        canvas.drawRightString(PAGE_SIZE[0] - MARGIN, MARGIN / 2, f'Page {canvas.getPageNumber()}')
+        canvas.restoreState()
+
+    document = SimpleDocTemplate(
+        output, pagesize=PAGE_SIZE, title=title, pageCompression=1,
+        leftMargin=MARGIN, rightMargin=MARGIN, topMargin=TOP_MARGIN, bottomMargin=MARGIN,
+    )
+    document.build(LazyStory(_story(header, rows, document)), onFirstPage=first_page, onLaterPages=later_pages)
+
+
+def pdf_chunks(header, rows, title='Report', subtitle='', size=CHUNK_SIZE):
+    """
+    The PDF's bytes (see write_pdf), read back from a temporary file in
+    chunks of `size`.  The whole document is written before the first chunk
+    is returned, so ReportTooLarge is raised by the first next().
+    """
+    with tempfile.TemporaryFile() as output:
+        write_pdf(output, header, rows, title, subtitle)
+        output.seek(0)
+        while chunk := output.read(size):
+            yield chunk
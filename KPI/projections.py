@@ -0,0 +1,149 @@
+"""
+Lean rows for the list pages
+
+A list page renders a dozen columns of 20 rows, but model instances carry
+every column, large TextFields included (evaluation comments, goal
+obstacles, training outcomes...), plus the related instances pulled in by
+select_related().  A Projection reads only the columns the page shows with
+values() and wraps each row in a small __slots__ object whose choice
+labels and badge classes are looked up once, in Python, instead of through
+get_FOO_display() or {% if %} chains per row:
+
+    paginator = KeysetPaginator(listing.page_rows, listing.ordering, 20, projection=projections.GOAL_ROWS)
+    for goal in paginator.get_page(cursor):
+        goal.title, goal.employee_name, goal.status_label, goal.status_badge
+
+Long text columns are cut in the query (Substr), so only a preview leaves
+the database.  Rows are read-only: templates that need model methods or
+write back keep using instances.
+"""
+
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+
+from .models import Evaluation, Goal, Training
+
+# Characters of a TextField a list page shows; one more than truncatechars
+# needs to know the text was cut
+PREVIEW_LENGTH = 51
+
+
+class Row:
+    __slots__ = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __repr__(self):
+        values = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({values})'
+
+
+class Projection:
+    """
+    The columns of one list page.
+
+    `fields` are values() lookups, `expressions` renamed or computed
+    columns and `choices` the choice fields that get a `<field>_label`
+    (and, with `badges`, a `<field>_badge` CSS class) on each row.
+    """
+
+    def __init__(self, model, fields, expressions=None, choices=(), badges=None):
+        self.model = model
+        self.fields = list(fields)
+        self.expressions = expressions or {}
+        self.labels = {field: dict(model._meta.get_field(field).flatchoices) for field in choices}
+        self.badges = badges or {}
+        self.columns = self.fields + list(self.expressions)
+        slots = list(self.columns)
+        for field in choices:
+            slots += [f'{field}_label', f'{field}_badge']
+        self.row_class = type(f'{model.__name__}Row', (Row,), {'__slots__': tuple(slots)})
+
+    def queryset(self, queryset, ordering=()):
+        """`queryset` as dicts of the projected columns plus the ordering's keys"""
+        keys = self.fields + [field.lstrip('-') for field in ordering if field.lstrip('-') not in self.fields]
+        return queryset.values(*keys, **self.expressions)
+
+    def row(self, values):
+        row = self.row_class.__new__(self.row_class)
+        for name in self.columns:
+            setattr(row, name, values[name])
+        for field, labels in self.labels.items():
+            value = values[field]
+            setattr(row, f'{field}_label', labels.get(value, value or ''))
+            setattr(row, f'{field}_badge', self.badges.get(field, {}).get(value, 'secondary'))
+        return row
+
+    def rows(self, queryset):
+        return [self.row(values) for values in self.queryset(queryset)]
+
+
+def _employee_name(prefix='employee'):
+    return Concat(f'{prefix}__first_name', Value(' '), f'{prefix}__last_name')
+
+
+EVALUATION_ROWS = Projection(
+    Evaluation,
+    ['id', 'status', 'overall_score', 'performance_rating', 'created_at'],
+    expressions={
+        'employee_name': _employee_name(),
+        'employee_code': F('employee__employee_id'),
+        'department_name': F('employee__department__name'),
+        'period_name': F('period__name'),
+        'evaluator_name': _employee_name('evaluator'),
+    },
+    choices=['status', 'performance_rating'],
+    badges={
+        'status': {
+            'draft': 'secondary', 'submitted': 'warning', 'under_review': 'warning',
+            'reviewed': 'info', 'approved': 'success', 'rejected': 'danger',
+        },
+        'performance_rating': {
+            'excellent': 'success', 'very_good': 'primary', 'good': 'info',
+            'satisfactory': 'warning', 'needs_improvement': 'danger',
+        },
+    },
+)
+
+GOAL_ROWS = Projection(
+    Goal,
+    ['id', 'title', 'goal_type', 'priority', 'status', 'progress', 'target_date'],
+    expressions={
+        'employee_name': _employee_name(),
+        'department_name': F('employee__department__name'),
+        'description_preview': Substr('description', 1, PREVIEW_LENGTH),
+    },
+    choices=['goal_type', 'priority', 'status'],
+    badges={
+        'goal_type': {'performance': 'primary', 'development': 'info', 'project': 'warning', 'personal': 'success'},
+        'priority': {'low': 'secondary', 'medium': 'warning', 'high': 'danger'},
+        'status': {
+            'pending': 'secondary', 'in_progress': 'warning', 'completed': 'success',
+            'overdue': 'danger', 'cancelled': 'dark',
+        },
+    },
+)
+
+TRAINING_ROWS = Projection(
+    Training,
+    ['id', 'title', 'training_type', 'provider', 'location', 'status', 'duration_hours', 'cost',
+     'start_date', 'end_date'],
+    expressions={
+        'employee_name': _employee_name(),
+        'department_name': F('employee__department__name'),
+        'description_preview': Substr('description', 1, PREVIEW_LENGTH),
+    },
+    choices=['training_type', 'status'],
+    badges={
+        'training_type': {
+            'technical': 'primary', 'soft_skills': 'info', 'leadership': 'warning',
+            'compliance': 'danger', 'certification': 'success',
+        },
+        'status': {
+            'planned': 'info', 'in_progress': 'warning', 'completed': 'success',
+            'cancelled': 'danger', 'postponed': 'secondary',
+        },
+    },
+)
@@ -0,0 +1,104 @@
+"""
+EXPLAIN audit of the list pages
+
+For each list view (see KPI.listings) and a few representative filter
+combinations, build the exact page query the view runs and ask the
+database for its plan.  Plans are scanned for full table scans and for
+sorts the database has to do itself (no index delivers the order), which
+are the two things that make a page slower as its table grows:
+
+    for result in audit_listings():
+        result.view, result.params, result.sequential_scans, result.sorts
+
+Plan formats differ per backend: SQLite reports `SCAN <table>` for a full
+scan (a scan "USING INDEX" walks an index in order and is fine) and
+`USE TEMP B-TREE FOR ORDER BY` for sorts; PostgreSQL reports `Seq Scan on
+<table>` and `Sort` nodes.  PostgreSQL picks sequential scans for tiny
+tables whatever the indexes, so audit a database with realistic volumes.
+"""
+
+import re
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.http import QueryDict
+
+from .listings import LISTINGS
+from .models import Department
+from .pagination import with_tiebreaker
+
+PAGE_SIZE = 20
+
+# `{department}` is replaced with an existing department id
+REPRESENTATIVE_FILTERS = {
+    'employee_list': [
+        '', 'status=active', 'status=active&department={department}', 'sort=hire_date', 'search=an',
+    ],
+    'evaluation_list': [
+        '', 'status=completed', 'department={department}', 'sort=overall_score', 'search=an',
+    ],
+    'goal_list': [
+        '', 'status=in_progress', 'status=in_progress&sort=target_date', 'priority=high', 'search=an',
+    ],
+    'training_list': [
+        '', 'status=completed', 'status=completed&sort=start_date', 'department={department}', 'search=an',
+    ],
+    'leave_requests_list': [
+        '', 'status=submitted', 'department={department}', 'date_from=2024-01-01',
+    ],
+    'admin_employee_profiles': [
+        '', 'completion=incomplete', 'search=an',
+    ],
+}
+
+_SQLITE_SCAN = re.compile(r'\bSCAN (\S+)(.*)$')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\S+)')
+_POSTGRES_SORT = re.compile(r'(^|->)\s*(Incremental )?Sort\b')
+
+
+class PlanAudit:
+    def __init__(self, view, params, plan, sequential_scans, sorts):
+        self.view = view
+        self.params = params
+        self.plan = plan
+        self.sequential_scans = sequential_scans
+        self.sorts = sorts
+
+    @property
+    def ok(self):
+        return not self.sequential_scans
+
+
+def page_query(view, params):
+    """The first-page query `view` runs for querystring `params`"""
+    listing = LISTINGS[view](QueryDict(params))
+    return listing.page_rows.order_by(*with_tiebreaker(listing.ordering))[:PAGE_SIZE + 1]
+
+
+def analyze_plan(plan, vendor):
+    """(tables scanned sequentially, number of sorts) in an EXPLAIN output"""
+    scans, sorts = [], 0
+    for line in plan.splitlines():
+        if vendor == 'sqlite':
+            match = _SQLITE_SCAN.search(line)
+            # "SCAN t USING [COVERING] INDEX" walks an index; FTS5 tables are virtual
+            if match and 'USING' not in match.group(2) and 'VIRTUAL TABLE' not in match.group(2):
+                scans.append(match.group(1))
+            sorts += 'USE TEMP B-TREE FOR' in line and 'ORDER BY' in line
+        elif vendor == 'postgresql':
+            scans += _POSTGRES_SCAN.findall(line)
+            sorts += bool(_POSTGRES_SORT.search(line.strip()))
+    return scans, sorts
+
+
+def audit_listings(views=None, using=DEFAULT_DB_ALIAS):
+    """PlanAudit for every view in `views` (default: all) and its representative filters"""
+    vendor = connections[using].vendor
+    department = Department.objects.using(using).values_list('pk', flat=True).first() or 1
+    results = []
+    for view in views or LISTINGS:
+        for params in REPRESENTATIVE_FILTERS[view]:
+            params = params.format(department=department)
+            plan = page_query(view, params).using(using).explain()
+            scans, sorts = analyze_plan(plan, vendor)
+            results.append(PlanAudit(view, params, plan, scans, sorts))
+    return results
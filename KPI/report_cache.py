@@ -0,0 +1,228 @@
+"""
+File cache of generated reports
+
+Managers re-run the same report with the same filters many times during
+review season.  A report's output is stored as a file under
+MEDIA_ROOT/report_cache/, keyed on the report type, a hash of its
+normalized parameters, the requested format and the data version - the
+latest KPI.cache version of the report's source models:
+
+    path, output_format = report_cache.render('goal_progress', {'goal_type': 'project'}, 'csv')
+    FileResponse(open(path, 'rb'), ...)
+
+KPI.signals bumps a model's version on every save/delete, so any change to
+a source model moves the key and the old file is never served again.  The
+versions are read from the database (KPI.cache keeps them in the
+CacheVersion table), so the web workers and the report worker agree on
+them whichever process made the change.  A hit costs that one query and a
+stat(); it does not run the report's query.
+
+stream() is render() for downloads: on a miss it hands the output out as
+it is generated, writing it to the cache on the way, instead of writing
+the whole file before the first byte is sent.
+
+Hits refresh the file's mtime, and every store evicts the least recently
+used files beyond REPORT_CACHE_MAX_FILES / REPORT_CACHE_MAX_BYTES.  Empty
+reports are not cached.  File names are built from the report type, the
+parameters' hash, a known format and the version only, and nothing is
+written or deleted outside the cache directory.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from . import cache
+from .models import (
+    KPI, Competency, CompetencyAssessment, Department, Employee, Evaluation, EvaluationDetail, EvaluationPeriod,
+    Goal, KPICategory, Training
+)
+from .report_utils import (
+    REPORT_CONTENT_TYPES, ReportGenerator, output_format, report_extension, report_title, serialize_report
+)
+
+CACHE_DIR = 'report_cache'
+
+# Models whose changes alter each report's output, including the ones its filters join through
+# (department filters read the employee, date filters the evaluation period)
+REPORT_SOURCES = {
+    'employee_performance': [Employee, Department, Evaluation, EvaluationPeriod],
+    'department_performance': [Department, Employee, Evaluation, EvaluationPeriod],
+    'training': [Training, Employee],
+    'goal_progress': [Goal, Employee],
+    'evaluation_summary': [EvaluationDetail, Evaluation, EvaluationPeriod, Employee, KPI, KPICategory],
+    'competency_report': [CompetencyAssessment, Evaluation, EvaluationPeriod, Employee, Competency],
+}
+
+
+def normalize_parameters(filters):
+    """Filters without empty values, as strings, in a stable order"""
+    return {key: str(value) for key, value in sorted(filters.items()) if value not in (None, '')}
+
+
+def parameters_hash(filters):
+    encoded = json.dumps(normalize_parameters(filters), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()[:32]
+
+
+def data_version(report_type):
+    """The latest change version of the report's source models (from the database, so every process agrees)"""
+    return max(cache.get_versions(REPORT_SOURCES[report_type]).values())
+
+
+def cache_root():
+    return Path(settings.MEDIA_ROOT) / CACHE_DIR
+
+
+def _inside_cache(path):
+    """`path`, checked to be inside the cache directory"""
+    if not path.resolve().is_relative_to(cache_root().resolve()):
+        raise ValueError(f'{path} is outside the report cache')
+    return path
+
+
+def cache_path(report_type, filters, report_format):
+    """Where the report's output for the current data version is (or would be) stored"""
+    if report_type not in REPORT_SOURCES:
+        raise ValueError(f'Unknown report type: {report_type}')
+    report_format = output_format(report_format)
+    name = f'{parameters_hash(filters)}-{report_format}-{data_version(report_type)}.{report_extension(report_format)}'
+    return _inside_cache(cache_root() / report_type / name)
+
+
+def _touch(path):
+    """Mark a cached file recently used; False when it is not cached"""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def lookup(report_type, filters, report_format):
+    """Path of the cached output, or None on a miss"""
+    path = cache_path(report_type, filters, report_format)
+    return path if _touch(path) else None
+
+
+def storing(path, pieces):
+    """
+    Write `pieces` (text or bytes) to `path`, yielding each one (as bytes)
+    once it is written; the file only appears once the last one is.
+    Closing the generator early discards what was written.
+    """
+    _inside_cache(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, suffix='.part')
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            for piece in pieces:
+                piece = piece.encode() if isinstance(piece, str) else piece
+                output.write(piece)
+                yield piece
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    _remove_superseded(path)
+    evict()
+
+
+def store(path, pieces):
+    """Write `pieces` (text or bytes) to `path`; the file only appears once it is complete"""
+    for _ in storing(path, pieces):
+        pass
+
+
+def _remove_superseded(path):
+    """Delete the outputs of the same report and parameters for older data versions"""
+    _inside_cache(path)
+    prefix = path.name.rsplit('-', 1)[0] + '-'
+    for entry in os.scandir(path.parent):
+        if entry.name.startswith(prefix) and entry.name != path.name and not entry.name.endswith('.part'):
+            _unlink(entry.path)
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass  # Evicted concurrently
+
+
+def evict(max_files=None, max_bytes=None):
+    """Delete least recently used files until the cache fits its limits; returns how many were deleted"""
+    max_files = settings.REPORT_CACHE_MAX_FILES if max_files is None else max_files
+    max_bytes = settings.REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    files = []
+    for directory, _, names in os.walk(cache_root()):
+        for name in names:
+            if name.endswith('.part'):
+                continue
+            try:
+                status = os.stat(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue
+            files.append((status.st_mtime, status.st_size, os.path.join(directory, name)))
+
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    deleted = 0
+    for _, size, path in files:
+        if len(files) - deleted <= max_files and total <= max_bytes:
+            break
+        _unlink(path)
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def _lookup_or_serialize(report_type, filters, report_format):
+    """(path, True, None) on a hit, (path, False, serialize_report()'s result) on a miss"""
+    if report_format not in REPORT_CONTENT_TYPES:
+        raise ValueError(f'Unknown report format: {report_format}')
+    filters = normalize_parameters(filters)
+    # Read the version before the rows, so a change made while generating moves the key past this file
+    path = cache_path(report_type, filters, report_format)
+    if _touch(path):
+        return path, True, None
+
+    subtitle = ', '.join(f"{key.replace('_', ' ')}: {value}" for key, value in filters.items())
+    return path, False, serialize_report(
+        ReportGenerator().rows(report_type, filters), report_format, report_title(report_type), subtitle,
+    )
+
+
+def render(report_type, filters, report_format):
+    """
+    (path, format written) of the report's output, generated and cached on
+    a miss; None when the report has no rows.  Raises ValueError for
+    unknown report types and formats.
+    """
+    path, hit, serialized = _lookup_or_serialize(report_type, filters, report_format)
+    if hit:
+        return path, report_format
+    if serialized is None:
+        return None
+    store(path, serialized[0])
+    return path, serialized[1]
+
+
+def stream(report_type, filters, report_format):
+    """
+    The report's output for a download: (path, None, format) on a hit,
+    (None, pieces, format) on a miss, where `pieces` are its bytes, written
+    to the cache as they are handed out; None when the report has no rows.
+    Raises ValueError for unknown report types and formats.
+    """
+    path, hit, serialized = _lookup_or_serialize(report_type, filters, report_format)
+    if hit:
+        return path, None, report_format
+    if serialized is None:
+        return None
+    pieces, written_format = serialized
+    return None, storing(path, pieces), written_format
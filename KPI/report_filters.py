@@ -0,0 +1,157 @@
+"""
+Report filters, validated and compiled to SQL predicates
+
+Each report declares the filters it accepts and the column each one
+constrains.  normalize() validates a filters dict against that schema and
+returns it in canonical form (ids as ints, dates as ISO strings, empty
+values dropped), which is what Report.parameters records; compile_filters()
+turns it into a Q for the report's queryset:
+
+    filters = normalize('goal_progress', {'status': 'completed', 'date_from': '2024-01-01'})
+    goals = Goal.objects.filter(compile_filters('goal_progress', filters))
+
+Date ranges go to the column the report is about (a goal's target date, a
+training's start date) and, for evaluation data, to the evaluation period:
+date_from/date_to select the periods overlapping the range.  Filters on
+evaluations aggregated per employee are compiled separately
+(aggregate=True) and applied as aggregate FILTER clauses, so employees
+without matching evaluations still get a row.
+"""
+
+from datetime import date
+
+from django.db.models import Q
+
+from .models import Evaluation, Goal, Training
+
+ID = 'id'
+CHOICE = 'choice'
+DATE = 'date'
+
+
+class InvalidReportFilters(ValueError):
+    """Raised by normalize(); `errors` maps each rejected filter to the reason"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(f'{name}: {message}' for name, message in errors.items()))
+
+
+class Field:
+    """A report filter: its parameter name, the lookup it constrains and its type"""
+
+    def __init__(self, name, lookup, kind, choices=None, aggregate=False):
+        self.name = name
+        self.lookup = lookup
+        self.kind = kind
+        self.choices = {value for value, _ in choices or ()}
+        self.aggregate = aggregate
+
+    def parse(self, value):
+        """The canonical value of `value`; raises ValueError with the reason it is rejected"""
+        value = str(value).strip()
+        if self.kind == ID:
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError('must be a positive integer')
+            return int(value)
+        if self.kind == DATE:
+            try:
+                return date.fromisoformat(value).isoformat()
+            except ValueError:
+                raise ValueError('must be a date (YYYY-MM-DD)') from None
+        if value not in self.choices:
+            raise ValueError(f"must be one of {', '.join(sorted(self.choices))}")
+        return value
+
+
+def _choices(model, field):
+    return model._meta.get_field(field).flatchoices
+
+
+def _evaluation_fields(prefix, aggregate=False):
+    """Filters on evaluations reached through `prefix`, the period's dates for the range"""
+    return [
+        Field('period', f'{prefix}period_id', ID, aggregate=aggregate),
+        Field('status', f'{prefix}status', CHOICE, _choices(Evaluation, 'status'), aggregate=aggregate),
+        Field('date_from', f'{prefix}period__end_date__gte', DATE, aggregate=aggregate),
+        Field('date_to', f'{prefix}period__start_date__lte', DATE, aggregate=aggregate),
+    ]
+
+
+SCHEMAS = {
+    'employee_performance': [
+        Field('department', 'department_id', ID),
+        *_evaluation_fields('evaluation__', aggregate=True),
+    ],
+    'department_performance': [
+        Field('department', 'department_id', ID),
+        Field('period', 'period_id', ID),
+        Field('date_from', 'period__end_date__gte', DATE),
+        Field('date_to', 'period__start_date__lte', DATE),
+    ],
+    'training': [
+        Field('department', 'employee__department_id', ID),
+        Field('training_type', 'training_type', CHOICE, _choices(Training, 'training_type')),
+        Field('status', 'status', CHOICE, _choices(Training, 'status')),
+        Field('date_from', 'start_date__gte', DATE),
+        Field('date_to', 'start_date__lte', DATE),
+    ],
+    'goal_progress': [
+        Field('department', 'employee__department_id', ID),
+        Field('goal_type', 'goal_type', CHOICE, _choices(Goal, 'goal_type')),
+        Field('status', 'status', CHOICE, _choices(Goal, 'status')),
+        Field('priority', 'priority', CHOICE, _choices(Goal, 'priority')),
+        Field('date_from', 'target_date__gte', DATE),
+        Field('date_to', 'target_date__lte', DATE),
+    ],
+    'evaluation_summary': [
+        Field('department', 'evaluation__employee__department_id', ID),
+        *_evaluation_fields('evaluation__'),
+    ],
+    'competency_report': [
+        Field('department', 'evaluation__employee__department_id', ID),
+        *_evaluation_fields('evaluation__'),
+    ],
+}
+
+
+def field_names(report_type):
+    return [field.name for field in SCHEMAS[report_type]]
+
+
+def normalize(report_type, filters):
+    """
+    `filters` validated against the report's schema, in canonical form and
+    schema order.  Raises InvalidReportFilters for unknown filters, invalid
+    values or an inverted date range.
+    """
+    fields = {field.name: field for field in SCHEMAS[report_type]}
+    normalized, errors = {}, {}
+    for name, value in filters.items():
+        if value is None or value == '':
+            continue
+        if name not in fields:
+            errors[name] = f'not a filter of the {report_type} report'
+            continue
+        try:
+            normalized[name] = fields[name].parse(value)
+        except ValueError as e:
+            errors[name] = str(e)
+    if normalized.get('date_from', '') > normalized.get('date_to', '9999'):
+        errors['date_to'] = 'must not be before date_from'
+    if errors:
+        raise InvalidReportFilters(errors)
+    return {name: normalized[name] for name in fields if name in normalized}
+
+
+def compile_filters(report_type, filters, aggregate=False):
+    """
+    The Q selecting the rows `filters` asks for (validated first), or, with
+    `aggregate`, the Q for the report's aggregate FILTER clauses.
+    """
+    normalized = normalize(report_type, filters)
+    q = Q()
+    for field in SCHEMAS[report_type]:
+        if field.aggregate == aggregate and field.name in normalized:
+            q &= Q(**{field.lookup: normalized[field.name]})
+    return q
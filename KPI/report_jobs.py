@@ -0,0 +1,272 @@
+"""
+Background report generation
+
+Large reports outlive a request, so the reports page queues them instead
+of building them inline:
+
+    job = enqueue('employee_performance', 'csv', {'department': '3'}, request.user)
+
+`manage.py run_report_worker` claims queued jobs and runs them on a
+thread pool, or on a process pool for formats whose rendering is CPU-bound
+(PROCESS_FORMATS), so one large render does not hold the GIL for every
+other job.  Outputs come from KPI.report_cache, so re-running a report whose
+data has not changed only copies a file.  Each job writes its file under
+MEDIA_ROOT/reports/, records a
+Report pointing at it and sends the requester a `report_ready`
+notification (or a `system_alert` when it fails).
+
+The queue is the ReportJob table: a worker claims a job with a conditional
+UPDATE (status queued -> running), which is atomic on every database, so
+several workers can share one queue.  Claimed jobs record the worker's id,
+and a heartbeat thread in each worker refreshes heartbeat_at on its running
+jobs every HEARTBEAT_INTERVAL.  Jobs whose heartbeat is older than
+STALE_AFTER belong to a worker that died; every worker queues those again
+(one conditional UPDATE) when it starts and on each heartbeat, so a job
+still being worked on is never handed out twice.
+"""
+
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from . import report_cache, report_filters
+from .models import Notification, Report, ReportJob
+from .report_utils import REPORT_CONTENT_TYPES, ReportGenerator, report_extension, report_title
+
+REPORTS_DIR = 'reports'
+HEARTBEAT_INTERVAL = 30
+STALE_AFTER = timedelta(minutes=5)
+CLAIM_BATCH = 10
+
+# Formats rendered in the process pool; the others are I/O-bound and run in threads
+PROCESS_FORMATS = {'excel', 'pdf'}
+
+
+def enqueue(report_type, report_format, filters, user):
+    """
+    Queue a report with its normalized filters; raises ValueError for
+    report types or formats the generator does not know and
+    InvalidReportFilters for invalid filters
+    """
+    if report_type not in ReportGenerator.ROW_METHODS:
+        raise ValueError(f'Unknown report type: {report_type}')
+    if report_format not in REPORT_CONTENT_TYPES:
+        raise ValueError(f'Unknown report format: {report_format}')
+    return ReportJob.objects.create(
+        report_type=report_type, format=report_format, requested_by=user,
+        parameters=report_filters.normalize(report_type, filters),
+    )
+
+
+def new_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def claim_next(worker=''):
+    """Mark the oldest queued job running for `worker` and return it, or None when the queue is empty"""
+    queued = ReportJob.objects.filter(status='queued').order_by('created_at', 'id')
+    for job_id in queued.values_list('pk', flat=True)[:CLAIM_BATCH]:
+        # Another worker may claim the same job first; only one UPDATE matches
+        now = timezone.now()
+        claimed = ReportJob.objects.filter(pk=job_id, status='queued').update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            return ReportJob.objects.get(pk=job_id)
+    return None
+
+
+def heartbeat(worker):
+    """Mark the worker's running jobs alive; returns how many"""
+    return ReportJob.objects.filter(status='running', worker=worker).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale(older_than=STALE_AFTER):
+    """Queue again the running jobs whose worker stopped beating; returns how many"""
+    # The heartbeat is checked in the UPDATE itself, so a beat landing meanwhile keeps the job
+    return ReportJob.objects.filter(status='running', heartbeat_at__lt=timezone.now() - older_than).update(
+        status='queued', worker='', started_at=None, heartbeat_at=None,
+    )
+
+
+class Heartbeat(threading.Thread):
+    """Beats for a worker's running jobs and requeues dead workers' jobs every `interval` seconds"""
+
+    def __init__(self, worker, interval=HEARTBEAT_INTERVAL, log=None):
+        super().__init__(name=f'report-heartbeat-{worker}', daemon=True)
+        self.worker = worker
+        self.interval = interval
+        self.log = log or (lambda message: None)
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    heartbeat(self.worker)
+                    requeued = requeue_stale()
+                except DatabaseError as e:
+                    # Try again on the next beat; STALE_AFTER spans several of them
+                    self.log(f'Heartbeat failed ({e})')
+                    connection.close()
+                    continue
+                if requeued:
+                    self.log(f'Requeued {requeued} stale job(s)')
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def report_name(job):
+    return report_title(job.report_type)
+
+
+def write_report(job, source, report_format):
+    """Copy the report's output file under MEDIA_ROOT/reports/; returns the path relative to MEDIA_ROOT"""
+    relative = Path(REPORTS_DIR) / f'{timezone.now():%Y/%m}' / f'{job.report_type}_report_{job.pk}.{report_extension(report_format)}'
+    path = Path(settings.MEDIA_ROOT) / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write next to the target and rename, so readers never see a partial file
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, suffix='.part')
+    os.close(descriptor)
+    try:
+        shutil.copyfile(source, temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return relative.as_posix()
+
+
+def _fail(job, message):
+    job.status = 'failed'
+    job.error = message
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    Notification.objects.create(
+        recipient=job.requested_by,
+        notification_type='system_alert',
+        title=f'{report_name(job)} failed',
+        message=f'The report could not be generated: {message}',
+    )
+
+
+def process_job(job_id):
+    """Generate a claimed job's report; returns the job's final status"""
+    close_old_connections()
+    try:
+        job = ReportJob.objects.select_related('requested_by').get(pk=job_id)
+        try:
+            rendered = report_cache.render(job.report_type, job.parameters, job.format)
+            if rendered is None:
+                _fail(job, 'The report has no rows.')
+                return job.status
+            file_path = write_report(job, *rendered)
+        except Exception as e:
+            _fail(job, str(e) or e.__class__.__name__)
+            return job.status
+
+        with transaction.atomic():
+            job.report = Report.objects.create(
+                name=report_name(job),
+                report_type=job.report_type,
+                format=rendered[1],
+                parameters=job.parameters,
+                generated_by=job.requested_by,
+                file_path=file_path,
+            )
+            job.status = 'completed'
+            job.finished_at = timezone.now()
+            job.save(update_fields=['report', 'status', 'finished_at'])
+            Notification.objects.create(
+                recipient=job.requested_by,
+                notification_type='report_ready',
+                title=f'{job.report.name} is ready',
+                message=f'Your {job.report.get_format_display()} report has been generated and is ready to download.',
+            )
+        return job.status
+    finally:
+        close_old_connections()
+
+
+def run_worker(threads=4, processes=2, poll_interval=2.0, burst=False, log=None):
+    """
+    Process queued jobs until interrupted (or, with `burst`, until the
+    queue is empty).  A pool of size 0 runs its jobs inline.  Returns the
+    number of jobs processed.
+    """
+    log = log or (lambda message: None)
+    requeued = requeue_stale()
+    if requeued:
+        log(f'Requeued {requeued} stale job(s)')
+    worker = new_worker_id()
+    beating = Heartbeat(worker, log=log)
+    beating.start()
+
+    thread_pool = ThreadPoolExecutor(threads) if threads else None
+    # Spawned rather than forked: forked children would share the parent's database connections.
+    # Spawned children start from a fresh interpreter, so they set Django up before importing any job.
+    process_pool = ProcessPoolExecutor(
+        processes, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+    ) if processes else None
+    capacity = max(threads + processes, 1)
+    pending, processed = {}, 0
+
+    def collect(done):
+        nonlocal processed
+        for future in done:
+            job_id = pending.pop(future)
+            try:
+                log(f'Job {job_id}: {future.result()}')
+            except Exception as e:
+                # process_job records its own failures; this is the pool itself failing
+                ReportJob.objects.filter(pk=job_id).update(status='failed', error=str(e), finished_at=timezone.now())
+                log(f'Job {job_id}: failed ({e})')
+            processed += 1
+
+    try:
+        while True:
+            if len(pending) >= capacity:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+                continue
+            job = claim_next(worker)
+            if job is None:
+                if pending:
+                    done, _ = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    collect(done)
+                elif burst:
+                    break
+                else:
+                    time.sleep(poll_interval)
+                continue
+            pool = process_pool if job.format in PROCESS_FORMATS else thread_pool
+            pool = pool or thread_pool or process_pool
+            if pool is None:
+                log(f'Job {job.pk}: {process_job(job.pk)}')
+                processed += 1
+            else:
+                pending[pool.submit(process_job, job.pk)] = job.pk
+    finally:
+        for pool in (thread_pool, process_pool):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        collect(list(pending))
+        beating.stop()
+    return processed
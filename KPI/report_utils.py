@@ -2,151 +2,271 @@
 Report utilities for KPI management system
 """
 
-from django.http import HttpResponse
-from django.db.models import Avg, Count, Q
-from datetime import datetime, timedelta
-import csv
-import json
+from django.db.models import Avg, Count, F, Q
+from itertools import chain
+
+from . import stats
+from .report_filters import compile_filters, normalize
+from .streaming import buffered, csv_lines, json_array, jsonl_lines
+from .xlsx import CONTENT_TYPE as XLSX_CONTENT_TYPE, xlsx_chunks
+
+REPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+    'jsonl': 'application/x-ndjson',
+    'excel': XLSX_CONTENT_TYPE,
+    'pdf': 'application/pdf',
+}
+
+# File extensions of the formats not named after theirs
+REPORT_EXTENSIONS = {
+    'excel': 'xlsx',
+}
 
 
 class ReportGenerator:
-    """Basic report generator for KPI system"""
+    """
+    Report generator for KPI system.
+
+    Each report is one annotated values() query read with iterator(): the
+    `*_rows(filters)` methods yield the report's rows lazily, and the
+    `generate_*_report()` methods collect them into a list (None when the
+    report fails).  Filters are validated and compiled into the query's
+    WHERE (and aggregate FILTER) clauses by KPI.report_filters.
+    """
+    
+    CHUNK_SIZE = 2000
+    
+    # Report type -> method yielding its rows
+    ROW_METHODS = {
+        'employee_performance': 'employee_performance_rows',
+        'department_performance': 'department_performance_rows',
+        'training': 'training_rows',
+        'goal_progress': 'goal_progress_rows',
+        'evaluation_summary': 'evaluation_summary_rows',
+        'competency_report': 'competency_report_rows',
+    }
     
     def __init__(self):
         pass
     
+    def rows(self, report_type, filters):
+        """
+        Rows of report `report_type`; raises ValueError for unknown types
+        (and InvalidReportFilters, a ValueError, for invalid filters)
+        """
+        if report_type not in self.ROW_METHODS:
+            raise ValueError(f'Unknown report type: {report_type}')
+        # Validate now rather than when the rows are first read
+        filters = normalize(report_type, filters)
+        return getattr(self, self.ROW_METHODS[report_type])(filters)
+    
+    def employee_performance_rows(self, filters):
+        """Active employees with their average score and evaluation count"""
+        from .models import Employee
+        
+        employees = Employee.objects.filter(compile_filters('employee_performance', filters), status='active')
+        # Evaluation filters restrict what is averaged, not which employees are listed
+        evaluations = compile_filters('employee_performance', filters, aggregate=True) or None
+        
+        rows = employees.values(
+            'pk', 'employee_id', 'first_name', 'last_name', 'department__name', 'position',
+        ).annotate(
+            avg_score=Avg('evaluation__overall_score', filter=evaluations),
+            evaluation_count=Count('evaluation', filter=evaluations),
+        ).order_by('first_name', 'last_name', 'pk')
+        
+        for row in rows.iterator(chunk_size=self.CHUNK_SIZE):
+            yield {
+                'employee_id': row['employee_id'],
+                'name': f"{row['first_name']} {row['last_name']}",
+                'department': row['department__name'],
+                'position': row['position'],
+                'avg_score': round(row['avg_score'] or 0, 2),
+                'evaluation_count': row['evaluation_count'],
+            }
+    
+    def department_performance_rows(self, filters):
+        """Departments with headcount, average score and evaluation count (from the scorecards)"""
+        from .scorecards import department_performance
+        
+        for dept in department_performance(where=compile_filters('department_performance', filters)):
+            yield {
+                'department': dept['name'],
+                'employee_count': dept['employee_count'],
+                'avg_score': dept['score'],
+                'evaluation_count': dept['evaluation_count'],
+            }
+    
+    def training_rows(self, filters):
+        """Trainings with their type, status, score and end date"""
+        from .models import Training
+        
+        trainings = Training.objects.filter(compile_filters('training', filters))
+        rows = trainings.values('title', 'training_type', 'status', 'score', 'end_date')
+        
+        for row in rows.iterator(chunk_size=self.CHUNK_SIZE):
+            yield {
+                'training_name': row['title'],
+                'training_type': row['training_type'],
+                'status': row['status'],
+                'score': row['score'] or 0,
+                'completion_date': row['end_date'].strftime('%Y-%m-%d') if row['end_date'] else 'N/A',
+            }
+    
+    def goal_progress_rows(self, filters):
+        """Goals with their employee, status, progress and target date"""
+        from .models import Goal
+        
+        goals = Goal.objects.filter(compile_filters('goal_progress', filters))
+        rows = goals.values(
+            'title', 'employee__first_name', 'employee__last_name', 'goal_type', 'status', 'progress', 'target_date',
+        )
+        
+        for row in rows.iterator(chunk_size=self.CHUNK_SIZE):
+            yield {
+                'goal_title': row['title'],
+                'employee': f"{row['employee__first_name']} {row['employee__last_name']}",
+                'goal_type': row['goal_type'],
+                'status': row['status'],
+                'progress': row['progress'],
+                'due_date': row['target_date'].strftime('%Y-%m-%d'),
+            }
+    
+    def evaluation_summary_rows(self, filters):
+        """KPI results by category and KPI: one GROUP BY over the evaluation details"""
+        from .models import EvaluationDetail
+        
+        details = EvaluationDetail.objects.filter(compile_filters('evaluation_summary', filters))
+        rows = stats.grouped(details, ['kpi__category__name', 'kpi__name', 'kpi__target', 'kpi__unit', 'kpi_id'], [
+            stats.count('evaluation_count'),
+            stats.count('scored_count', 'score'),
+            stats.average('avg_score', 'score'),
+            stats.minimum('min_score', 'score'),
+            stats.maximum('max_score', 'score'),
+            stats.average('avg_actual', 'actual_value'),
+            stats.count('target_met_count', q=Q(actual_value__gte=F('target_value'))),
+        ]).order_by('kpi__category__name', 'kpi__name', 'kpi_id')
+        
+        for row in rows.iterator(chunk_size=self.CHUNK_SIZE):
+            yield {
+                'category': row['kpi__category__name'],
+                'kpi': row['kpi__name'],
+                'target': row['kpi__target'],
+                'unit': row['kpi__unit'],
+                'evaluation_count': row['evaluation_count'],
+                'avg_score': round(row['avg_score'] or 0, 2),
+                'min_score': row['min_score'],
+                'max_score': row['max_score'],
+                'avg_actual': round(row['avg_actual'] or 0, 2),
+                'target_met_rate': round(row['target_met_count'] * 100 / row['evaluation_count'], 1),
+            }
+    
+    def competency_report_rows(self, filters):
+        """Competency ratings by category and competency: one GROUP BY over the assessments"""
+        from .models import CompetencyAssessment
+        
+        assessments = CompetencyAssessment.objects.filter(compile_filters('competency_report', filters))
+        rows = stats.grouped(assessments, ['competency__category', 'competency__name', 'competency_id'], [
+            stats.count('assessment_count'),
+            stats.average('avg_rating', 'rating'),
+            stats.minimum('min_rating', 'rating'),
+            stats.maximum('max_rating', 'rating'),
+            stats.count('strong_count', rating__gte=4),
+            stats.count('weak_count', rating__lte=2),
+        ]).order_by('competency__category', 'competency__name', 'competency_id')
+        
+        for row in rows.iterator(chunk_size=self.CHUNK_SIZE):
+            yield {
+                'category': row['competency__category'],
+                'competency': row['competency__name'],
+                'assessment_count': row['assessment_count'],
+                'avg_rating': round(row['avg_rating'] or 0, 2),
+                'min_rating': row['min_rating'],
+                'max_rating': row['max_rating'],
+                'strong_count': row['strong_count'],
+                'weak_count': row['weak_count'],
+            }
+    
     def generate_employee_performance_report(self, report_format, filters):
         """Generate employee performance report"""
         try:
-            from .models import Employee, Evaluation
-            
-            # Basic employee performance data
-            employees = Employee.objects.filter(status='active')
-            
-            if filters.get('department'):
-                employees = employees.filter(department_id=filters['department'])
-            
-            report_data = []
-            for employee in employees:
-                evaluations = Evaluation.objects.filter(employee=employee)
-                avg_score = evaluations.aggregate(Avg('overall_score'))['overall_score__avg'] or 0
-                
-                report_data.append({
-                    'employee_id': employee.employee_id,
-                    'name': employee.full_name,
-                    'department': employee.department.name,
-                    'position': employee.position,
-                    'avg_score': round(avg_score, 2),
-                    'evaluation_count': evaluations.count(),
-                })
-            
-            return report_data
+            return list(self.employee_performance_rows(filters))
         except Exception as e:
             return None
     
     def generate_department_performance_report(self, report_format, filters):
         """Generate department performance report"""
         try:
-            from .models import Department, Evaluation
-            
-            departments = Department.objects.all()
-            report_data = []
-            
-            for dept in departments:
-                evaluations = Evaluation.objects.filter(employee__department=dept)
-                avg_score = evaluations.aggregate(Avg('overall_score'))['overall_score__avg'] or 0
-                employee_count = dept.employee_set.filter(status='active').count()
-                
-                report_data.append({
-                    'department': dept.name,
-                    'employee_count': employee_count,
-                    'avg_score': round(avg_score, 2),
-                    'evaluation_count': evaluations.count(),
-                })
-            
-            return report_data
+            return list(self.department_performance_rows(filters))
         except Exception as e:
             return None
     
     def generate_training_report(self, report_format, filters):
         """Generate training report"""
         try:
-            from .models import Training
-            
-            trainings = Training.objects.all()
-            
-            if filters.get('training_type'):
-                trainings = trainings.filter(training_type=filters['training_type'])
-            
-            report_data = []
-            for training in trainings:
-                report_data.append({
-                    'training_name': training.name,
-                    'training_type': training.training_type,
-                    'status': training.status,
-                    'score': training.score or 0,
-                    'completion_date': training.completion_date.strftime('%Y-%m-%d') if training.completion_date else 'N/A',
-                })
-            
-            return report_data
+            return list(self.training_rows(filters))
         except Exception as e:
             return None
     
     def generate_goal_progress_report(self, report_format, filters):
         """Generate goal progress report"""
         try:
-            from .models import Goal
-            
-            goals = Goal.objects.all()
-            
-            if filters.get('goal_type'):
-                goals = goals.filter(goal_type=filters['goal_type'])
-            
-            report_data = []
-            for goal in goals:
-                report_data.append({
-                    'goal_title': goal.title,
-                    'employee': goal.employee.full_name,
-                    'goal_type': goal.goal_type,
-                    'status': goal.status,
-                    'progress': goal.progress,
-                    'due_date': goal.due_date.strftime('%Y-%m-%d'),
-                })
-            
-            return report_data
+            return list(self.goal_progress_rows(filters))
         except Exception as e:
             return None
 
 
-def generate_report_response(report_data, filename, report_format):
-    """Generate HTTP response for report download"""
-    if not report_data:
+def output_format(report_format):
+    """The format a report requested as `report_format` is written in"""
+    return report_format if report_format in REPORT_CONTENT_TYPES else 'csv'
+
+
+def report_extension(report_format):
+    return REPORT_EXTENSIONS.get(report_format, report_format)
+
+
+def report_title(report_type):
+    return f"{report_type.replace('_', ' ').title()} Report"
+
+
+def serialize_report(report_rows, report_format, title='Report', subtitle=''):
+    """
+    (pieces, format written) for report rows (dicts) as CSV, a JSON array,
+    JSON Lines, an xlsx workbook or a PDF (headed with `title` and
+    `subtitle`); formats without a serializer are written as CSV.  Pieces
+    are text, except for xlsx and PDF where they are bytes.
+
+    Rows are serialized as they are read, so memory stays bounded by the
+    query's chunk size whatever the length of the report.  Returns None
+    when there are no rows; raises pdf.ReportTooLarge (a ValueError) for
+    PDFs longer than pdf.MAX_ROWS rows.
+    """
+    rows = iter(report_rows)
+    first = next(rows, None)
+    if first is None:
         return None
+    rows = chain([first], rows)
+    report_format = output_format(report_format)
     
-    if report_format == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
-        
-        if report_data:
-            writer = csv.DictWriter(response, fieldnames=report_data[0].keys())
-            writer.writeheader()
-            writer.writerows(report_data)
+    if report_format == 'json':
+        pieces = json_array(rows)
+    elif report_format == 'jsonl':
+        pieces = jsonl_lines(rows)
+    elif report_format == 'excel':
+        # Already written in chunks of compressed output
+        header = list(first)
+        return xlsx_chunks(header, ([row[key] for key in header] for row in rows)), report_format
+    elif report_format == 'pdf':
+        from .pdf import pdf_chunks
         
-        return response
+        header = list(first)
+        chunks = pdf_chunks(header, ([row[key] for key in header] for row in rows), title, subtitle)
+        # Lay the document out now, so reports too long for a PDF fail before a response starts
+        return chain([next(chunks)], chunks), report_format
+    else:
+        header = list(first)
+        pieces = csv_lines(header, ([row[key] for key in header] for row in rows))
     
-    elif report_format == 'json':
-        response = HttpResponse(content_type='application/json')
-        response['Content-Disposition'] = f'attachment; filename="{filename}.json"'
-        response.write(json.dumps(report_data, indent=2, default=str))
-        return response
-    
-    else:  # Default to CSV
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
-        
-        if report_data:
-            writer = csv.DictWriter(response, fieldnames=report_data[0].keys())
-            writer.writeheader()
-            writer.writerows(report_data)
-        
-        return response
+    return buffered(pieces), report_format
+
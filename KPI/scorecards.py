@@ -0,0 +1,339 @@
+"""
+Department x evaluation period scorecards and per-employee scorecards
+
+DepartmentScorecard keeps one row per (department, period) with headcount,
+evaluation counts, average/median score and the rating distribution, so the
+dashboard and the department performance report read a handful of rows
+instead of aggregating every evaluation.
+
+A period's scorecards are rebuilt with set-based queries when the period is
+created or closed (is_active goes from True to False); in between, KPI.signals
+refreshes the affected rows whenever an evaluation or employee changes.
+score_sum/score_count are stored next to the average so scorecards can be
+combined across periods.
+
+EmployeeScorecard keeps one employee's evaluation, goal and training totals;
+it is recomputed for that employee whenever one of their rows changes.
+
+Bulk operations bypass signals; run `manage.py rebuild_department_scorecards`
+and `manage.py rebuild_employee_scorecards` after those.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import stats
+from .models import (
+    Department, DepartmentScorecard, Employee, EmployeeScorecard, Evaluation, EvaluationPeriod,
+    Goal, Training
+)
+
+RATING_FIELDS = {rating: f'{rating}_count' for rating, _ in Evaluation.PERFORMANCE_RATINGS}
+
+TRACKED_MODELS = {
+    Department: (),
+    EvaluationPeriod: ('is_active',),
+    Employee: ('status', 'department_id'),
+    Evaluation: ('status', 'overall_score', 'performance_rating', 'period_id', 'employee__department_id'),
+}
+
+
+def scorecard_metrics():
+    return [
+        stats.count('evaluation_count'),
+        stats.count('approved_count', status='approved'),
+        stats.total('score_sum', 'overall_score'),
+        stats.count('score_count', 'overall_score'),
+        *[stats.count(field, performance_rating=rating) for rating, field in RATING_FIELDS.items()],
+    ]
+
+
+def median(values):
+    """Median of an already sorted list of Decimals, or None"""
+    if not values:
+        return None
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return ((values[middle - 1] + values[middle]) / 2).quantize(Decimal('0.01'))
+
+
+def _scorecard_values(totals, scores, headcount):
+    values = {name: totals.get(name) or 0 for name in (
+        'evaluation_count', 'approved_count', 'score_sum', 'score_count', *RATING_FIELDS.values()
+    )}
+    values['headcount'] = headcount
+    values['avg_score'] = (
+        (Decimal(values['score_sum']) / values['score_count']).quantize(Decimal('0.01'))
+        if values['score_count'] else None
+    )
+    values['median_score'] = median(scores)
+    return values
+
+
+def _headcounts(department_ids=None):
+    """Active employees per department, one GROUP BY"""
+    employees = Employee.objects.filter(status='active')
+    if department_ids is not None:
+        employees = employees.filter(department_id__in=department_ids)
+    return {
+        row['department_id']: row['headcount']
+        for row in stats.grouped(employees, ['department_id'], [stats.count('headcount')])
+    }
+
+
+def rebuild_department_scorecards(period=None):
+    """
+    Recompute the scorecards of one period (or every period) from scratch.
+
+    Runs a fixed number of queries however many departments and
+    evaluations there are: one GROUP BY for the counters, one ordered scan
+    of the scores for the medians, and a bulk insert.
+    """
+    periods = EvaluationPeriod.objects.all()
+    if period is not None:
+        periods = periods.filter(pk=getattr(period, 'pk', period))
+    period_ids = list(periods.values_list('pk', flat=True))
+    department_ids = list(Department.objects.values_list('pk', flat=True))
+    headcounts = _headcounts()
+
+    evaluations = Evaluation.objects.filter(period_id__in=period_ids)
+    totals = {
+        (row['employee__department_id'], row['period_id']): row
+        for row in stats.grouped(evaluations, ['employee__department_id', 'period_id'], scorecard_metrics())
+    }
+    scores = defaultdict(list)
+    for department_id, period_id, score in evaluations.filter(overall_score__isnull=False).order_by(
+        'overall_score'
+    ).values_list('employee__department_id', 'period_id', 'overall_score'):
+        scores[(department_id, period_id)].append(score)
+
+    rebuilt_at = timezone.now()
+    scorecards = [
+        DepartmentScorecard(
+            department_id=department_id, period_id=period_id, rebuilt_at=rebuilt_at,
+            **_scorecard_values(
+                totals.get((department_id, period_id), {}),
+                scores[(department_id, period_id)],
+                headcounts.get(department_id, 0),
+            )
+        )
+        for period_id in period_ids
+        for department_id in department_ids
+    ]
+
+    with transaction.atomic():
+        DepartmentScorecard.objects.filter(period_id__in=period_ids).delete()
+        DepartmentScorecard.objects.bulk_create(scorecards, batch_size=1000)
+    return len(scorecards)
+
+
+def refresh_scorecards(keys, create=True):
+    """
+    Recompute the given (department_id, period_id) scorecards.
+
+    Missing rows are only created when `create` is set; deletes pass False
+    because a cascading delete may already have removed the department or
+    period the row would point at.
+    """
+    for department_id, period_id in keys:
+        if department_id is None or period_id is None:
+            continue
+        evaluations = Evaluation.objects.filter(employee__department_id=department_id, period_id=period_id)
+        scores = list(evaluations.filter(overall_score__isnull=False).order_by(
+            'overall_score'
+        ).values_list('overall_score', flat=True))
+        values = _scorecard_values(
+            stats.compute(evaluations, scorecard_metrics()),
+            scores,
+            _headcounts([department_id]).get(department_id, 0),
+        )
+        updated = DepartmentScorecard.objects.filter(
+            department_id=department_id, period_id=period_id
+        ).update(updated_at=timezone.now(), **values)
+        if not updated and create:
+            DepartmentScorecard.objects.create(department_id=department_id, period_id=period_id, **values)
+
+
+def refresh_headcounts(department_ids):
+    """Copy the current active headcount onto every scorecard of the departments"""
+    headcounts = _headcounts(department_ids)
+    for department_id in department_ids:
+        DepartmentScorecard.objects.filter(department_id=department_id).update(
+            headcount=headcounts.get(department_id, 0)
+        )
+
+
+def load_state(model, pk):
+    """Read the columns a tracked row contributes to the scorecards, or None"""
+    if pk is None:
+        return None
+    return model.objects.filter(pk=pk).values('pk', *TRACKED_MODELS[model]).first()
+
+
+def _evaluation_key(state):
+    return (state['employee__department_id'], state['period_id'])
+
+
+def apply_change(model, old_state, new_state):
+    """Refresh the scorecards a single row change affects"""
+    if old_state is not None and old_state == new_state:
+        return
+
+    if model is Evaluation:
+        refresh_scorecards(
+            {_evaluation_key(state) for state in (old_state, new_state) if state is not None},
+            create=new_state is not None,
+        )
+
+    elif model is Employee:
+        department_ids = {state['department_id'] for state in (old_state, new_state) if state is not None}
+        refresh_headcounts(department_ids)
+        if len(department_ids) == 2:
+            # A transfer moves the employee's evaluations between departments
+            period_ids = set(Evaluation.objects.filter(
+                employee_id=new_state['pk']
+            ).values_list('period_id', flat=True))
+            refresh_scorecards({
+                (department_id, period_id) for department_id in department_ids for period_id in period_ids
+            })
+
+    elif model is EvaluationPeriod and new_state is not None:
+        closed = old_state is not None and old_state['is_active'] and not new_state['is_active']
+        if old_state is None or closed:
+            rebuild_department_scorecards(new_state['pk'])
+
+    elif model is Department and old_state is None and new_state is not None:
+        headcount = _headcounts([new_state['pk']]).get(new_state['pk'], 0)
+        DepartmentScorecard.objects.bulk_create([
+            DepartmentScorecard(department_id=new_state['pk'], period_id=period_id, headcount=headcount)
+            for period_id in EvaluationPeriod.objects.values_list('pk', flat=True)
+        ], ignore_conflicts=True)
+
+
+def department_performance(period=None, department=None, where=None):
+    """
+    Per-department results combined across scorecards (all periods unless
+    `period` is given, or scorecards matching the Q `where`), sorted by
+    department name.
+    """
+    scorecards = DepartmentScorecard.objects.all()
+    if where is not None:
+        scorecards = scorecards.filter(where)
+    if period:
+        scorecards = scorecards.filter(period_id=period)
+    if department:
+        scorecards = scorecards.filter(department_id=department)
+    rows = stats.grouped(scorecards, ['department_id', 'department__name'], [
+        stats.maximum('employee_count', 'headcount', default=0),
+        stats.total('evaluation_count', 'evaluation_count'),
+        stats.total('approved_count', 'approved_count'),
+        stats.total('score_sum', 'score_sum'),
+        stats.total('score_count', 'score_count'),
+        *[stats.total(field, field) for field in RATING_FIELDS.values()],
+    ]).order_by('department__name')
+    return [
+        {
+            'department_id': row['department_id'],
+            'name': row['department__name'],
+            'employee_count': row['employee_count'] or 0,
+            'evaluation_count': row['evaluation_count'] or 0,
+            'approved_count': row['approved_count'] or 0,
+            'score': round(float(row['score_sum']) / row['score_count'], 2) if row['score_count'] else 0,
+            'rating_distribution': {rating: row[field] or 0 for rating, field in RATING_FIELDS.items()},
+        }
+        for row in rows
+    ]
+
+
+EMPLOYEE_TRACKED_MODELS = {
+    Employee: (),
+    Evaluation: ('employee_id', 'status', 'overall_score', 'created_at'),
+    Goal: ('employee_id', 'status', 'progress'),
+    Training: ('employee_id', 'status', 'score'),
+}
+
+EMPLOYEE_METRICS = {
+    Evaluation: [
+        stats.count('total_evaluations'),
+        stats.count('completed_evaluations', status='approved'),
+        stats.total('evaluation_score_sum', 'overall_score'),
+        stats.count('evaluation_score_count', 'overall_score'),
+        stats.maximum('last_evaluated_at', 'created_at'),
+    ],
+    Goal: [
+        stats.count('total_goals'),
+        stats.count('completed_goals', status='completed'),
+        stats.total('goal_progress_sum', 'progress'),
+    ],
+    Training: [
+        stats.count('total_trainings'),
+        stats.count('completed_trainings', status='completed'),
+        stats.total('training_score_sum', 'score'),
+        stats.count('training_score_count', 'score'),
+    ],
+}
+
+
+def refresh_employee_scorecard(employee_id, create=True):
+    """
+    Recompute one employee's scorecard (one aggregate query per source
+    table) and return it; None only when it does not exist and `create` is
+    false.
+    """
+    values = {}
+    for model, metrics in EMPLOYEE_METRICS.items():
+        values.update(stats.compute(model.objects.filter(employee_id=employee_id), metrics))
+    scorecards = EmployeeScorecard.objects.filter(employee_id=employee_id)
+    if not scorecards.update(updated_at=timezone.now(), **values):
+        if not create:
+            return None
+        try:
+            with transaction.atomic():
+                return EmployeeScorecard.objects.create(employee_id=employee_id, **values)
+        except IntegrityError:
+            # Created concurrently (another request or signal handler); store our totals in it
+            scorecards.update(updated_at=timezone.now(), **values)
+    return scorecards.get()
+
+
+def rebuild_employee_scorecards():
+    """Recompute every employee scorecard with one GROUP BY per source table"""
+    totals = defaultdict(dict)
+    for model, metrics in EMPLOYEE_METRICS.items():
+        for row in stats.grouped(model.objects.all(), ['employee_id'], metrics):
+            employee_id = row.pop('employee_id')
+            totals[employee_id].update({name: value for name, value in row.items() if value is not None})
+
+    rebuilt_at = timezone.now()
+    scorecards = [
+        EmployeeScorecard(employee_id=employee_id, rebuilt_at=rebuilt_at, **totals[employee_id])
+        for employee_id in Employee.objects.values_list('pk', flat=True)
+    ]
+    with transaction.atomic():
+        EmployeeScorecard.objects.all().delete()
+        EmployeeScorecard.objects.bulk_create(scorecards, batch_size=1000)
+    return len(scorecards)
+
+
+def load_employee_state(model, pk):
+    """Read the columns a tracked row contributes to an employee scorecard, or None"""
+    if pk is None:
+        return None
+    return model.objects.filter(pk=pk).values('pk', *EMPLOYEE_TRACKED_MODELS[model]).first()
+
+
+def apply_employee_change(model, old_state, new_state):
+    """Refresh the scorecards of the employees a single row change affects"""
+    if old_state is not None and old_state == new_state:
+        return
+    if model is Employee:
+        if old_state is None and new_state is not None:
+            EmployeeScorecard.objects.get_or_create(employee_id=new_state['pk'])
+        return
+    employee_ids = {state['employee_id'] for state in (old_state, new_state) if state is not None}
+    for employee_id in employee_ids:
+        refresh_employee_scorecard(employee_id, create=new_state is not None)
@@ -0,0 +1,352 @@
+"""
+Full-text search for the list views
+
+The list pages used to OR together `__icontains` predicates over joined
+columns, which no index can answer.  Instead every searchable row has a
+document (its searchable columns, joined names included) in one index
+table, maintained through KPI.signals:
+
+    employees = search.matching(employees, request.GET.get('search', ''))
+    employees = search.ranked(employees, query)     # adds `search_rank`
+
+Backends, picked by database vendor:
+
+- SQLite: an FTS5 virtual table ranked with bm25().  The rowid packs the
+  object id and the entity code (object_id * 16 + code), so updates and
+  deletes are rowid lookups.
+- PostgreSQL: a table with a generated tsvector column and a GIN index,
+  ranked with ts_rank().
+- Anything else: the old `__icontains` predicates, without ranking.
+
+Search terms match word prefixes ("ana" finds "Anastasia", "E00" finds
+"E001"); every term must match.  Punctuation separates words, so e-mail
+addresses are searchable by their parts.
+
+autocomplete_employees() serves the employee pickers (see
+KPI.forms.EmployeeAutocompleteSelect) from the same prefix index.
+
+Bulk operations bypass signals; run `manage.py rebuild_search_index`
+after those.
+"""
+
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Employee, EmployeeProfile, Evaluation, Goal, Training
+
+SEARCH_TABLE = 'kpi_search_index'
+BATCH_SIZE = 1000
+AUTOCOMPLETE_LIMIT = 10
+
+_WORDS = re.compile(r'\w+')
+
+
+class SearchEntity:
+    """A searchable model: its entity code and the columns of its document"""
+
+    def __init__(self, code, fields):
+        self.code = code
+        self.fields = fields
+
+    def employee_fields(self, link):
+        """Employee columns the document reads through the `link` foreign key"""
+        prefix = f'{link}__'
+        return {field[len(prefix):] for field in self.fields if field.startswith(prefix)}
+
+
+ENTITIES = {
+    Employee: SearchEntity(1, ('first_name', 'last_name', 'employee_id', 'email', 'position')),
+    Evaluation: SearchEntity(2, (
+        'employee__first_name', 'employee__last_name', 'evaluator__first_name', 'evaluator__last_name',
+    )),
+    Goal: SearchEntity(3, ('title', 'employee__first_name', 'employee__last_name')),
+    Training: SearchEntity(4, ('title', 'provider', 'employee__first_name', 'employee__last_name')),
+    EmployeeProfile: SearchEntity(5, ('employee__first_name', 'employee__last_name', 'employee__employee_id')),
+}
+
+TRACKED_MODELS = {model: entity.fields for model, entity in ENTITIES.items()}
+
+
+def words(text):
+    return _WORDS.findall(str(text).lower())
+
+
+def document(values):
+    """Index text of a row: its words, punctuation dropped"""
+    return ' '.join(word for value in values if value for word in words(value))
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SQLiteBackend:
+    """FTS5 virtual table; rowid = object_id * 16 + entity code"""
+
+    vendor = 'sqlite'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                f"body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def clear(self, code):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE (rowid & 15) = %s', [code])
+
+    def index(self, code, documents):
+        """Insert or replace (pk, body) documents; returns how many were written"""
+        indexed = 0
+        with self.connection.cursor() as cursor:
+            for batch in _batches(documents):
+                cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [
+                    (pk * 16 + code,) for pk, _ in batch
+                ])
+                cursor.executemany(f'INSERT INTO {SEARCH_TABLE} (rowid, body) VALUES (%s, %s)', [
+                    (pk * 16 + code, body) for pk, body in batch
+                ])
+                indexed += len(batch)
+        return indexed
+
+    def remove(self, code, pks):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(pk * 16 + code,) for pk in pks])
+
+    @staticmethod
+    def query(terms):
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def matches(self, code, terms):
+        return (
+            f'SELECT rowid >> 4 FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND (rowid & 15) = %s',
+            (self.query(terms), code),
+        )
+
+    def rank(self, code, terms, pk_column):
+        # bm25() is lower for better matches
+        return (
+            f'SELECT -bm25({SEARCH_TABLE}) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND rowid = {pk_column} * 16 + %s',
+            (self.query(terms), code),
+        )
+
+
+class PostgresBackend:
+    """Plain table with a generated tsvector column under a GIN index"""
+
+    vendor = 'postgresql'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                f"entity smallint NOT NULL, object_id bigint NOT NULL, body text NOT NULL, "
+                f"document tsvector GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED, "
+                f"PRIMARY KEY (entity, object_id))"
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING gin (document)'
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def clear(self, code):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE entity = %s', [code])
+
+    def index(self, code, documents):
+        indexed = 0
+        with self.connection.cursor() as cursor:
+            for batch in _batches(documents):
+                cursor.executemany(
+                    f'INSERT INTO {SEARCH_TABLE} (entity, object_id, body) VALUES (%s, %s, %s) '
+                    f'ON CONFLICT (entity, object_id) DO UPDATE SET body = EXCLUDED.body',
+                    [(code, pk, body) for pk, body in batch],
+                )
+                indexed += len(batch)
+        return indexed
+
+    def remove(self, code, pks):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE entity = %s AND object_id = ANY(%s)', [code, list(pks)]
+            )
+
+    @staticmethod
+    def query(terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def matches(self, code, terms):
+        return (
+            f"SELECT object_id FROM {SEARCH_TABLE} "
+            f"WHERE entity = %s AND document @@ to_tsquery('simple', %s)",
+            (code, self.query(terms)),
+        )
+
+    def rank(self, code, terms, pk_column):
+        return (
+            f"SELECT ts_rank(document, to_tsquery('simple', %s)) FROM {SEARCH_TABLE} "
+            f"WHERE entity = %s AND object_id = {pk_column}",
+            (self.query(terms), code),
+        )
+
+
+class FallbackBackend:
+    """No index: match with `__icontains` on every document column"""
+
+    vendor = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_index(self):
+        pass
+
+    def drop_index(self):
+        pass
+
+    def clear(self, code):
+        pass
+
+    def index(self, code, documents):
+        return 0
+
+    def remove(self, code, pks):
+        pass
+
+
+BACKENDS = {backend.vendor: backend for backend in (SQLiteBackend, PostgresBackend)}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    return BACKENDS.get(connection.vendor, FallbackBackend)(connection)
+
+
+def matching(queryset, query):
+    """Rows of `queryset` matching every word of `query` (unchanged for blank queries)"""
+    terms = words(query)
+    if not terms:
+        return queryset
+    entity = ENTITIES[queryset.model]
+    backend = get_backend(queryset.db)
+    if isinstance(backend, FallbackBackend):
+        return queryset.filter(*[
+            reduce(or_, [Q(**{f'{field}__icontains': term}) for field in entity.fields]) for term in terms
+        ])
+    sql, params = backend.matches(entity.code, terms)
+    return queryset.filter(pk__in=RawSQL(sql, params))
+
+
+def ranked(queryset, query):
+    """`queryset` annotated with `search_rank` (higher is better; 0 without an index or query)"""
+    terms = words(query)
+    backend = get_backend(queryset.db)
+    if not terms or isinstance(backend, FallbackBackend):
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+    ops = backend.connection.ops
+    meta = queryset.model._meta
+    pk_column = f'{ops.quote_name(meta.db_table)}.{ops.quote_name(meta.pk.column)}'
+    sql, params = backend.rank(ENTITIES[queryset.model].code, terms, pk_column)
+    return queryset.annotate(search_rank=RawSQL(sql, params, output_field=FloatField()))
+
+
+def autocomplete_employees(query, limit=AUTOCOMPLETE_LIMIT):
+    """Best `limit` employees for a picker, as [{'id', 'text', 'employee_id', 'name', 'department'}]"""
+    if not words(query):
+        return []
+    employees = ranked(matching(Employee.objects.all(), query), query).order_by(
+        '-search_rank', 'first_name', 'last_name', 'pk'
+    ).values('pk', 'employee_id', 'first_name', 'last_name', 'department__name')[:limit]
+    return [
+        {
+            'id': employee['pk'],
+            # same label as Employee.__str__, which the widget shows for the selected value
+            'text': f"{employee['first_name']} {employee['last_name']} - {employee['employee_id']}",
+            'employee_id': employee['employee_id'],
+            'name': f"{employee['first_name']} {employee['last_name']}",
+            'department': employee['department__name'],
+        }
+        for employee in employees
+    ]
+
+
+def documents(entity, queryset):
+    """(pk, document) pairs for the rows of `queryset`"""
+    rows = queryset.order_by().values_list('pk', *entity.fields)
+    for pk, *values in rows.iterator(chunk_size=BATCH_SIZE):
+        yield pk, document(values)
+
+
+def rebuild(get_model=None, using=DEFAULT_DB_ALIAS):
+    """
+    Reindex every searchable row; returns {model name: rows indexed}.
+    `get_model` maps a model to the class to read from (historical models
+    in migrations).
+    """
+    backend = get_backend(using)
+    backend.create_index()
+    counts = {}
+    for model, entity in ENTITIES.items():
+        source = get_model(model) if get_model else model
+        backend.clear(entity.code)
+        counts[model._meta.model_name] = backend.index(
+            entity.code, documents(entity, source._default_manager.using(using))
+        )
+    return counts
+
+
+def load_state(model, pk):
+    """Read the columns of a row's document, or None"""
+    if pk is None:
+        return None
+    return model.objects.filter(pk=pk).values('pk', *TRACKED_MODELS[model]).first()
+
+
+def apply_change(model, old_state, new_state):
+    """Reindex a changed row; employee renames also reindex the rows that show the name"""
+    if old_state is not None and old_state == new_state:
+        return
+    entity = ENTITIES[model]
+    backend = get_backend()
+    if new_state is None:
+        backend.remove(entity.code, [old_state['pk']])
+        return
+    backend.index(entity.code, [(new_state['pk'], document(new_state[field] for field in entity.fields))])
+
+    if model is Employee and old_state is not None:
+        changed = {field for field in entity.fields if old_state[field] != new_state[field]}
+        for dependent, dependent_entity in ENTITIES.items():
+            links = [
+                link for link in ('employee', 'evaluator')
+                if dependent_entity.employee_fields(link) & changed
+            ]
+            if links:
+                rows = dependent.objects.filter(reduce(or_, [Q(**{f'{link}_id': new_state['pk']}) for link in links]))
+                backend.index(dependent_entity.code, documents(dependent_entity, rows))
@@ -0,0 +1,84 @@
+"""
+Signal handlers that keep the KPI read models in sync with their source tables
+
+Each read model registers the models it tracks, how to load the part of a row
+it depends on, and how to fold an (old_state, new_state) pair into itself.
+The old state is read in pre_save/pre_delete, before the row changes.
+
+The source models that cached reads depend on (CACHED_MODELS) also bump
+their cache namespace version (see KPI.cache) on save and delete, once per
+transaction.  Other models, the read models among them, have no such
+receivers: nothing is cached under their namespaces, and without delete
+receivers the read model rebuilds keep Django's fast (single DELETE) path.
+"""
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+
+from . import activity, cache, scorecards, search, snapshots
+from .models import (
+    KPI, Competency, CompetencyAssessment, Department, Employee, EmployeeLeaveRequest, EmployeeProfile, Evaluation,
+    EvaluationDetail, EvaluationPeriod, Goal, KPICategory, LeaveType, PerformanceImprovementPlan, Training
+)
+
+
+def _refresh_rollup(model, old_state, new_state):
+    snapshots.refresh_rollup_buckets(snapshots.rollup_keys_for_change(model, old_state, new_state))
+
+
+READ_MODELS = {
+    'dashboard_snapshot': (snapshots.TRACKED_MODELS, snapshots.load_state, snapshots.apply_change),
+    'evaluation_rollup': (snapshots.ROLLUP_TRACKED_MODELS, snapshots.load_rollup_state, _refresh_rollup),
+    'department_scorecard': (scorecards.TRACKED_MODELS, scorecards.load_state, scorecards.apply_change),
+    'employee_scorecard': (
+        scorecards.EMPLOYEE_TRACKED_MODELS, scorecards.load_employee_state, scorecards.apply_employee_change
+    ),
+    'activity_log': (activity.EVENT_SOURCES, activity.load_state, activity.apply_change),
+    'search_index': (search.TRACKED_MODELS, search.load_state, search.apply_change),
+}
+
+
+def connect_read_model(name, tracked_models, load_state, apply_change):
+    attribute = f'_{name}_state'
+
+    def remember_state(sender, instance, raw=False, **kwargs):
+        """Capture the row's current contribution before it changes"""
+        if raw:
+            return
+        setattr(instance, attribute, load_state(sender, instance.pk))
+
+    def update_on_save(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        apply_change(sender, getattr(instance, attribute, None), load_state(sender, instance.pk))
+
+    def update_on_delete(sender, instance, **kwargs):
+        old_state = getattr(instance, attribute, None)
+        if old_state is not None:
+            apply_change(sender, old_state, None)
+
+    for model in tracked_models:
+        uid = f'{name}_{model._meta.model_name}'
+        pre_save.connect(remember_state, sender=model, weak=False, dispatch_uid=f'{uid}_pre_save')
+        post_save.connect(update_on_save, sender=model, weak=False, dispatch_uid=f'{uid}_post_save')
+        pre_delete.connect(remember_state, sender=model, weak=False, dispatch_uid=f'{uid}_pre_delete')
+        post_delete.connect(update_on_delete, sender=model, weak=False, dispatch_uid=f'{uid}_post_delete')
+
+
+# Models whose namespaces cached reads are keyed on: the conditional views, the
+# charts, facet and list counts, cached report files and analytics snapshots
+CACHED_MODELS = (
+    Competency, CompetencyAssessment, Department, Employee, EmployeeLeaveRequest, EmployeeProfile, Evaluation,
+    EvaluationDetail, EvaluationPeriod, Goal, KPI, KPICategory, LeaveType, PerformanceImprovementPlan, Training
+)
+
+
+def connect_cache_versions():
+    for model in CACHED_MODELS:
+        uid = f'cache_version_{model._meta.model_name}'
+        post_save.connect(cache.bump_model_version, sender=model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(cache.bump_model_version, sender=model, dispatch_uid=f'{uid}_post_delete')
+
+
+for name, (tracked_models, load_state, apply_change) in READ_MODELS.items():
+    connect_read_model(name, tracked_models, load_state, apply_change)
+connect_cache_versions()
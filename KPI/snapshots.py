@@ -0,0 +1,477 @@
+"""
+Materialized read models for the KPI dashboard and trend charts
+
+DashboardSnapshot holds every counter and average the dashboard shows, and
+EvaluationMonthlyRollup holds per-month score aggregates for trend charts.
+Both are built from scratch by the rebuild_* functions and kept current in
+between by the apply_change()/refresh_rollup_buckets() hooks, which
+KPI.signals calls on every save/delete of a tracked model.  Bulk operations
+(queryset.update(), bulk_create(), loaddata) bypass signals; run
+`manage.py rebuild_dashboard_snapshot` and `manage.py
+rebuild_evaluation_rollup` after those.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DateField, F, IntegerField, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import stats
+from .models import (
+    DashboardSnapshot, Department, Employee, Evaluation, EvaluationDetail,
+    EvaluationMonthlyRollup, Goal, Training
+)
+
+SNAPSHOT_PK = 1
+
+
+def month_key(value):
+    """Return the 'YYYY-MM' key used for monthly buckets"""
+    if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+        value = timezone.localtime(value)
+    return value.strftime('%Y-%m')
+
+
+class SnapshotDelta:
+    """Signed changes to apply to the dashboard snapshot"""
+
+    def __init__(self):
+        self.fields = defaultdict(Decimal)
+        self.hires = defaultdict(int)
+
+    def merge(self, other, sign=1):
+        for name, value in other.fields.items():
+            self.fields[name] += sign * value
+        for key, value in other.hires.items():
+            self.hires[key] += sign * value
+        return self
+
+    def __bool__(self):
+        return any(self.fields.values()) or any(self.hires.values())
+
+
+def _department_delta(row):
+    delta = SnapshotDelta()
+    delta.fields['total_departments'] += 1
+    return delta
+
+
+def _employee_delta(row):
+    delta = SnapshotDelta()
+    is_active = row['status'] == 'active'
+    delta.fields['total_employees'] += is_active
+    delta.hires[month_key(row['hire_date'])] += 1
+    return delta
+
+
+def _evaluation_delta(row):
+    delta = SnapshotDelta()
+    delta.fields['total_evaluations'] += 1
+    delta.fields['pending_evaluations'] += row['status'] == 'draft'
+    delta.fields['completed_evaluations'] += row['status'] == 'approved'
+    score = row['overall_score']
+    if score is not None:
+        delta.fields['evaluation_score_sum'] += score
+        delta.fields['evaluation_score_count'] += 1
+    return delta
+
+
+def _goal_delta(row):
+    delta = SnapshotDelta()
+    delta.fields['total_goals'] += 1
+    delta.fields['completed_goals'] += row['status'] == 'completed'
+    delta.fields['overdue_goals'] += row['status'] == 'overdue'
+    delta.fields['goal_progress_sum'] += row['progress'] or 0
+    return delta
+
+
+def _training_delta(row):
+    delta = SnapshotDelta()
+    delta.fields['total_trainings'] += 1
+    delta.fields['completed_trainings'] += row['status'] == 'completed'
+    delta.fields['ongoing_trainings'] += row['status'] == 'in_progress'
+    if row['score'] is not None:
+        delta.fields['training_score_sum'] += row['score']
+        delta.fields['training_score_count'] += 1
+    return delta
+
+
+# model -> (columns needed to compute its contribution, contribution function)
+TRACKED_MODELS = {
+    Department: ((), _department_delta),
+    Employee: (('status', 'hire_date'), _employee_delta),
+    Evaluation: (('status', 'overall_score'), _evaluation_delta),
+    Goal: (('status', 'progress'), _goal_delta),
+    Training: (('status', 'score'), _training_delta),
+}
+
+
+def load_state(model, pk):
+    """Read the columns a tracked row contributes to the snapshot, or None"""
+    if pk is None:
+        return None
+    columns, _ = TRACKED_MODELS[model]
+    return model.objects.filter(pk=pk).values('pk', *columns).first()
+
+
+def build_delta(model, old_state, new_state):
+    """Difference between a row's contribution before and after a change"""
+    _, contribution = TRACKED_MODELS[model]
+    delta = SnapshotDelta()
+    if new_state is not None:
+        delta.merge(contribution(new_state))
+    if old_state is not None:
+        delta.merge(contribution(old_state), sign=-1)
+    return delta
+
+
+def apply_delta(delta):
+    """
+    Apply a delta to the stored snapshot as one UPDATE of F() increments.
+
+    No read-modify-write: concurrent writers do not wait on a SELECT ...
+    FOR UPDATE of the row, only on each other's (single statement) UPDATE
+    until their transactions commit.  Without a snapshot row nothing is
+    updated; the next read rebuilds it from scratch.
+    """
+    if not delta:
+        return
+    values = {}
+    for name, value in delta.fields.items():
+        if value:
+            is_count = isinstance(DashboardSnapshot._meta.get_field(name), IntegerField)
+            values[name] = F(name) + (int(value) if is_count else value)
+    hires = [
+        When(new_employees_month=date(int(key[:4]), int(key[5:]), 1), then=Value(count))
+        for key, count in delta.hires.items() if count
+    ]
+    if hires:
+        values['new_employees_this_month'] = F('new_employees_this_month') + Case(*hires, default=Value(0))
+    if values:
+        DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).update(updated_at=timezone.now(), **values)
+
+
+def apply_change(model, old_state, new_state):
+    """Fold a single row change into the snapshot"""
+    apply_delta(build_delta(model, old_state, new_state))
+
+
+def _count_new_employees(month_start):
+    return Employee.objects.filter(
+        hire_date__year=month_start.year,
+        hire_date__month=month_start.month,
+    ).count()
+
+
+def rebuild_dashboard_snapshot():
+    """Recompute the snapshot from the source tables"""
+    month_start = date.today().replace(day=1)
+
+    employee_stats = stats.compute(Employee.objects.all(), [
+        stats.count('total_employees', status='active'),
+        stats.count('new_employees_this_month', hire_date__year=month_start.year,
+                    hire_date__month=month_start.month),
+    ])
+    evaluation_stats = stats.compute(Evaluation.objects.all(), [
+        stats.count('total_evaluations'),
+        stats.count('pending_evaluations', status='draft'),
+        stats.count('completed_evaluations', status='approved'),
+        stats.total('evaluation_score_sum', 'overall_score'),
+        stats.count('evaluation_score_count', 'overall_score'),
+    ])
+    goal_stats = stats.compute(Goal.objects.all(), [
+        stats.count('total_goals'),
+        stats.count('completed_goals', status='completed'),
+        stats.count('overdue_goals', status='overdue'),
+        stats.total('goal_progress_sum', 'progress'),
+    ])
+    training_stats = stats.compute(Training.objects.all(), [
+        stats.count('total_trainings'),
+        stats.count('completed_trainings', status='completed'),
+        stats.count('ongoing_trainings', status='in_progress'),
+        stats.total('training_score_sum', 'score'),
+        stats.count('training_score_count', 'score'),
+    ])
+
+    values = {
+        **employee_stats, **evaluation_stats, **goal_stats, **training_stats,
+        'total_departments': Department.objects.count(),
+        'new_employees_month': month_start,
+        'rebuilt_at': timezone.now(),
+    }
+    with transaction.atomic():
+        snapshot, _ = DashboardSnapshot.objects.update_or_create(pk=SNAPSHOT_PK, defaults=values)
+    return snapshot
+
+
+def get_dashboard_snapshot():
+    """Return the current snapshot, building it on first use"""
+    snapshot = DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).first()
+    if snapshot is None:
+        return rebuild_dashboard_snapshot()
+
+    month_start = date.today().replace(day=1)
+    if snapshot.new_employees_month != month_start:
+        # The "new this month" window rolled over since the last write
+        snapshot.new_employees_month = month_start
+        snapshot.new_employees_this_month = _count_new_employees(month_start)
+        DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).update(
+            new_employees_month=month_start,
+            new_employees_this_month=snapshot.new_employees_this_month,
+        )
+    return snapshot
+
+
+def recent_months(count, today=None):
+    """First day of each of the last `count` calendar months, oldest first"""
+    today = today or date.today()
+    year, month = today.year, today.month
+    months = []
+    for _ in range(count):
+        months.append(date(year, month, 1))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return list(reversed(months))
+
+
+def month_range(start, end):
+    """First day of every month from `start` to `end` inclusive"""
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(date(year, month, 1))
+        month += 1
+        if month == 13:
+            year, month = year + 1, 1
+    return months
+
+
+def month_start(value):
+    """First day of the (local) month containing a date or datetime"""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date()
+    return value.replace(day=1)
+
+
+def _month_bounds(month):
+    next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return (
+        timezone.make_aware(datetime(month.year, month.month, 1)),
+        timezone.make_aware(datetime(next_month.year, next_month.month, 1)),
+    )
+
+
+# Monthly evaluation rollup
+
+ROLLUP_TRACKED_MODELS = {
+    Employee: ('department_id',),
+    Evaluation: ('created_at', 'employee__department_id', 'period_id'),
+    EvaluationDetail: (
+        'evaluation__created_at', 'evaluation__employee__department_id',
+        'evaluation__period_id', 'kpi__category_id',
+    ),
+}
+
+
+def rollup_metrics(field):
+    return [
+        stats.total('score_sum', field),
+        stats.count('score_count', field),
+        stats.minimum('score_min', field),
+        stats.maximum('score_max', field),
+    ]
+
+
+def load_rollup_state(model, pk):
+    """Read the columns that place a row in its rollup buckets, or None"""
+    if pk is None:
+        return None
+    return model.objects.filter(pk=pk).values('pk', *ROLLUP_TRACKED_MODELS[model]).first()
+
+
+def _overall_keys(evaluations, department_id):
+    """Rollup bucket keys for (created_at, period_id) pairs in one department"""
+    return {
+        (month_start(created_at), department_id, period_id, None)
+        for created_at, period_id in evaluations
+    }
+
+
+def _category_keys(details, department_id):
+    """Rollup bucket keys for (created_at, period_id, category_id) triples in one department"""
+    return {
+        (month_start(created_at), department_id, period_id, category_id)
+        for created_at, period_id, category_id in details
+    }
+
+
+def rollup_keys_for_change(model, old_state, new_state):
+    """Every rollup bucket a row change can affect"""
+    keys = set()
+    if model is Evaluation:
+        states = [state for state in (old_state, new_state) if state]
+        for state in states:
+            keys.add((month_start(state['created_at']), state['employee__department_id'], state['period_id'], None))
+        moved = old_state and new_state and (
+            old_state['employee__department_id'] != new_state['employee__department_id'] or
+            old_state['period_id'] != new_state['period_id']
+        )
+        if moved:
+            categories = set(EvaluationDetail.objects.filter(
+                evaluation_id=new_state['pk']
+            ).values_list('kpi__category_id', flat=True))
+            for state in states:
+                for category_id in categories:
+                    keys.add((month_start(state['created_at']), state['employee__department_id'], state['period_id'], category_id))
+    elif model is EvaluationDetail:
+        for state in (old_state, new_state):
+            if state:
+                keys.add((
+                    month_start(state['evaluation__created_at']), state['evaluation__employee__department_id'],
+                    state['evaluation__period_id'], state['kpi__category_id'],
+                ))
+    elif model is Employee and old_state and new_state:
+        if old_state['department_id'] != new_state['department_id']:
+            evaluations = list(Evaluation.objects.filter(
+                employee_id=new_state['pk']
+            ).values_list('created_at', 'period_id'))
+            details = list(EvaluationDetail.objects.filter(
+                evaluation__employee_id=new_state['pk']
+            ).values_list('evaluation__created_at', 'evaluation__period_id', 'kpi__category_id').distinct())
+            for department_id in (old_state['department_id'], new_state['department_id']):
+                keys |= _overall_keys(evaluations, department_id)
+                keys |= _category_keys(details, department_id)
+    return keys
+
+
+def refresh_rollup_buckets(keys):
+    """Recompute the given (month, department_id, period_id, category_id) buckets"""
+    for month, department_id, period_id, category_id in keys:
+        start, end = _month_bounds(month)
+        if category_id is None:
+            field = 'overall_score'
+            rows = Evaluation.objects.filter(
+                created_at__gte=start, created_at__lt=end,
+                employee__department_id=department_id, period_id=period_id,
+            )
+        else:
+            field = 'score'
+            rows = EvaluationDetail.objects.filter(
+                evaluation__created_at__gte=start, evaluation__created_at__lt=end,
+                evaluation__employee__department_id=department_id,
+                evaluation__period_id=period_id, kpi__category_id=category_id,
+            )
+        totals = stats.compute(rows, rollup_metrics(field))
+        bucket = dict(month=month, department_id=department_id, period_id=period_id, category_id=category_id)
+        if totals['score_count']:
+            EvaluationMonthlyRollup.objects.update_or_create(**bucket, defaults=totals)
+        else:
+            EvaluationMonthlyRollup.objects.filter(**bucket).delete()
+
+
+def rebuild_monthly_rollup():
+    """Recompute every rollup bucket with one GROUP BY per score source"""
+    overall = stats.grouped(
+        Evaluation.objects.filter(overall_score__isnull=False).annotate(
+            month=TruncMonth('created_at', output_field=DateField())
+        ),
+        ['month', 'employee__department_id', 'period_id'],
+        rollup_metrics('overall_score'),
+    )
+    by_category = stats.grouped(
+        EvaluationDetail.objects.filter(score__isnull=False).annotate(
+            month=TruncMonth('evaluation__created_at', output_field=DateField())
+        ),
+        ['month', 'evaluation__employee__department_id', 'evaluation__period_id', 'kpi__category_id'],
+        rollup_metrics('score'),
+    )
+
+    buckets = [
+        EvaluationMonthlyRollup(
+            month=row['month'], department_id=row['employee__department_id'],
+            period_id=row['period_id'], score_sum=row['score_sum'], score_count=row['score_count'],
+            score_min=row['score_min'], score_max=row['score_max'],
+        )
+        for row in overall
+    ]
+    buckets += [
+        EvaluationMonthlyRollup(
+            month=row['month'], department_id=row['evaluation__employee__department_id'],
+            period_id=row['evaluation__period_id'], category_id=row['kpi__category_id'],
+            score_sum=row['score_sum'], score_count=row['score_count'],
+            score_min=row['score_min'], score_max=row['score_max'],
+        )
+        for row in by_category
+    ]
+
+    with transaction.atomic():
+        EvaluationMonthlyRollup.objects.all().delete()
+        EvaluationMonthlyRollup.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
+
+
+TREND_GROUPS = {
+    'department': ('department_id', 'department__name'),
+    'period': ('period_id', 'period__name'),
+    'category': ('category_id', 'category__name'),
+}
+
+
+def evaluation_trend(start, end, department=None, period=None, category=None, group_by=None):
+    """
+    Monthly average scores between two months, read from the rollup table.
+
+    Returns one series per `group_by` value (a single 'All' series when
+    group_by is None) with a point for every month in the range; months
+    without evaluations have an average of None.
+    """
+    rows = EvaluationMonthlyRollup.objects.filter(month__gte=month_start(start), month__lte=month_start(end))
+    if department:
+        rows = rows.filter(department_id=department)
+    if period:
+        rows = rows.filter(period_id=period)
+    if category:
+        rows = rows.filter(category_id=category)
+    elif group_by == 'category':
+        rows = rows.filter(category__isnull=False)
+    else:
+        rows = rows.filter(category__isnull=True)
+
+    group_fields = list(TREND_GROUPS[group_by]) if group_by else []
+    totals = stats.grouped(rows, ['month', *group_fields], [
+        stats.total('score_sum', 'score_sum'),
+        stats.total('score_count', 'score_count'),
+        stats.minimum('score_min', 'score_min'),
+        stats.maximum('score_max', 'score_max'),
+    ])
+
+    months = month_range(month_start(start), month_start(end))
+    series = {}
+    for row in totals:
+        key = row[group_fields[0]] if group_by else None
+        entry = series.setdefault(key, {
+            'key': key,
+            'label': row[group_fields[1]] if group_by else 'All',
+            'points': {},
+        })
+        entry['points'][row['month']] = row
+
+    result = []
+    for entry in sorted(series.values(), key=lambda item: item['label']):
+        points = []
+        for month in months:
+            row = entry['points'].get(month)
+            points.append({
+                'month': month.strftime('%Y-%m'),
+                'average': stats.ratio(row['score_sum'], row['score_count']) if row else None,
+                'count': row['score_count'] if row else 0,
+                'min': float(row['score_min']) if row else None,
+                'max': float(row['score_max']) if row else None,
+            })
+        result.append({'key': entry['key'], 'label': entry['label'], 'points': points})
+    return {'months': [month.strftime('%Y-%m') for month in months], 'series': result}
@@ -0,0 +1,82 @@
+"""
+Single-pass statistics for filtered querysets
+
+List views and dashboards used to issue one COUNT/AVG/SUM query per number
+they display.  Describe the numbers as metrics instead and compute them all
+with one conditional aggregate:
+
+    stats = compute(evaluations, [
+        count('total_evaluations'),
+        count('completed_count', status='approved'),
+        average('avg_score', 'overall_score'),
+    ])
+"""
+
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+
+
+class Metric:
+    """A named aggregate, optionally restricted to rows matching `filter`"""
+
+    def __init__(self, name, function, field='pk', filter=None, default=0):
+        self.name = name
+        self.function = function
+        self.field = field
+        self.filter = filter
+        self.default = default
+
+    def expression(self):
+        return self.function(self.field, filter=self.filter)
+
+    def __repr__(self):
+        return f"<Metric {self.name}: {self.function.__name__}({self.field})>"
+
+
+def _filter(q, filters):
+    if filters:
+        q = (q & Q(**filters)) if q is not None else Q(**filters)
+    return q
+
+
+def count(name, field='pk', q=None, **filters):
+    """Number of rows (or non-null `field` values) matching the filters"""
+    return Metric(name, Count, field, _filter(q, filters))
+
+
+def average(name, field, q=None, default=0, **filters):
+    return Metric(name, Avg, field, _filter(q, filters), default)
+
+
+def total(name, field, q=None, default=0, **filters):
+    return Metric(name, Sum, field, _filter(q, filters), default)
+
+
+def minimum(name, field, q=None, default=None, **filters):
+    return Metric(name, Min, field, _filter(q, filters), default)
+
+
+def maximum(name, field, q=None, default=None, **filters):
+    return Metric(name, Max, field, _filter(q, filters), default)
+
+
+def ratio(total, count):
+    """`total` / `count` rounded to 2 places, 0 when there are no rows; for stored running sums"""
+    return round(float(total) / count, 2) if count else 0
+
+
+def grouped(queryset, group_by, metrics):
+    """Evaluate the metrics once per distinct `group_by` combination (one GROUP BY query)"""
+    return queryset.order_by().values(*group_by).annotate(
+        **{metric.name: metric.expression() for metric in metrics}
+    )
+
+
+def compute(queryset, metrics):
+    """Evaluate every metric against `queryset` in one database round trip"""
+    results = queryset.order_by().aggregate(
+        **{metric.name: metric.expression() for metric in metrics}
+    )
+    for metric in metrics:
+        if results[metric.name] is None:
+            results[metric.name] = metric.default
+    return results
@@ -0,0 +1,63 @@
+"""
+Serializers for streamed downloads
+
+Each serializer turns an iterator of rows into an iterator of text pieces
+that StreamingHttpResponse sends as they come, so a download never holds
+more than one piece in memory:
+
+    StreamingHttpResponse(buffered(csv_lines(header, rows)), content_type='text/csv')
+
+buffered() joins small pieces into writes of about BUFFER_SIZE characters;
+one write per row would make a syscall (and, chunked, a frame) per row.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+BUFFER_SIZE = 64 * 1024
+
+
+class _Echo:
+    """File-like object csv.writer writes to; write() hands the line back"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    """CSV lines: `header`, then each row (a sequence of values)"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(records):
+    """JSON Lines: one object per line"""
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+
+def json_array(records):
+    """A JSON array written element by element"""
+    yield '['
+    separator = '\n'
+    for record in records:
+        yield separator + json.dumps(record, cls=DjangoJSONEncoder)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def buffered(pieces, size=BUFFER_SIZE):
+    """`pieces` joined into strings of at least `size` characters (the last one may be shorter)"""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
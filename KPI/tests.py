@@ -1,3 +1,1658 @@
-from django.test import TestCase
+import importlib.util
+import json
+import os
+import runpy
+import socketserver
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.cache import cache as django_cache, caches
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Department, Employee, EvaluationPeriod, Evaluation, EvaluationDetail, Competency, CompetencyAssessment, Goal,
+    Training, KPICategory, KPI, DashboardSnapshot, EvaluationMonthlyRollup, DepartmentScorecard,
+    EmployeeScorecard, GoalProgress, ActivityEvent, Notification, Report, ReportJob, CacheVersion,
+    EmployeeGoalSubmission
+)
+from . import analytics, cache, charts, report_cache, report_filters, report_jobs, scorecards, search, signals, stats
+from .facets import FACETS, facet_counts
+from .projections import EVALUATION_ROWS, GOAL_ROWS
+from . import pdf
+from .pdf import ROWS_PER_PAGE, LazyStory, ReportTooLarge, pdf_chunks
+from .streaming import buffered, csv_lines, json_array
+from .xlsx import CONTENT_TYPE as XLSX_CONTENT_TYPE, column_letter, xlsx_chunks
+from .pagination import InvalidCursor, KeysetPaginator
+from .query_plans import analyze_plan, audit_listings
+from .report_utils import ReportGenerator, serialize_report
+from .employee360 import Employee360
+from .forms import EmployeeForm, GoalForm
+from .scorecards import (
+    department_performance, rebuild_department_scorecards, rebuild_employee_scorecards
+)
+from .snapshots import (
+    get_dashboard_snapshot, rebuild_dashboard_snapshot, rebuild_monthly_rollup
+)
+
+
+class KPITestDataMixin:
+    """Small, fully-populated data set shared by the test cases"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Cache version bumps run on commit, which never comes inside a TestCase
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.user = User.objects.create_user('hr', password='secret', is_staff=True)
+            cls.it = Department.objects.create(name='Information Technology')
+            cls.finance = Department.objects.create(name='Finance')
+            cls.period = EvaluationPeriod.objects.create(
+                name='Q1', period_type='quarterly',
+                start_date=date(2024, 1, 1), end_date=date(2024, 3, 31),
+            )
+            cls.manager = cls.make_employee('E001', cls.it, first_name='Aina')
+            cls.employee = cls.make_employee('E002', cls.it, first_name='Badrul', manager=cls.manager)
+            cls.analyst = cls.make_employee('E003', cls.finance, first_name='Chen')
+
+    @classmethod
+    def make_employee(cls, employee_id, department, **kwargs):
+        defaults = {
+            'first_name': 'Test', 'last_name': 'User', 'email': f'{employee_id}@example.com',
+            'position': 'Engineer', 'hire_date': date(2020, 1, 1), 'status': 'active',
+        }
+        defaults.update(kwargs)
+        return Employee.objects.create(employee_id=employee_id, department=department, **defaults)
+
+    def make_evaluation(self, employee, score=None, status='draft', period=None):
+        return Evaluation.objects.create(
+            employee=employee, evaluator=self.manager, period=period or self.period,
+            status=status, overall_score=score,
+        )
+
+    def make_goal(self, employee, status='pending', progress=0):
+        return Goal.objects.create(
+            employee=employee, title='Ship it', description='Deliver the release',
+            target_date=date.today() + timedelta(days=30), status=status, progress=progress,
+        )
+
+    def make_training(self, employee, status='planned', score=None):
+        return Training.objects.create(
+            employee=employee, title='Django', description='ORM deep dive',
+            start_date=date.today(), end_date=date.today(), status=status, score=score,
+        )
+
+
+class DashboardSnapshotTests(KPITestDataMixin, TestCase):
+    SNAPSHOT_FIELDS = [
+        'total_employees', 'total_departments', 'new_employees_this_month',
+        'total_evaluations', 'pending_evaluations', 'completed_evaluations',
+        'evaluation_score_sum', 'evaluation_score_count',
+        'total_goals', 'completed_goals', 'overdue_goals', 'goal_progress_sum',
+        'total_trainings', 'completed_trainings', 'ongoing_trainings',
+        'training_score_sum', 'training_score_count',
+    ]
+
+    def assertSnapshotMatchesRebuild(self):
+        incremental = DashboardSnapshot.objects.get()
+        rebuilt = rebuild_dashboard_snapshot()
+        for field in self.SNAPSHOT_FIELDS:
+            self.assertEqual(getattr(incremental, field), getattr(rebuilt, field), field)
+
+    def test_snapshot_is_built_on_first_read(self):
+        self.assertFalse(DashboardSnapshot.objects.exists())
+        snapshot = get_dashboard_snapshot()
+        self.assertEqual(snapshot.total_employees, 3)
+        self.assertEqual(snapshot.total_departments, 2)
+
+    def test_incremental_updates_match_full_rebuild(self):
+        get_dashboard_snapshot()
+        evaluation = self.make_evaluation(self.employee, score=Decimal('72.50'))
+        self.make_evaluation(self.analyst, score=Decimal('91.00'), status='approved')
+        goal = self.make_goal(self.employee, progress=40)
+        self.make_training(self.analyst, status='in_progress', score=Decimal('80'))
+        self.assertSnapshotMatchesRebuild()
+
+        evaluation.status = 'approved'
+        evaluation.overall_score = Decimal('88.00')
+        evaluation.save()
+        goal.status = 'completed'
+        goal.progress = 100
+        goal.save()
+        self.assertSnapshotMatchesRebuild()
+
+        snapshot = DashboardSnapshot.objects.get()
+        self.assertEqual(snapshot.completed_evaluations, 2)
+        self.assertEqual(snapshot.avg_score, 89.5)
+
+    def test_deletes_and_department_moves_are_tracked(self):
+        get_dashboard_snapshot()
+        self.make_evaluation(self.employee, score=Decimal('60'))
+        self.make_goal(self.employee)
+        self.employee.department = self.finance
+        self.employee.status = 'inactive'
+        self.employee.save()
+        self.assertSnapshotMatchesRebuild()
+
+        self.employee.delete()
+        self.assertSnapshotMatchesRebuild()
+        self.finance.delete()
+        self.assertSnapshotMatchesRebuild()
+
+    def test_deltas_are_single_increment_updates(self):
+        get_dashboard_snapshot()
+        with CaptureQueriesContext(connection) as queries:
+            self.make_goal(self.employee, progress=40)
+        snapshot_queries = [query['sql'] for query in queries if 'KPI_dashboardsnapshot' in query['sql']]
+        self.assertEqual(len(snapshot_queries), 1)
+        self.assertTrue(snapshot_queries[0].startswith('UPDATE'))
+        self.make_employee('E004', self.finance, hire_date=date.today())
+        self.assertSnapshotMatchesRebuild()
+
+    def test_dashboard_renders_from_snapshot(self):
+        self.make_evaluation(self.employee, score=Decimal('75'))
+        get_dashboard_snapshot()
+        self.client.force_login(self.user)
+        # session + user, snapshot row, recent evaluations; charts load separately
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('KPI:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_evaluations'], 1)
+        self.assertContains(response, reverse('KPI:chart_department_performance'))
+
+
+class StatsServiceTests(KPITestDataMixin, TestCase):
+    def test_compute_returns_every_metric_in_one_query(self):
+        self.make_evaluation(self.employee, score=Decimal('70'), status='approved')
+        self.make_evaluation(self.analyst, score=None)
+        with self.assertNumQueries(1):
+            result = stats.compute(Evaluation.objects.all(), [
+                stats.count('total'),
+                stats.count('approved', status='approved'),
+                stats.count('scored', 'overall_score'),
+                stats.average('avg_score', 'overall_score'),
+                stats.total('score_sum', 'overall_score', employee__department=self.finance),
+            ])
+        self.assertEqual(result, {
+            'total': 2, 'approved': 1, 'scored': 1,
+            'avg_score': Decimal('70'), 'score_sum': 0,
+        })
+
+
+class ListViewQueryCountTests(KPITestDataMixin, TestCase):
+    """Statistics on the list pages come from a single aggregate query"""
+
+    def setUp(self):
+        django_cache.clear()
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_evaluation(self.employee, score=Decimal('80'))
+            self.make_goal(self.employee, status='in_progress', progress=50)
+            self.make_training(self.employee, status='completed')
+
+    def assertQueryBudget(self, url_name, queries, **params):
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_evaluation_list(self):
+        # session, user, versions (ETag, facet key), keyset page rows, stats, 3 facet counts, department labels
+        response = self.assertQueryBudget('KPI:evaluation_list', 10)
+        self.assertEqual(response.context['total_evaluations'], 1)
+        self.assertEqual(response.context['avg_score'], Decimal('80'))
+
+    def test_goal_list(self):
+        # session, user, versions (ETag, facet key), keyset page rows, stats, 4 facet counts, department labels
+        response = self.assertQueryBudget('KPI:goal_list', 11, status='in_progress')
+        self.assertEqual(response.context['in_progress_count'], 1)
+        # facet counts are cached for the same filters
+        self.assertQueryBudget('KPI:goal_list', 6, status='in_progress')
+
+    def test_training_list(self):
+        response = self.assertQueryBudget('KPI:training_list', 10)
+        self.assertEqual(response.context['completed_count'], 1)
+
+    def test_leave_management_dashboard(self):
+        # session, user, stats, department leave counts, recent requests
+        response = self.assertQueryBudget('KPI:leave_management_dashboard', 5)
+        self.assertEqual(response.context['total_leave_requests'], 0)
+
+
+class KeysetListPaginationTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.client.force_login(self.user)
+
+    def walk(self, url, params, direction='next'):
+        """Pages of employee ids from following the Next (or Previous) links"""
+        pages = []
+        while True:
+            response = self.client.get(url, params)
+            page = response.context['employees']
+            pages.append([employee.pk for employee in page])
+            query = page.next_query if direction == 'next' else page.previous_query
+            if not (page.has_next if direction == 'next' else page.has_previous):
+                return pages, page
+            params = QueryDict(query)
+
+    def test_pages_tie_break_on_id_in_both_directions(self):
+        # 45 employees, most sharing a last name, so pages split inside ties
+        for index in range(42):
+            self.make_employee(f'T{index:03}', self.finance, last_name='Same' if index % 7 else 'Apple')
+        url = reverse('KPI:employee_list')
+        expected = list(Employee.objects.order_by('last_name', 'id').values_list('pk', flat=True))
+
+        pages, last = self.walk(url, {'sort': 'last_name', 'status': 'active'})
+        self.assertEqual([len(page) for page in pages], [20, 20, 5])
+        self.assertEqual(sum(pages, []), expected)
+        self.assertIn('status=active', last.next_query)
+
+        back, first = self.walk(url, QueryDict(last.previous_query), direction='previous')
+        self.assertEqual(back, pages[1::-1])
+        self.assertFalse(first.has_previous)
+        self.assertNotIn('cursor', first.first_query)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        url = reverse('KPI:employee_list')
+        response = self.client.get(url, {'cursor': 'bogus'})
+        self.assertEqual(len(response.context['employees']), 3)
+        with self.assertRaises(InvalidCursor):
+            KeysetPaginator(Employee.objects.all(), ['hire_date']).page('bogus')
+
+    def test_total_count_is_cached_separately(self):
+        url = reverse('KPI:employee_list')
+        self.assertContains(self.client.get(url), '3 employees')
+        # session, user, versions (ETag, count key), page rows, departments (+ their employee counts); no COUNT(*)
+        with self.assertNumQueries(6 + Department.objects.count()):
+            self.assertContains(self.client.get(url, {'sort': 'first_name'}), '3 employees')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_employee('E004', self.finance)
+        self.assertContains(self.client.get(url), '4 employees')
+
+    def test_nullable_sort_keys(self):
+        scored = self.make_evaluation(self.employee, score=Decimal('80'))
+        unscored = [self.make_evaluation(employee) for employee in (self.manager, self.analyst)]
+        queryset = Evaluation.objects.annotate(
+            sort_score=Coalesce('overall_score', Value(Decimal('-1')))
+        )
+        paginator = KeysetPaginator(queryset, ['sort_score'], per_page=2)
+        first = paginator.page()
+        self.assertEqual(paginator.ordering, ['sort_score', 'id'])
+        second = paginator.page(first.next_cursor)
+        self.assertEqual([e.pk for e in first] + [e.pk for e in second], [e.pk for e in unscored] + [scored.pk])
+        self.assertEqual([e.pk for e in paginator.page(second.previous_cursor)], [e.pk for e in first])
+        self.assertIsNone(second.next_cursor)
+
+
+class SearchIndexTests(KPITestDataMixin, TestCase):
+    def matches(self, queryset, query):
+        return set(search.matching(queryset, query).values_list('pk', flat=True))
+
+    def test_prefix_terms_match_joined_columns(self):
+        goal = self.make_goal(self.employee)
+        self.assertEqual(self.matches(Employee.objects.all(), 'e00'), {self.manager.pk, self.employee.pk, self.analyst.pk})
+        self.assertEqual(self.matches(Employee.objects.all(), 'chen example'), {self.analyst.pk})
+        self.assertEqual(self.matches(Employee.objects.all(), 'E003@EXAMPLE.com'), {self.analyst.pk})
+        self.assertEqual(self.matches(Goal.objects.all(), 'badr ship'), {goal.pk})
+        self.assertEqual(self.matches(Goal.objects.all(), 'chen'), set())
+        self.assertEqual(search.matching(Goal.objects.all(), ' -- ').count(), 1)
+
+    def test_index_follows_saves_renames_and_deletes(self):
+        goal = self.make_goal(self.employee)
+        evaluation = self.make_evaluation(self.analyst)
+        self.manager.first_name = 'Zainab'
+        self.manager.save()
+        # the manager evaluated the analyst, so the evaluation is reindexed too
+        self.assertEqual(self.matches(Evaluation.objects.all(), 'zainab'), {evaluation.pk})
+        self.assertEqual(self.matches(Evaluation.objects.all(), 'aina'), set())
+
+        goal.title = 'Migrate database'
+        goal.save()
+        self.assertEqual(self.matches(Goal.objects.all(), 'migr'), {goal.pk})
+        goal.delete()
+        self.assertEqual(self.matches(Goal.objects.all(), 'migr'), set())
+
+        incremental = self.matches(Employee.objects.all(), 'user')
+        self.assertEqual(search.rebuild()['employee'], 3)
+        self.assertEqual(self.matches(Employee.objects.all(), 'user'), incremental)
+
+    def test_ranking_and_list_views(self):
+        focused = Training.objects.create(
+            employee=self.employee, title='Django Django ORM', provider='Django Academy',
+            start_date=date.today(), end_date=date.today(),
+        )
+        broad = self.make_training(self.analyst)
+        ranked = search.ranked(search.matching(Training.objects.all(), 'django'), 'django').order_by('-search_rank')
+        self.assertEqual([training.pk for training in ranked], [focused.pk, broad.pk])
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('KPI:training_list'), {'search': 'djan'})
+        self.assertEqual([training.pk for training in response.context['trainings']], [focused.pk, broad.pk])
+        response = self.client.get(reverse('KPI:employee_list'), {'search': 'chen', 'sort': 'last_name'})
+        self.assertEqual([employee.pk for employee in response.context['employees']], [self.analyst.pk])
+
+
+class EmployeeAutocompleteTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_endpoint_returns_ranked_prefix_matches(self):
+        url = reverse('KPI:employee_autocomplete')
+        self.make_employee('F100', self.finance, first_name='Badriah')
+        results = self.client.get(url, {'q': 'badr'}).json()['results']
+        self.assertEqual({result['employee_id'] for result in results}, {'E002', 'F100'})
+        result = self.client.get(url, {'q': 'badrul e002'}).json()['results'][0]
+        self.assertEqual(result['text'], str(self.employee))
+        self.assertEqual(result['department'], 'Information Technology')
+
+        self.assertEqual(len(self.client.get(url, {'q': 'e00', 'limit': 2}).json()['results']), 2)
+        self.assertEqual(self.client.get(url).json()['results'], [])
+        self.assertEqual(self.client.get(url, {'q': 'e00', 'limit': 500}).status_code, 400)
+
+    def test_widget_renders_only_the_selected_employee(self):
+        goal = self.make_goal(self.employee)
+        form = GoalForm(instance=goal)
+        with self.assertNumQueries(1):
+            html = str(form['employee'])
+        self.assertIn(f'<option value="{self.employee.pk}" selected>{self.employee}</option>', html)
+        self.assertNotIn(str(self.analyst), html)
+        self.assertIn(reverse('KPI:employee_autocomplete'), html)
+
+        with self.assertNumQueries(0):
+            str(EmployeeForm()['manager'])
+        form = GoalForm(data={'employee': 'not-a-pk'})
+        self.assertNotIn('selected>', str(form['employee']))
+        self.assertIn('employee', form.errors)
+
+    def test_posted_employee_still_validates(self):
+        form = GoalForm(data={
+            'employee': self.analyst.pk, 'title': 'Close books', 'description': 'Month end',
+            'goal_type': 'performance', 'target_date': date.today(), 'status': 'pending',
+            'progress': 0, 'priority': 'medium',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['employee'], self.analyst)
+
+
+class QueryPlanAuditTests(KPITestDataMixin, TestCase):
+    def test_list_pages_avoid_sequential_scans(self):
+        results = audit_listings()
+        self.assertEqual(len({result.view for result in results}), 6)
+        self.assertEqual([(r.view, r.params, r.sequential_scans) for r in results if not r.ok], [])
+        goal_page = next(r for r in results if r.view == 'goal_list' and r.params == 'status=in_progress')
+        self.assertIn('goal_status_created', goal_page.plan)
+        self.assertEqual(goal_page.sorts, 0)
+
+        out = StringIO()
+        call_command('explain_views', 'leave_requests_list', '--strict', stdout=out)
+        self.assertIn('4 queries explained, 0 with sequential scans', out.getvalue())
+
+    def test_plan_parsing(self):
+        sqlite_plan = (
+            '2 0 0 SCAN KPI_goal\n'
+            '5 0 0 SCAN KPI_training USING INDEX training_start_keyset\n'
+            '8 0 0 SCAN kpi_search_index VIRTUAL TABLE INDEX 0:M1\n'
+            '9 0 0 USE TEMP B-TREE FOR ORDER BY'
+        )
+        self.assertEqual(analyze_plan(sqlite_plan, 'sqlite'), (['KPI_goal'], 1))
+        postgres_plan = (
+            'Limit  (cost=10.1..10.2 rows=21 width=8)\n'
+            '  ->  Sort  (cost=10.1..10.2 rows=40 width=8)\n'
+            '        ->  Seq Scan on "KPI_goal"  (cost=0.00..1.40 rows=40 width=8)\n'
+            '        ->  Index Scan using goal_status_created on "KPI_goal"  (cost=0.1..8.2 rows=1 width=8)'
+        )
+        self.assertEqual(analyze_plan(postgres_plan, 'postgresql'), (['"KPI_goal"'], 1))
+
+
+class FacetCountTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        django_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_goal(self.manager, status='in_progress', progress=10)
+            self.make_goal(self.employee, status='in_progress', progress=20)
+            self.make_goal(self.analyst, status='completed', progress=100)
+
+    def counts(self, facets, param):
+        return {option.value: option.count for option in facets[param] if option.count}
+
+    def test_dimension_ignores_its_own_filter(self):
+        facets = facet_counts('goal_list', QueryDict(f'status=in_progress&department={self.finance.pk}'))
+        # status counts keep the department filter, department counts keep the status filter
+        self.assertEqual(self.counts(facets, 'status'), {'completed': 1})
+        self.assertEqual(self.counts(facets, 'department'), {str(self.it.pk): 2})
+        self.assertEqual(self.counts(facets, 'priority'), {})
+        selected = [option.value for option in facets['status'] if option.selected]
+        self.assertEqual(selected, ['in_progress'])
+        self.assertEqual([option.label for option in facets['department']], ['Finance', 'Information Technology'])
+
+    def test_counts_are_cached_until_a_write(self):
+        params = QueryDict('status=in_progress')
+        facet_counts('goal_list', params)
+        with self.assertNumQueries(1):  # the namespace versions
+            facets = facet_counts('goal_list', params)
+        self.assertEqual(self.counts(facets, 'department'), {str(self.it.pk): 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_goal(self.analyst, status='in_progress', progress=0)
+        facets = facet_counts('goal_list', params)
+        self.assertEqual(self.counts(facets, 'department'), {str(self.it.pk): 2, str(self.finance.pk): 1})
+
+    def test_list_pages_render_facets(self):
+        self.client.force_login(self.user)
+        for url_name in ('goal_list', 'training_list', 'evaluation_list', 'leave_requests_list'):
+            response = self.client.get(reverse(f'KPI:{url_name}'))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('department', response.context['facets'])
+        self.assertContains(self.client.get(reverse('KPI:goal_list')), 'In Progress (2)')
+
+
+class ProjectionTests(KPITestDataMixin, TestCase):
+    def test_rows_carry_labels_and_skip_long_text(self):
+        goal = self.make_goal(self.employee, status='in_progress', progress=40)
+        Goal.objects.filter(pk=goal.pk).update(description='x' * 500, obstacles='y' * 500)
+        with CaptureQueriesContext(connection) as queries:
+            [row] = GOAL_ROWS.rows(Goal.objects.all())
+        sql = queries[0]['sql']
+        self.assertNotIn('obstacles', sql)
+        self.assertNotIn('success_criteria', sql)
+        self.assertEqual((row.pk, row.title, row.employee_name), (goal.pk, 'Ship it', 'Badrul User'))
+        self.assertEqual((row.status_label, row.status_badge), ('In Progress', 'warning'))
+        self.assertEqual(row.department_name, 'Information Technology')
+        self.assertEqual(len(row.description_preview), 51)
+        with self.assertRaises(AttributeError):
+            row.comments = 'rows have no __dict__'
+
+    def test_list_pages_page_through_projected_rows(self):
+        for index in range(25):
+            employee = self.make_employee(f'P{index:03}', self.finance)
+            self.make_evaluation(employee, score=Decimal(index))
+        self.client.force_login(self.user)
+        url = reverse('KPI:evaluation_list')
+        first = self.client.get(url, {'sort': 'overall_score'}).context['evaluations']
+        second = self.client.get(url, QueryDict(first.next_query)).context['evaluations']
+        scores = [row.overall_score for row in list(first) + list(second)]
+        self.assertEqual(scores, [Decimal(index) for index in range(25)])
+        self.assertIsInstance(first.items[0], EVALUATION_ROWS.row_class)
+        self.assertEqual(first.items[0].status_label, 'Draft')
+
+
+class ListExportTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def export(self, view_name, **params):
+        response = self.client.get(reverse('KPI:list_export', args=[view_name]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_covers_every_filtered_row_in_one_query(self):
+        for index in range(30):
+            self.make_goal(self.analyst if index % 3 else self.employee, status='in_progress', progress=index)
+        self.make_goal(self.employee, status='completed', progress=100)
+        url = reverse('KPI:list_export', args=['goal_list'])
+        # session, user, rows
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'status': 'in_progress', 'sort': 'progress'})
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(lines[0], 'ID,Employee,Department,Title,Type,Priority,Status,Progress,Target Date')
+        self.assertEqual(len(lines), 31)
+        self.assertIn(',Badrul User,Information Technology,Ship it,Performance Goal,Medium,In Progress,0.00,', lines[1])
+
+    def test_jsonl_keeps_search_and_relevance(self):
+        self.make_training(self.employee, status='completed', score=Decimal('90'))
+        self.make_training(self.analyst, status='completed')
+        rows = [json.loads(line) for line in self.export('training_list', search='chen', format='jsonl').splitlines()]
+        self.assertEqual([row['employee_name'] for row in rows], ['Chen User'])
+        self.assertEqual(rows[0]['status'], 'Completed')
+
+    def test_access_and_arguments(self):
+        self.assertEqual(self.export('employee_list').count('\n'), 4)
+        response = self.client.get(reverse('KPI:list_export', args=['employee_list']), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('KPI:list_export', args=['reports']))
+        self.assertEqual(response.status_code, 404)
+        self.client.force_login(User.objects.create_user('viewer', password='secret'))
+        response = self.client.get(reverse('KPI:list_export', args=['leave_requests_list']))
+        self.assertEqual(response.status_code, 403)
+
+
+class XlsxTests(KPITestDataMixin, TestCase):
+    NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+    def sheet_rows(self, data):
+        with zipfile.ZipFile(BytesIO(data)) as workbook:
+            self.assertIsNone(workbook.testzip())
+            sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        return [
+            [(cell.get('r'), cell.get('t'), ''.join(cell.itertext())) for cell in row]
+            for row in sheet.iterfind('s:sheetData/s:row', self.NS)
+        ]
+
+    def test_cells_keep_their_types(self):
+        rows = [[1, 'a<b>\x01', date(2024, 1, 2), Decimal('1.50'), None, True]]
+        data = b''.join(xlsx_chunks(['n', 's', 'd', 'x', 'empty', 'b'], iter(rows), size=1))
+        header, row = self.sheet_rows(data)
+        self.assertEqual(header[0], ('A1', 'inlineStr', 'n'))
+        self.assertEqual(row, [
+            ('A2', None, '1'), ('B2', 'inlineStr', 'a<b>'), ('C2', None, '45293'), ('D2', None, '1.50'),
+            ('F2', 'b', '1'),
+        ])
+        self.assertEqual([column_letter(index) for index in (0, 25, 26, 701, 702)], ['A', 'Z', 'AA', 'ZZ', 'AAA'])
+
+    def test_list_and_report_downloads(self):
+        self.client.force_login(self.user)
+        self.make_goal(self.employee, status='in_progress', progress=30)
+        response = self.client.get(reverse('KPI:list_export', args=['goal_list']), {'format': 'xlsx'})
+        self.assertEqual(response['Content-Type'], XLSX_CONTENT_TYPE)
+        self.assertTrue(response['Content-Disposition'].endswith('.xlsx"'))
+        header, row = self.sheet_rows(b''.join(response.streaming_content))
+        self.assertEqual(header[3][2], 'Title')
+        self.assertEqual(row[3][2], 'Ship it')
+
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            response = self.client.post(reverse('KPI:generate_report'), {
+                'report_type': 'goal_progress', 'format': 'excel', 'delivery': 'stream',
+            })
+            data = b''.join(response.streaming_content)
+        self.assertTrue(response['Content-Disposition'].endswith('.xlsx"'))
+        header, row = self.sheet_rows(data)
+        self.assertEqual([cell[2] for cell in header][:2], ['goal_title', 'employee'])
+        self.assertEqual(row[1][2], 'Badrul User')
+        self.assertEqual(Report.objects.get().format, 'excel')
+
+
+class PdfReportTests(KPITestDataMixin, TestCase):
+    def test_long_tables_are_split_into_pages(self):
+        pulled = []
+
+        def rows(count):
+            for number in range(count):
+                pulled.append(number)
+                yield [f'Goal {number}', 'x' * 200, Decimal('1.50'), date(2024, 1, 2), None]
+
+        header = ['goal_title', 'notes', 'progress', 'due_date', 'owner']
+        data = b''.join(pdf_chunks(header, rows(ROWS_PER_PAGE * 2 + 1), title='Goal Progress Report'))
+        self.assertTrue(data.startswith(b'%PDF'))
+        # a table per page, none of them overflowing onto an extra page
+        self.assertEqual(data.count(b'/Type /Page\n'), 3)
+        self.assertEqual(len(pulled), ROWS_PER_PAGE * 2 + 1)
+
+    def test_story_is_pulled_lazily(self):
+        pulled = []
+        story = LazyStory(pulled.append(number) or number for number in range(10))
+        self.assertEqual((len(story), story[0]), (2, 0))
+        del story[0]
+        self.assertEqual(pulled, [0, 1])
+        self.assertEqual(story[0], 1)
+        self.assertEqual(pulled, [0, 1, 2])
+
+    def test_reportlab_walks_the_story_as_lazystory_expects(self):
+        # LazyStory relies on reportlab internals: fail here, not with silently truncated PDFs, if they change
+        supported = {'__len__', '__getitem__', '__delitem__', '__setitem__'}
+        used = set()
+
+        def recording(name):
+            def method(self, *args):
+                used.add(name)
+                return getattr(LazyStory, name)(self, *args)
+            return method
+
+        operations = [name for name in dir(list) if name not in dir(object) or name in ('__eq__', '__ne__')]
+        RecordingStory = type('RecordingStory', (LazyStory,), {name: recording(name) for name in operations})
+        with mock.patch.object(pdf, 'LazyStory', RecordingStory):
+            data = b''.join(pdf_chunks(['number'], ([number] for number in range(ROWS_PER_PAGE * 3))))
+        self.assertEqual(data.count(b'/Type /Page\n'), 3)
+        self.assertLessEqual(used, supported)
+
+    def test_reports_longer_than_a_pdf_holds_are_refused_up_front(self):
+        rows = ({'number': number} for number in range(ROWS_PER_PAGE * 2 + 1))
+        with mock.patch.object(pdf, 'MAX_PAGES', 2), self.assertRaises(ReportTooLarge):
+            serialize_report(rows, 'pdf')
+
+        self.client.force_login(self.user)
+        self.make_goal(self.employee)
+        data = {'report_type': 'goal_progress', 'format': 'pdf', 'delivery': 'stream'}
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media), \
+                mock.patch.object(pdf, 'MAX_PAGES', 0):
+            response = self.client.post(reverse('KPI:generate_report'), data, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('CSV or Excel', response.json()['error'])
+
+    def test_worker_renders_pdf_reports(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            self.make_goal(self.employee)
+            job = report_jobs.enqueue('goal_progress', 'pdf', {}, self.user)
+            call_command('run_report_worker', '--burst', '--threads', '0', '--processes', '0', stdout=StringIO())
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'completed')
+            self.assertTrue(job.report.file_path.endswith('.pdf'))
+            with open(os.path.join(media, job.report.file_path), 'rb') as output:
+                self.assertEqual(output.read(4), b'%PDF')
+
+
+class ReportGeneratorTests(KPITestDataMixin, TestCase):
+    def add_rows(self, count):
+        for index in range(count):
+            employee = self.make_employee(f'R{Employee.objects.count():03}', self.finance)
+            self.make_evaluation(employee, score=Decimal('60'))
+            self.make_goal(employee, status='in_progress', progress=index)
+            self.make_training(employee, status='completed', score=Decimal('75'))
+
+    def assertConstantQueries(self, report, queries):
+        generator = ReportGenerator()
+        for count in (1, 10):
+            self.add_rows(count)
+            with self.assertNumQueries(queries):
+                rows = getattr(generator, f'generate_{report}_report')('csv', {})
+        return rows
+
+    def test_employee_performance(self):
+        self.make_evaluation(self.employee, score=Decimal('70'))
+        rows = self.assertConstantQueries('employee_performance', 1)
+        self.assertEqual(len(rows), 14)
+        badrul = next(row for row in rows if row['employee_id'] == 'E002')
+        self.assertEqual(badrul, {
+            'employee_id': 'E002', 'name': 'Badrul User', 'department': 'Information Technology',
+            'position': 'Engineer', 'avg_score': Decimal('70.00'), 'evaluation_count': 1,
+        })
+        self.assertEqual(next(row for row in rows if row['employee_id'] == 'E003')['evaluation_count'], 0)
+
+    def test_department_performance(self):
+        self.assertConstantQueries('department_performance', 1)
+
+    def test_training(self):
+        rows = self.assertConstantQueries('training', 1)
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[0]['training_name'], 'Django')
+        self.assertRegex(rows[0]['completion_date'], r'^\d{4}-\d{2}-\d{2}$')
+
+    def test_goal_progress(self):
+        rows = self.assertConstantQueries('goal_progress', 1)
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[0]['employee'], 'Test User')
+        self.assertEqual(rows[0]['due_date'], (date.today() + timedelta(days=30)).isoformat())
+
+    def test_evaluation_summary_and_competency_report_group_in_one_query(self):
+        category = KPICategory.objects.create(name='Delivery', description='', weight=50)
+        kpi = KPI.objects.create(category=category, name='On-time', description='', target=100, weight=50)
+        competency = Competency.objects.create(name='Ownership', description='', category='Core', weight=10)
+        evaluations = [
+            self.make_evaluation(self.employee, status='approved'),
+            self.make_evaluation(self.analyst, status='approved'),
+            self.make_evaluation(self.manager, status='draft'),
+        ]
+        for evaluation, actual, rating in zip(evaluations, (100, 80, 120), (5, 2, 4)):
+            EvaluationDetail.objects.create(
+                evaluation=evaluation, kpi=kpi, target_value=100, actual_value=actual, score=actual / 2, weight=50,
+            )
+            CompetencyAssessment.objects.create(evaluation=evaluation, competency=competency, rating=rating)
+        generator = ReportGenerator()
+        with self.assertNumQueries(1):
+            summary = list(generator.evaluation_summary_rows({}))
+        self.assertEqual(len(summary), 1)
+        self.assertEqual((summary[0]['category'], summary[0]['kpi'], summary[0]['evaluation_count']), ('Delivery', 'On-time', 3))
+        self.assertEqual((summary[0]['avg_score'], summary[0]['max_score']), (50, 60))
+        self.assertEqual(summary[0]['target_met_rate'], 66.7)
+
+        with self.assertNumQueries(1):
+            report = list(generator.competency_report_rows({'status': 'approved'}))
+        self.assertEqual(report, [{
+            'category': 'Core', 'competency': 'Ownership', 'assessment_count': 2, 'avg_rating': 3.5,
+            'min_rating': Decimal('2.0'), 'max_rating': Decimal('5.0'), 'strong_count': 1, 'weak_count': 1,
+        }])
+        self.assertEqual([row['assessment_count'] for row in generator.competency_report_rows({'department': self.finance.pk})], [1])
+        self.assertEqual(list(generator.competency_report_rows({'period': self.period.pk + 1})), [])
+
+
+class ReportFilterTests(KPITestDataMixin, TestCase):
+    def test_filters_are_validated_and_normalized(self):
+        self.assertEqual(
+            report_filters.normalize('goal_progress', {'department': ' 3', 'status': 'completed', 'priority': '', 'date_to': '2024-02-01'}),
+            {'department': 3, 'status': 'completed', 'date_to': '2024-02-01'},
+        )
+        with self.assertRaises(report_filters.InvalidReportFilters) as raised:
+            report_filters.normalize('training', {
+                'department': 'it', 'status': 'approved', 'goal_type': 'project',
+                'date_from': '2024-03-01', 'date_to': '2024-02-01',
+            })
+        self.assertEqual(set(raised.exception.errors), {'department', 'status', 'goal_type', 'date_to'})
+        with self.assertRaises(report_filters.InvalidReportFilters):
+            report_filters.normalize('goal_progress', {'date_from': '01/02/2024'})
+
+    def test_filters_narrow_the_query(self):
+        self.make_goal(self.employee, status='in_progress')
+        later = self.make_goal(self.analyst, status='in_progress')
+        later.target_date = date.today() + timedelta(days=90)
+        later.save()
+        self.make_goal(self.manager, status='completed')
+        filters = {'status': 'in_progress', 'date_to': (date.today() + timedelta(days=60)).isoformat()}
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(ReportGenerator().rows('goal_progress', filters))
+        self.assertEqual([row['employee'] for row in rows], ['Badrul User'])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"target_date" <=', queries[0]['sql'])
+
+        rows = list(ReportGenerator().rows('goal_progress', {'department': self.finance.pk}))
+        self.assertEqual([row['employee'] for row in rows], ['Chen User'])
+
+    def test_evaluation_filters_apply_to_the_aggregates(self):
+        self.make_evaluation(self.employee, score=Decimal('80'), status='approved')
+        self.make_evaluation(self.analyst, score=Decimal('40'), status='draft')
+        rows = {row['employee_id']: row for row in ReportGenerator().rows('employee_performance', {'status': 'approved'})}
+        self.assertEqual(len(rows), 3)
+        self.assertEqual((rows['E002']['evaluation_count'], rows['E002']['avg_score']), (1, Decimal('80')))
+        self.assertEqual((rows['E003']['evaluation_count'], rows['E003']['avg_score']), (0, 0))
+
+    def test_view_rejects_invalid_filters_and_records_normalized_ones(self):
+        self.client.force_login(self.user)
+        url = reverse('KPI:generate_report')
+        response = self.client.post(
+            url, {'report_type': 'goal_progress', 'format': 'csv', 'status': 'approved'}, HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['filters']), ['status'])
+        response = self.client.post(url, {'report_type': 'goal_progress', 'format': 'csv', 'date_from': 'soon'})
+        self.assertRedirects(response, reverse('KPI:reports'), fetch_redirect_response=False)
+        self.assertFalse(ReportJob.objects.exists())
+
+        self.client.post(url, {
+            'report_type': 'goal_progress', 'format': 'csv', 'department': str(self.it.pk), 'priority': '',
+            'period': str(self.period.pk),
+        })
+        # the goal form has no period filter: fields outside the report's schema are not read
+        self.assertEqual(ReportJob.objects.get().parameters, {'department': self.it.pk})
+
+
+class ReportResponseTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client.force_login(self.user)
+        for employee in (self.manager, self.employee, self.analyst):
+            self.make_goal(employee, status='in_progress', progress=30)
+
+    def download(self, report_format, report_type='goal_progress'):
+        response = self.client.post(reverse('KPI:generate_report'), {
+            'report_type': report_type, 'format': report_format, 'delivery': 'stream',
+        })
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_formats_stream_every_row(self):
+        response, body = self.download('json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(sorted(row['employee'] for row in json.loads(body)), ['Aina User', 'Badrul User', 'Chen User'])
+
+        response, body = self.download('jsonl')
+        self.assertTrue(response['Content-Disposition'].endswith('.jsonl"'))
+        self.assertEqual([json.loads(line)['progress'] for line in body.splitlines()], ['30.00'] * 3)
+
+        response, body = self.download('csv')
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'goal_title,employee,goal_type,status,progress,due_date')
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(list(Report.objects.values_list('format', flat=True)), ['csv', 'jsonl', 'json'])
+
+    def test_empty_report_redirects(self):
+        response = self.client.post(reverse('KPI:generate_report'), {
+            'report_type': 'training', 'format': 'csv', 'delivery': 'stream',
+        })
+        self.assertRedirects(response, reverse('KPI:reports'), fetch_redirect_response=False)
+        self.assertFalse(Report.objects.exists())
+
+    def test_serializers(self):
+        self.assertEqual(json.loads(''.join(json_array(iter([])))), [])
+        self.assertEqual(list(buffered(['ab', 'cd', 'e'], size=3)), ['abcd', 'e'])
+        self.assertEqual(list(csv_lines(['a', 'b'], [[1, 'x,y']])), ['a,b\r\n', '1,"x,y"\r\n'])
+
+
+class ReportJobTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client.force_login(self.user)
+        self.make_goal(self.employee, status='in_progress', progress=30)
+
+    def run_worker(self):
+        out = StringIO()
+        call_command('run_report_worker', '--burst', '--threads', '0', '--processes', '0', stdout=out)
+        return out.getvalue()
+
+    def test_queued_report_is_written_and_announced(self):
+        response = self.client.post(
+            reverse('KPI:generate_report'), {'report_type': 'goal_progress', 'format': 'jsonl'},
+            HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'queued')
+
+        self.assertIn('1 job(s) processed', self.run_worker())
+        job = self.client.get(status_url).json()
+        self.assertEqual(job['status'], 'completed')
+        report = Report.objects.get()
+        self.assertTrue(report.file_path.startswith('reports/'))
+        self.assertEqual(report.generated_by, self.user)
+
+        response = self.client.get(job['download_url'])
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['employee'] for row in rows], ['Badrul User'])
+        notification = Notification.objects.get(recipient=self.user)
+        self.assertEqual(notification.notification_type, 'report_ready')
+
+        self.client.force_login(User.objects.create_user('viewer', password='secret'))
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+        self.assertEqual(self.client.get(job['download_url']).status_code, 404)
+
+    def test_form_post_queues_and_redirects(self):
+        response = self.client.post(reverse('KPI:generate_report'), {'report_type': 'training', 'format': 'csv'})
+        self.assertRedirects(response, reverse('KPI:reports'), fetch_redirect_response=False)
+        self.run_worker()
+        job = ReportJob.objects.get()
+        # no trainings: the job fails and says so
+        self.assertEqual((job.status, job.error), ('failed', 'The report has no rows.'))
+        self.assertEqual(Notification.objects.get().notification_type, 'system_alert')
+        self.assertContains(self.client.get(reverse('KPI:reports')), 'My Report Jobs')
+
+    def test_jobs_are_claimed_once_and_stale_ones_requeued(self):
+        first = report_jobs.enqueue('goal_progress', 'csv', {}, self.user)
+        report_jobs.enqueue('training', 'csv', {}, self.user)
+        self.assertEqual(report_jobs.claim_next('dead').pk, first.pk)
+        self.assertNotEqual(report_jobs.claim_next('alive').pk, first.pk)
+        self.assertIsNone(report_jobs.claim_next('alive'))
+        # both started long ago, but only the live worker still beats for its job
+        long_ago = timezone.now() - timedelta(hours=2)
+        ReportJob.objects.update(started_at=long_ago, heartbeat_at=long_ago)
+        self.assertEqual(report_jobs.heartbeat('alive'), 1)
+        self.assertEqual(report_jobs.requeue_stale(), 1)
+        self.assertEqual(ReportJob.objects.get(worker='alive').status, 'running')
+        self.assertEqual(report_jobs.claim_next('alive').pk, first.pk)
+        with self.assertRaises(ValueError):
+            report_jobs.enqueue('custom', 'csv', {}, self.user)
+
+    def test_unknown_formats_are_not_queued(self):
+        with self.assertRaises(ValueError):
+            report_jobs.enqueue('goal_progress', 'bogus', {}, self.user)
+        url = reverse('KPI:generate_report')
+        response = self.client.post(url, {'report_type': 'goal_progress', 'format': 'bogus'}, HTTP_ACCEPT='application/json')
+        self.assertEqual((response.status_code, response.json()['error']), (400, 'Unknown report format: bogus'))
+        response = self.client.post(url, {'report_type': 'goal_progress', 'format': '../../pwn'}, follow=True)
+        self.assertContains(response, 'Unknown report format')
+        self.assertFalse(ReportJob.objects.exists())
+
+
+class ReportCacheTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.goal = self.make_goal(self.employee)
+
+    def read(self, rendered):
+        path, _ = rendered
+        with open(path, encoding='utf-8') as output:
+            return output.read()
+
+    def test_hits_skip_the_database_until_the_data_changes(self):
+        first = report_cache.render('goal_progress', {'goal_type': 'performance', 'priority': ''}, 'csv')
+        self.assertIn('Ship it', self.read(first))
+        with self.assertNumQueries(1):  # the data version
+            self.assertEqual(report_cache.render('goal_progress', {'goal_type': 'performance'}, 'csv'), first)
+
+        self.goal.title = 'Ship it twice'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.goal.save()
+        second = report_cache.render('goal_progress', {'goal_type': 'performance'}, 'csv')
+        self.assertNotEqual(second[0], first[0])
+        self.assertIn('Ship it twice', self.read(second))
+        # the output for the old data version is gone
+        self.assertFalse(first[0].exists())
+
+    def test_filtered_reports_follow_their_filters_joins(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_training(self.employee)
+        filters = {'department': self.it.pk}
+        self.assertIn('Django', self.read(report_cache.render('training', filters, 'csv')))
+
+        self.employee.department = self.finance
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.save()
+        # a miss: the training now belongs to the other department
+        self.assertIsNone(report_cache.render('training', filters, 'csv'))
+        self.assertIn('Django', self.read(report_cache.render('training', {'department': self.finance.pk}, 'csv')))
+
+    def test_keys_cover_format_and_parameters(self):
+        csv_path, _ = report_cache.render('goal_progress', {}, 'csv')
+        jsonl_path, written = report_cache.render('goal_progress', {}, 'jsonl')
+        self.assertEqual(written, 'jsonl')
+        self.assertNotEqual(csv_path, jsonl_path)
+        self.assertIsNone(report_cache.render('goal_progress', {'goal_type': 'personal'}, 'csv'))
+        self.assertEqual(report_cache.parameters_hash({'department': 3}), report_cache.parameters_hash({'department': '3', 'period': ''}))
+
+    def test_least_recently_used_files_are_evicted(self):
+        paths = [report_cache.render('goal_progress', {}, report_format)[0] for report_format in ('csv', 'json', 'jsonl')]
+        for age, path in zip((300, 100, 200), paths):
+            os.utime(path, (time.time() - age, time.time() - age))
+        self.assertEqual(report_cache.evict(max_files=2, max_bytes=10 ** 6), 1)
+        self.assertEqual([path.exists() for path in paths], [False, True, True])
+        self.assertEqual(report_cache.evict(max_files=10, max_bytes=0), 2)
+
+    def test_stream_download_is_served_from_the_cache(self):
+        self.client.force_login(self.user)
+        data = {'report_type': 'goal_progress', 'format': 'csv', 'delivery': 'stream'}
+        first = b''.join(self.client.post(reverse('KPI:generate_report'), data).streaming_content)
+        # session, user, data version and the Report history row; no report query
+        with self.assertNumQueries(4):
+            response = self.client.post(reverse('KPI:generate_report'), data)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(b''.join(response.streaming_content), first)
+
+    def test_misses_are_streamed_while_they_are_cached(self):
+        path = report_cache.cache_path('goal_progress', {}, 'csv')
+        _, pieces, written_format = report_cache.stream('goal_progress', {}, 'csv')
+        self.assertEqual(written_format, 'csv')
+        self.assertIn(b'Ship it', next(pieces))
+        self.assertFalse(path.exists())
+        for _ in pieces:
+            pass
+        self.assertEqual(report_cache.stream('goal_progress', {}, 'csv')[0], path)
+
+        # a download abandoned half-way leaves nothing behind
+        with self.captureOnCommitCallbacks(execute=True):
+            self.goal.save()
+        _, pieces, _ = report_cache.stream('goal_progress', {}, 'csv')
+        next(pieces)
+        pieces.close()
+        self.assertEqual(os.listdir(path.parent), [path.name])
+
+    def test_versions_bumped_by_other_processes_move_the_key(self):
+        first, _ = report_cache.render('goal_progress', {}, 'csv')
+        # the report worker saved a goal: its bump is a row in the version table
+        django_cache.clear()
+        self.assertEqual(report_cache.render('goal_progress', {}, 'csv')[0], first)
+        CacheVersion.objects.filter(namespace=cache.namespace_name(Goal)).update(version=F('version') + 1)
+        self.assertNotEqual(report_cache.render('goal_progress', {}, 'csv')[0], first)
+
+    def test_formats_cannot_leave_the_cache_directory(self):
+        outside = tempfile.TemporaryDirectory()
+        self.addCleanup(outside.cleanup)
+        open(os.path.join(outside.name, 'pwn-keepme.txt'), 'w').close()
+        report_format = f'/../../../../../..{outside.name}/pwn'
+        with self.assertRaises(ValueError):
+            report_cache.render('goal_progress', {}, report_format)
+
+        self.client.force_login(self.user)
+        data = {'report_type': 'goal_progress', 'format': report_format, 'delivery': 'stream'}
+        response = self.client.post(reverse('KPI:generate_report'), data, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.listdir(outside.name), ['pwn-keepme.txt'])
+        with self.assertRaises(ValueError):
+            report_cache.store(report_cache.cache_root() / '..' / 'pwn.csv', ['x'])
+
+
+@skipUnless(importlib.util.find_spec('numpy'), 'needs numpy')
+class AnalyticsSnapshotTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        category = KPICategory.objects.create(name='Delivery', description='', weight=50)
+        self.kpi = KPI.objects.create(category=category, name='On-time', description='', target=100, weight=50)
+        for employee, score, actual in ((self.employee, Decimal('80.50'), Decimal('90')), (self.analyst, None, None)):
+            evaluation = self.make_evaluation(employee, status='approved')
+            EvaluationDetail.objects.create(
+                evaluation=evaluation, kpi=self.kpi, target_value=100, actual_value=actual, score=score, weight=50,
+            )
+
+    def test_columns_are_memory_mapped_with_lookups(self):
+        directory = os.path.join(settings.MEDIA_ROOT, 'snapshot')
+        out = StringIO()
+        call_command('export_analytics', '--output', directory, '--chunk-size', '1', stdout=out)
+        self.assertIn('2 rows', out.getvalue())
+        manifest, columns = analytics.load_snapshot(directory)
+        self.assertEqual(manifest['rows'], 2)
+        self.assertFalse([name for name in os.listdir(settings.MEDIA_ROOT) if name.endswith('.part')])
+
+        score = columns['score']
+        self.assertEqual((score.shape, score.dtype.str, score.mode), ((2,), '<f8', 'r'))
+        self.assertEqual(score[0], 80.5)
+        self.assertNotEqual(score[1], score[1])  # NaN for a missing score
+        self.assertEqual(list(columns['department_id']), [self.it.pk, self.finance.pk])
+        self.assertEqual(manifest['lookups']['department_id'][str(self.finance.pk)], 'Finance')
+        self.assertEqual(manifest['lookups']['kpi_id'][str(self.kpi.pk)]['name'], 'On-time')
+        status = columns['evaluation_status']
+        self.assertEqual({manifest['dictionaries']['evaluation_status'][code] for code in status}, {'approved'})
+
+    def test_lookups_are_read_in_batches(self):
+        ids = {column: set() for column in ('employee_id', 'department_id', 'period_id', 'kpi_id', 'kpi_category_id')}
+        # more ids than SQLite takes parameters in one query; 5003 ids, 500 per query
+        ids['employee_id'] = {self.manager.pk, self.employee.pk, self.analyst.pk, *range(10 ** 6, 10 ** 6 + 5000)}
+        with self.assertNumQueries(11):
+            lookups = analytics._lookups(ids)
+        self.assertEqual(lookups['employee_id'], {
+            str(employee.pk): employee.employee_id for employee in (self.manager, self.employee, self.analyst)
+        })
+        self.assertEqual(lookups['department_id'], {})
+
+    def test_period_filter_and_existing_directory(self):
+        directory, manifest = analytics.export_snapshot(period=self.period.pk + 1)
+        self.assertEqual(manifest['rows'], 0)
+        self.assertEqual(analytics.load_snapshot(directory)[1]['score'].shape, (0,))
+        with self.assertRaises(FileExistsError):
+            analytics.export_snapshot(directory)
+
+
+class EvaluationMonthlyRollupTests(KPITestDataMixin, TestCase):
+    ROLLUP_FIELDS = ('month', 'department_id', 'period_id', 'category_id',
+                     'score_sum', 'score_count', 'score_min', 'score_max')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = KPICategory.objects.create(name='Delivery', description='', weight=50)
+        cls.kpi = KPI.objects.create(category=cls.category, name='On-time', description='', target=100, weight=50)
+
+    def rollup_rows(self):
+        return sorted(EvaluationMonthlyRollup.objects.values_list(*self.ROLLUP_FIELDS), key=str)
+
+    def assertRollupMatchesRebuild(self):
+        incremental = self.rollup_rows()
+        rebuild_monthly_rollup()
+        self.assertEqual(incremental, self.rollup_rows())
+
+    def test_incremental_buckets_match_rebuild(self):
+        evaluation = self.make_evaluation(self.employee, score=Decimal('70'))
+        self.make_evaluation(self.analyst, score=Decimal('90'))
+        detail = EvaluationDetail.objects.create(
+            evaluation=evaluation, kpi=self.kpi, target_value=100, score=Decimal('65'), weight=50,
+        )
+        self.assertRollupMatchesRebuild()
+
+        evaluation.overall_score = Decimal('95')
+        evaluation.save()
+        detail.score = Decimal('85')
+        detail.save()
+        self.employee.department = self.finance
+        self.employee.save()
+        self.assertRollupMatchesRebuild()
+
+        evaluation.delete()
+        self.assertRollupMatchesRebuild()
+        self.assertEqual(EvaluationMonthlyRollup.objects.get().score_max, Decimal('90'))
+
+    def test_trend_endpoint_fills_every_month(self):
+        self.make_evaluation(self.employee, score=Decimal('70'))
+        self.make_evaluation(self.analyst, score=Decimal('90'))
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('KPI:evaluation_trend_data'), {'months': 24, 'group_by': 'department'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['months']), 24)
+        self.assertEqual([series['label'] for series in data['series']], ['Finance', 'Information Technology'])
+        self.assertEqual(data['series'][0]['points'][-1]['average'], 90.0)
+        self.assertIsNone(data['series'][0]['points'][0]['average'])
+
+        response = self.client.get(reverse('KPI:evaluation_trend_data'), {'group_by': 'salary'})
+        self.assertEqual(response.status_code, 400)
+        for params in ({'department': 'abc'}, {'period': 'x'}, {'category': '1.5'}):
+            self.assertEqual(self.client.get(reverse('KPI:evaluation_trend_data'), params).status_code, 400)
+        response = self.client.get(reverse('KPI:evaluation_trend_data'), {'department': self.finance.pk})
+        self.assertEqual(response.json()['series'][0]['points'][-1]['average'], 90.0)
+
+
+class DepartmentScorecardTests(KPITestDataMixin, TestCase):
+    SCORECARD_FIELDS = (
+        'department_id', 'period_id', 'headcount', 'evaluation_count', 'approved_count',
+        'score_sum', 'score_count', 'avg_score', 'median_score',
+        'excellent_count', 'very_good_count', 'good_count', 'satisfactory_count', 'needs_improvement_count',
+    )
+
+    def scorecard_rows(self):
+        return sorted(DepartmentScorecard.objects.values_list(*self.SCORECARD_FIELDS))
+
+    def assertScorecardsMatchRebuild(self):
+        incremental = self.scorecard_rows()
+        rebuild_department_scorecards()
+        self.assertEqual(incremental, self.scorecard_rows())
+
+    def test_new_periods_and_departments_get_a_scorecard_each(self):
+        self.assertEqual(DepartmentScorecard.objects.count(), 2)
+        EvaluationPeriod.objects.create(
+            name='Q2', period_type='quarterly', start_date=date(2024, 4, 1), end_date=date(2024, 6, 30),
+        )
+        Department.objects.create(name='Operations')
+        self.assertEqual(DepartmentScorecard.objects.count(), 6)
+        self.assertScorecardsMatchRebuild()
+
+    def test_incremental_updates_match_rebuild(self):
+        evaluation = self.make_evaluation(self.employee, score=Decimal('72.50'))
+        self.make_evaluation(self.manager, score=Decimal('95'), status='approved')
+        self.make_evaluation(self.analyst, score=Decimal('61'))
+        self.assertScorecardsMatchRebuild()
+
+        scorecard = DepartmentScorecard.objects.get(department=self.it, period=self.period)
+        self.assertEqual(scorecard.headcount, 2)
+        self.assertEqual(scorecard.median_score, Decimal('83.75'))
+        self.assertEqual(scorecard.rating_distribution['excellent'], 1)
+
+        evaluation.status = 'approved'
+        evaluation.overall_score = Decimal('85')
+        evaluation.save()
+        self.employee.department = self.finance
+        self.employee.save()
+        self.assertScorecardsMatchRebuild()
+
+        self.analyst.status = 'inactive'
+        self.analyst.save()
+        evaluation.delete()
+        self.assertScorecardsMatchRebuild()
+        self.assertEqual(
+            DepartmentScorecard.objects.get(department=self.finance, period=self.period).headcount, 1
+        )
+
+    def test_closing_a_period_rebuilds_its_scorecards(self):
+        self.make_evaluation(self.employee, score=Decimal('70'))
+        DepartmentScorecard.objects.update(evaluation_count=0)
+        self.period.is_active = False
+        self.period.save()
+        scorecard = DepartmentScorecard.objects.get(department=self.it, period=self.period)
+        self.assertEqual(scorecard.evaluation_count, 1)
+        self.assertIsNotNone(scorecard.rebuilt_at)
+
+    def test_rebuild_runs_a_constant_number_of_queries(self):
+        for employee in (self.manager, self.employee, self.analyst):
+            self.make_evaluation(employee, score=Decimal('80'))
+        # periods, departments, headcounts, counters, scores, delete, insert + savepoint
+        with self.assertNumQueries(9):
+            rebuild_department_scorecards()
+
+    def test_department_report_reads_scorecards(self):
+        self.make_evaluation(self.employee, score=Decimal('70'))
+        self.make_evaluation(self.manager, score=Decimal('90'))
+        with self.assertNumQueries(1):
+            report = ReportGenerator().generate_department_performance_report('csv', {'period': self.period.pk})
+        self.assertEqual(report, [
+            {'department': 'Finance', 'employee_count': 1, 'avg_score': 0, 'evaluation_count': 0},
+            {'department': 'Information Technology', 'employee_count': 2, 'avg_score': 80.0, 'evaluation_count': 2},
+        ])
+        self.assertEqual(department_performance(department=self.it.pk)[0]['rating_distribution']['good'], 1)
+
+
+class VersionedCacheTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        django_cache.clear()
+
+    def test_saves_and_deletes_bump_the_model_namespace(self):
+        version = cache.get_version(Employee)
+        self.assertGreater(version, 1000000)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.save()
+        self.assertGreater(cache.get_version(Employee), version)
+        department_version = cache.get_version(Department)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_goal(self.employee).delete()
+        self.assertEqual(cache.get_version(Department), department_version)
+
+    def test_cached_reads_depend_on_bumped_models_only(self):
+        dependencies = [
+            *report_cache.REPORT_SOURCES.values(), analytics.SOURCES, *(spec.namespaces for spec in FACETS.values()),
+            charts.DEPARTMENT_PERFORMANCE_MODELS, charts.EVALUATION_STATUS_MODELS, charts.MONTHLY_TREND_MODELS,
+        ]
+        for models in dependencies:
+            self.assertLessEqual(set(models), set(signals.CACHED_MODELS))
+
+    def test_get_or_set_is_invalidated_by_model_changes(self):
+        def headcount():
+            return Employee.objects.filter(status='active').count()
+
+        self.assertEqual(cache.get_or_set([Employee, Department], 'headcount', headcount), 3)
+        with self.assertNumQueries(1):  # the versions
+            self.assertEqual(cache.get_or_set([Department, Employee], 'headcount', headcount), 3)
+        self.analyst.status = 'inactive'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.analyst.save()
+        self.assertEqual(cache.get_or_set([Employee, Department], 'headcount', headcount), 2)
+
+    def test_lost_version_does_not_resurrect_old_entries(self):
+        cached_value = cache.cached('reports', 'total', ttl=60)(lambda: 'old')
+        self.assertEqual(cached_value(), 'old')
+        CacheVersion.objects.filter(namespace='reports').delete()
+        self.assertEqual(cache.get_or_set('reports', 'total', lambda: 'new'), 'new')
+
+    def test_versions_are_shared_by_every_process(self):
+        version = cache.get_version(Goal)
+        # Another process's cache holds none of this one's entries or versions
+        django_cache.clear()
+        self.assertEqual(cache.get_version(Goal), version)
+        # and its bumps are rows every process reads
+        CacheVersion.objects.filter(namespace=cache.namespace_name(Goal)).update(version=version + 10)
+        self.assertEqual(cache.get_version(Goal), version + 10)
+
+    def test_bumps_run_once_per_committed_transaction(self):
+        version = cache.get_version(Goal)
+        # the goals' scorecard and activity rows are not cached under any namespace
+        with self.captureOnCommitCallbacks() as callbacks:
+            for _ in range(3):
+                self.make_goal(self.employee)
+            self.assertEqual(cache.get_version(Goal), version)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertGreater(cache.get_version(Goal), version)
+
+        version = cache.get_version(Goal)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.make_goal(self.employee)
+                raise RuntimeError
+            # the rolled back bump does not hide the next change's
+            self.make_goal(self.employee)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        started = threading.Event()
+
+        def slow():
+            calls.append(1)
+            started.set()
+            threading.Event().wait(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_set('stampede', 'key', slow)))
+            for _ in range(4)
+        ]
+        # The threads' connections cannot read the test transaction's version rows
+        with mock.patch.object(cache, 'get_versions', return_value={'stampede': 1}):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results, ['value'] * 4)
+        self.assertEqual(len(calls), 1)
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """
+    A local, in-memory stand-in for a Redis server: the RESP commands
+    Django's RedisCache sends, without expiry of unread keys
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), RedisStandInHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'redis://127.0.0.1:{self.server_address[1]}/0'
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def value(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, name, args):
+        if name == 'GET':
+            return self.value(args[0])
+        if name == 'MGET':
+            return [self.value(key) for key in args]
+        if name == 'SET':
+            key, value, options = args[0], args[1], [option.upper() for option in args[2:]]
+            exists = self.value(key) is not None
+            if (b'NX' in options and exists) or (b'XX' in options and not exists):
+                return None
+            expires = time.monotonic() + int(options[options.index(b'EX') + 1]) if b'EX' in options else None
+            self.data[key] = (value, expires)
+            return 'OK'
+        if name == 'DEL':
+            return sum(self.data.pop(key, None) is not None for key in args)
+        if name == 'EXISTS':
+            return sum(self.value(key) is not None for key in args)
+        if name == 'INCRBY':
+            value = int(self.value(args[0]) or 0) + int(args[1])
+            self.data[args[0]] = (str(value).encode(), self.data.get(args[0], (None, None))[1])
+            return value
+        if name in ('EXPIRE', 'PERSIST'):
+            if self.value(args[0]) is None:
+                return 0
+            self.data[args[0]] = (self.data[args[0]][0], time.monotonic() + int(args[1]) if name == 'EXPIRE' else None)
+            return 1
+        if name == 'FLUSHDB':
+            self.data.clear()
+            return 'OK'
+        return RuntimeError(f"ERR unknown command '{name}'")
+
+
+class RedisStandInHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def reply(self, value):
+        if value is None:
+            return b'$-1\r\n'
+        if isinstance(value, RuntimeError):
+            return f'-{value}\r\n'.encode()
+        if isinstance(value, str):
+            return f'+{value}\r\n'.encode()
+        if isinstance(value, int):
+            return f':{value}\r\n'.encode()
+        if isinstance(value, list):
+            return f'*{len(value)}\r\n'.encode() + b''.join(self.reply(item) for item in value)
+        return f'${len(value)}\r\n'.encode() + value + b'\r\n'
+
+    def handle(self):
+        queued = None
+        while (args := self.read_command()) is not None:
+            name = args[0].decode().upper()
+            if name == 'MULTI':
+                queued, result = [], 'OK'
+            elif name == 'EXEC':
+                with self.server.lock:
+                    result = [self.server.execute(command, rest) for command, rest in queued]
+                queued = None
+            elif queued is not None:
+                queued.append((name, args[1:]))
+                result = 'QUEUED'
+            else:
+                with self.server.lock:
+                    result = self.server.execute(name, args[1:])
+            self.wfile.write(self.reply(result))
+
+
+class CacheBackendTests(KPITestDataMixin, TestCase):
+    """The shared CACHE_BACKEND choices of config/settings.py, each cache built as a separate process would"""
+
+    def caches_setting(self, **environment):
+        with mock.patch.dict(os.environ, environment):
+            return runpy.run_path(os.path.join(settings.BASE_DIR, 'config', 'settings.py'))['CACHES']
+
+    def assertSharedEntries(self, caches_setting):
+        with override_settings(CACHES=caches_setting):
+            calls = []
+            compute = lambda: calls.append(1) or 'value'
+            self.assertEqual(cache.get_or_set([Goal, Employee], 'shared', compute), 'value')
+            other_process = caches.create_connection('default')
+            self.assertEqual(other_process.get(cache.make_key([Goal, Employee], 'shared')), 'value')
+            self.assertTrue(other_process.add('lock', 1, timeout=30))
+            self.assertFalse(caches['default'].add('lock', 1, timeout=30))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.make_goal(self.employee)
+            self.assertEqual(cache.get_or_set([Goal, Employee], 'shared', compute), 'value')
+            self.assertEqual(len(calls), 2)
+
+    def test_file_backend(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        caches_setting = self.caches_setting(CACHE_BACKEND='file', CACHE_DIR=directory.name)
+        self.assertEqual(caches_setting['default']['BACKEND'], 'django.core.cache.backends.filebased.FileBasedCache')
+        self.assertSharedEntries(caches_setting)
+
+    @skipUnless(importlib.util.find_spec('redis'), 'needs the redis package')
+    def test_redis_backend(self):
+        server = RedisStandIn()
+        self.addCleanup(server.stop)
+        caches_setting = self.caches_setting(CACHE_BACKEND='redis', CACHE_URL=server.url)
+        self.assertEqual(caches_setting['default']['BACKEND'], 'django.core.cache.backends.redis.RedisCache')
+        self.assertSharedEntries(caches_setting)
+        self.assertTrue(server.data)
+
+
+class ConditionalGetTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.client.force_login(self.user)
+
+    def test_unchanged_list_answers_304_without_running_the_view(self):
+        url = reverse('KPI:employee_list')
+        response = self.client.get(url, {'status': 'active'})
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        # session, user and the namespace versions only
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'status': 'active'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, {'status': 'inactive'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        self.employee.position = 'Lead Engineer'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.save()
+        response = self.client.get(url, {'status': 'active'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_json_endpoint_etag_depends_on_its_models_and_user(self):
+        url = reverse('KPI:get_employee_data', args=[self.employee.pk])
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            KPICategory.objects.create(name='Quality', description='', weight=10)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_goal(self.employee)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(response.json()['scorecard']['total_goals'], 1)
+
+        other = User.objects.create_user('auditor', password='secret')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_permission_checks_run_before_the_etag(self):
+        url = reverse('KPI:leave_requests_list')
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(User.objects.create_user('clerk', password='secret'))
+        for headers in ({}, {'HTTP_IF_NONE_MATCH': etag}, {'HTTP_IF_NONE_MATCH': '*'}):
+            response = self.client.get(url, **headers)
+            self.assertRedirects(response, reverse('KPI:dashboard'), fetch_redirect_response=False)
+            self.assertFalse(response.has_header('ETag'))
+
+    def test_etag_moves_with_changes_made_by_other_processes(self):
+        url = reverse('KPI:employee_list')
+        etag = self.client.get(url)['ETag']
+        # Another worker saved an employee: its bump is in the version table, not in this process's cache
+        django_cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        CacheVersion.objects.filter(namespace=cache.namespace_name(Employee)).update(version=F('version') + 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class Employee360Tests(KPITestDataMixin, TestCase):
+    SCORECARD_FIELDS = (
+        'employee_id', 'total_evaluations', 'completed_evaluations', 'evaluation_score_sum',
+        'evaluation_score_count', 'last_evaluated_at', 'total_goals', 'completed_goals', 'goal_progress_sum',
+        'total_trainings', 'completed_trainings', 'training_score_sum', 'training_score_count',
+    )
+
+    def make_history(self, employee, size):
+        for index in range(size):
+            period = EvaluationPeriod.objects.create(
+                name=f'P{index}', period_type='monthly',
+                start_date=date(2023, index + 1, 1), end_date=date(2023, index + 1, 28),
+            )
+            self.make_evaluation(employee, score=Decimal(60 + index), status='approved', period=period)
+            self.make_goal(employee, status='completed', progress=100)
+            self.make_training(employee, status='completed', score=Decimal(70 + index))
+
+    def scorecard_rows(self):
+        return sorted(EmployeeScorecard.objects.values_list(*self.SCORECARD_FIELDS))
+
+    def test_incremental_scorecards_match_rebuild(self):
+        self.make_history(self.employee, 2)
+        goal = self.make_goal(self.analyst, progress=30)
+        training = self.make_training(self.analyst, status='in_progress')
+        goal.progress = 45
+        goal.save()
+        training.delete()
+        incremental = self.scorecard_rows()
+        self.assertEqual(len(incremental), 3)
+        rebuild_employee_scorecards()
+        self.assertEqual(incremental, self.scorecard_rows())
+
+    def test_missing_scorecard_is_built_on_load(self):
+        self.make_goal(self.analyst, progress=50)
+        EmployeeScorecard.objects.all().delete()
+        profile = Employee360.load(self.analyst.pk)
+        self.assertEqual(profile.summary()['avg_progress'], 50.0)
+        self.assertTrue(EmployeeScorecard.objects.filter(employee=self.analyst).exists())
+
+    def test_scorecard_created_concurrently_is_returned(self):
+        self.make_goal(self.analyst, progress=50)
+        EmployeeScorecard.objects.all().delete()
+        employee = Employee360.employee_queryset().get(pk=self.analyst.pk)
+        # another request builds it between our load and our refresh
+        scorecards.refresh_employee_scorecard(self.analyst.pk)
+        profile = Employee360(employee, history=False)
+        self.assertEqual(profile.scorecard.employee_id, self.analyst.pk)
+        self.assertEqual(profile.summary()['avg_progress'], 50.0)
+
+    def test_employee_detail_has_a_fixed_query_budget(self):
+        self.client.force_login(self.user)
+        for employee, size in ((self.employee, 1), (self.manager, 4)):
+            self.make_history(employee, size)
+            url = reverse('KPI:employee_detail', args=[employee.pk])
+            # session, user, employee + department + manager + scorecard, evaluations, goals, trainings
+            with self.assertNumQueries(6):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['total_evaluations'], size)
+            self.assertEqual(len(response.context['recent_activities']), min(5, 3 * size))
+
+
+class ActivityTimelineTests(KPITestDataMixin, TestCase):
+    def test_creation_and_status_changes_are_logged(self):
+        evaluation = self.make_evaluation(self.employee, score=Decimal('70'))
+        evaluation.overall_score = Decimal('75')
+        evaluation.save()
+        evaluation.status = 'approved'
+        evaluation.save()
+        goal = self.make_goal(self.employee)
+        GoalProgress.objects.create(goal=goal, progress_percentage=40, update_date=date.today(), comments='Halfway')
+
+        events = list(ActivityEvent.objects.filter(employee=self.employee).values_list('subject', 'action', 'status'))
+        self.assertEqual(events, [
+            ('goal_progress', 'created', ''),
+            ('goal', 'created', 'pending'),
+            ('evaluation', 'approved', 'approved'),
+            ('evaluation', 'created', 'draft'),
+        ])
+        with self.assertRaises(ValueError):
+            ActivityEvent.objects.first().save()
+
+    def test_self_service_approvals_are_logged(self):
+        submission = EmployeeGoalSubmission.objects.create(
+            employee=self.employee, title='Mentor a junior', description='Weekly pairing',
+            target_date=date.today() + timedelta(days=90), status='submitted',
+        )
+        submission.status = 'approved'
+        submission.approved_by = self.manager
+        submission.save()
+
+        events = list(ActivityEvent.objects.filter(employee=self.employee).values_list('subject', 'action', 'title'))
+        self.assertEqual(events, [
+            ('goal_submission', 'approved', 'Mentor a junior'),
+            ('goal_submission', 'created', 'Mentor a junior'),
+        ])
+
+    def test_timeline_pages_with_an_opaque_cursor(self):
+        for index in range(5):
+            self.make_goal(self.employee, progress=index)
+        self.make_goal(self.analyst)
+        self.client.force_login(self.user)
+        url = reverse('KPI:employee_timeline', args=[self.employee.pk])
+
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            with self.assertNumQueries(4):
+                data = self.client.get(url, params).json()
+            seen += [event['value'] for event in data['events']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [4.0, 3.0, 2.0, 1.0, 0.0])
+
+        department = self.client.get(reverse('KPI:department_timeline', args=[self.it.pk])).json()
+        self.assertEqual(len(department['events']), 5)
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('KPI:employee_timeline', args=[999])).status_code, 404)
+
+
+class DashboardChartTests(KPITestDataMixin, TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_evaluation(self.employee, score=Decimal('75'), status='approved')
+
+    def test_department_performance_is_cached_until_evaluations_change(self):
+        url = reverse('KPI:chart_department_performance')
+        data = self.client.get(url).json()
+        self.assertEqual(data['labels'], ['Finance', 'Information Technology'])
+        self.assertEqual(data['scores'], [0, 75.0])
+        # session, user and the versions (ETag, cache key); the series comes from the cache
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_evaluation(self.analyst, score=Decimal('85'))
+        self.assertEqual(self.client.get(url).json()['scores'], [85.0, 75.0])
+
+    def test_evaluation_status_and_monthly_trend(self):
+        status = self.client.get(reverse('KPI:chart_evaluation_status')).json()
+        self.assertEqual(status['counts'][status['statuses'].index('approved')], 1)
+
+        response = self.client.get(reverse('KPI:chart_monthly_trend'), {'months': 3})
+        self.assertEqual(len(response.json()['labels']), 3)
+        self.assertEqual(response.json()['scores'][-1], 75.0)
+        response = self.client.get(reverse('KPI:chart_monthly_trend'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get(reverse('KPI:chart_monthly_trend'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(reverse('KPI:chart_monthly_trend'), {'months': 'x'}).status_code, 400)
@@ -46,10 +46,20 @@ urlpatterns = [
     # Reports
     path('reports/', views.reports, name='reports'),
     path('reports/generate/', views.generate_report, name='generate_report'),
+    path('reports/<int:report_id>/download/', views.report_download, name='report_download'),
+    path('exports/<str:view_name>/', views.list_export, name='list_export'),
     
     # API endpoints
     path('api/employee/<int:employee_id>/', views.get_employee_data, name='get_employee_data'),
     path('api/kpi-data/', views.get_kpi_data, name='get_kpi_data'),
+    path('api/trends/evaluations/', views.evaluation_trend_data, name='evaluation_trend_data'),
+    path('api/charts/department-performance/', views.chart_department_performance, name='chart_department_performance'),
+    path('api/charts/evaluation-status/', views.chart_evaluation_status, name='chart_evaluation_status'),
+    path('api/charts/monthly-trend/', views.chart_monthly_trend, name='chart_monthly_trend'),
+    path('api/employee/<int:employee_id>/timeline/', views.employee_timeline, name='employee_timeline'),
+    path('api/employees/autocomplete/', views.employee_autocomplete, name='employee_autocomplete'),
+    path('api/reports/jobs/<int:job_id>/', views.report_job_status, name='report_job_status'),
+    path('api/departments/<int:department_id>/timeline/', views.department_timeline, name='department_timeline'),
     
     # Employee Self-Service URLs
     path('employee/login/', views.employee_login, name='employee_login'),
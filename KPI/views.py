@@ -1,18 +1,21 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Avg, Count, Q, Sum
-from django.core.paginator import Paginator
+from django.conf import settings
+from django.http import FileResponse, JsonResponse, HttpResponse, Http404, HttpResponseForbidden, StreamingHttpResponse
+from django.db.models import Count, Q
+from django.urls import reverse
 from django.utils import timezone
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from decimal import Decimal
+from functools import wraps
 import json
+import os
 
 from .models import (
     Employee, Department, Evaluation, EvaluationDetail, Goal, Training,
     KPICategory, KPI, EvaluationPeriod, Competency, CompetencyAssessment,
-    GoalProgress, Report, PerformanceImprovementPlan, Notification,
+    GoalProgress, Report, ReportJob, PerformanceImprovementPlan, Notification,
     EmployeeProfile, EmployeeSelfEvaluation, EmployeeGoalSubmission,
     EmployeeTrainingRequest, EmployeeLeaveRequest, LeaveType, LeaveApprovalLevel,
     LeaveBalance, LeaveRequestDocument
@@ -25,148 +28,77 @@ from .forms import (
     EmployeeTrainingRequestForm, EmployeeLeaveRequestForm, EmployeeLoginForm,
     EmployeePasswordChangeForm, LeaveApprovalForm
 )
-from .report_utils import ReportGenerator, generate_report_response
+from .report_utils import REPORT_CONTENT_TYPES, ReportGenerator, report_extension
+from .cache import conditional_on
+from .employee360 import Employee360
+from .pagination import KeysetPaginator
+from .snapshots import get_dashboard_snapshot, recent_months, evaluation_trend, TREND_GROUPS
+from . import (
+    activity, charts, exports, facets, listings, projections, report_cache, report_filters, report_jobs, search, stats
+)
+
+
+def hr_required(view):
+    """Send non-staff users back to the dashboard; put it above @conditional_on so they never get a 304"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_staff:
+            messages.error(request, 'Access denied. HR access required.')
+            return redirect('KPI:dashboard')
+        return view(request, *args, **kwargs)
+    return wrapper
 
 @login_required
 def dashboard(request):
     """Enhanced dashboard with comprehensive statistics"""
-    # Get current date
-    today = date.today()
-    
-    # Employee statistics
-    total_employees = Employee.objects.filter(status='active').count()
-    new_employees_this_month = Employee.objects.filter(
-        hire_date__month=today.month,
-        hire_date__year=today.year
-    ).count()
-    
-    # Department statistics
-    departments = Department.objects.annotate(
-        employee_count=Count('employee', filter=Q(employee__status='active'))
-    )
-    
-    # Evaluation statistics
-    evaluations = Evaluation.objects.all()
-    total_evaluations = evaluations.count()
-    pending_evaluations = evaluations.filter(status='draft').count()
-    completed_evaluations = evaluations.filter(status='approved').count()
-    avg_score = evaluations.aggregate(Avg('overall_score'))['overall_score__avg'] or 0
-    
-    # Goal statistics
-    goals = Goal.objects.all()
-    total_goals = goals.count()
-    completed_goals = goals.filter(status='completed').count()
-    overdue_goals = goals.filter(status='overdue').count()
-    avg_progress = goals.aggregate(Avg('progress'))['progress__avg'] or 0
-    
-    # Training statistics
-    trainings = Training.objects.all()
-    total_trainings = trainings.count()
-    completed_trainings = trainings.filter(status='completed').count()
-    ongoing_trainings = trainings.filter(status='in_progress').count()
-    avg_training_score = trainings.aggregate(Avg('score'))['score__avg'] or 0
+    # Every counter comes from the materialized snapshot (see KPI.snapshots)
+    snapshot = get_dashboard_snapshot()
     
     # Recent activities
-    recent_evaluations = evaluations.order_by('-created_at')[:5]
-    recent_goals = goals.order_by('-created_at')[:5]
-    recent_trainings = trainings.order_by('-created_at')[:5]
-    
-    # Performance trends (last 6 months)
-    six_months_ago = today - timedelta(days=180)
-    monthly_scores = []
-    for i in range(6):
-        month_date = six_months_ago + timedelta(days=30*i)
-        month_evaluations = evaluations.filter(
-            created_at__year=month_date.year,
-            created_at__month=month_date.month
-        )
-        avg_monthly_score = month_evaluations.aggregate(Avg('overall_score'))['overall_score__avg'] or 0
-        monthly_scores.append({
-            'month': month_date.strftime('%b %Y'),
-            'score': float(avg_monthly_score)
-        })
-    
-    # Department performance
-    department_performance = []
-    for dept in departments:
-        dept_evaluations = evaluations.filter(employee__department=dept)
-        dept_avg_score = dept_evaluations.aggregate(Avg('overall_score'))['overall_score__avg'] or 0
-        department_performance.append({
-            'name': dept.name,
-            'score': float(dept_avg_score),
-            'employee_count': dept.employee_count
-        })
+    recent_evaluations = Evaluation.objects.select_related(
+        'employee', 'evaluator', 'period'
+    ).order_by('-created_at')[:5]
+    
+    # Department performance, evaluation status and monthly trend charts are
+    # fetched by the page from the chart_* endpoints below
     
     context = {
-        'total_employees': total_employees,
-        'new_employees_this_month': new_employees_this_month,
-        'total_evaluations': total_evaluations,
-        'pending_evaluations': pending_evaluations,
-        'completed_evaluations': completed_evaluations,
-        'avg_score': round(avg_score, 2),
-        'total_goals': total_goals,
-        'completed_goals': completed_goals,
-        'overdue_goals': overdue_goals,
-        'avg_progress': round(avg_progress, 2),
-        'total_trainings': total_trainings,
-        'completed_trainings': completed_trainings,
-        'ongoing_trainings': ongoing_trainings,
-        'avg_training_score': round(avg_training_score, 2),
+        'total_employees': snapshot.total_employees,
+        'total_departments': snapshot.total_departments,
+        'new_employees_this_month': snapshot.new_employees_this_month,
+        'total_evaluations': snapshot.total_evaluations,
+        'pending_evaluations': snapshot.pending_evaluations,
+        'completed_evaluations': snapshot.completed_evaluations,
+        'avg_score': snapshot.avg_score,
+        'total_goals': snapshot.total_goals,
+        'completed_goals': snapshot.completed_goals,
+        'overdue_goals': snapshot.overdue_goals,
+        'avg_progress': snapshot.avg_progress,
+        'total_trainings': snapshot.total_trainings,
+        'completed_trainings': snapshot.completed_trainings,
+        'ongoing_trainings': snapshot.ongoing_trainings,
+        'avg_training_score': snapshot.avg_training_score,
         'recent_evaluations': recent_evaluations,
-        'recent_goals': recent_goals,
-        'recent_trainings': recent_trainings,
-        'monthly_scores': monthly_scores,
-        'department_performance': department_performance,
-        'departments': departments,
     }
     
     return render(request, 'KPI/dashboard.html', context)
 
 @login_required
+@conditional_on(Employee, Department)
 def employee_list(request):
     """Enhanced employee list with search and filtering"""
-    employees = Employee.objects.select_related('department', 'manager').all()
-    
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        employees = employees.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(employee_id__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(position__icontains=search_query)
-        )
-    
-    # Filter by department
-    department_filter = request.GET.get('department', '')
-    if department_filter:
-        employees = employees.filter(department_id=department_filter)
-    
-    # Filter by status
-    status_filter = request.GET.get('status', '')
-    if status_filter:
-        employees = employees.filter(status=status_filter)
-    
-    # Sort by
-    sort_by = request.GET.get('sort', 'first_name')
-    if sort_by in ['first_name', 'last_name', 'employee_id', 'department', 'position', 'hire_date']:
-        employees = employees.order_by(sort_by)
+    listing = listings.employee_listing(request.GET)
     
     # Pagination
-    paginator = Paginator(employees, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(listing.page_rows, listing.ordering, 20, count_namespaces=(Employee, Department))
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     departments = Department.objects.all()
     
     context = {
         'employees': page_obj,
         'departments': departments,
-        'search_query': search_query,
-        'department_filter': department_filter,
-        'status_filter': status_filter,
-        'sort_by': sort_by,
+        **listing.context(),
     }
     
     return render(request, 'KPI/employee_list.html', context)
@@ -194,93 +126,18 @@ def employee_create(request):
 @login_required
 def employee_detail(request, employee_id):
     """Enhanced employee detail view with comprehensive information"""
-    employee = get_object_or_404(Employee, id=employee_id)
-    
-    # Get employee evaluations
-    evaluations = Evaluation.objects.filter(employee=employee).order_by('-created_at')
-    
-    # Get employee goals
-    goals = Goal.objects.filter(employee=employee).order_by('-created_at')
+    employee = get_object_or_404(Employee360.employee_queryset(), id=employee_id)
     
-    # Get employee trainings
-    trainings = Training.objects.filter(employee=employee).order_by('-start_date')
-    
-    # Get performance statistics
-    if evaluations.exists():
-        avg_score = evaluations.aggregate(Avg('overall_score'))['overall_score__avg']
-        total_evaluations = evaluations.count()
-        completed_evaluations = evaluations.filter(status='approved').count()
-    else:
-        avg_score = 0
-        total_evaluations = 0
-        completed_evaluations = 0
-    
-    # Get goal statistics
-    if goals.exists():
-        completed_goals = goals.filter(status='completed').count()
-        avg_progress = goals.aggregate(Avg('progress'))['progress__avg']
-    else:
-        completed_goals = 0
-        avg_progress = 0
-    
-    # Get training statistics
-    if trainings.exists():
-        completed_trainings = trainings.filter(status='completed').count()
-        avg_training_score = trainings.aggregate(Avg('score'))['score__avg']
-    else:
-        completed_trainings = 0
-        avg_training_score = 0
-    
-    # Get recent activities
-    recent_activities = []
-    
-    # Add recent evaluations
-    for evaluation in evaluations[:3]:
-        recent_activities.append({
-            'type': 'evaluation',
-            'title': f'Evaluation for {evaluation.period.name}',
-            'date': evaluation.created_at,
-            'status': evaluation.get_status_display(),
-            'score': evaluation.overall_score
-        })
-    
-    # Add recent goals
-    for goal in goals[:3]:
-        recent_activities.append({
-            'type': 'goal',
-            'title': goal.title,
-            'date': goal.created_at,
-            'status': goal.get_status_display(),
-            'progress': goal.progress
-        })
-    
-    # Add recent trainings
-    for training in trainings[:3]:
-        recent_activities.append({
-            'type': 'training',
-            'title': training.title,
-            'date': training.start_date,
-            'status': training.get_status_display(),
-            'score': training.score
-        })
-    
-    # Sort activities by date
-    recent_activities.sort(key=lambda x: x['date'], reverse=True)
-    recent_activities = recent_activities[:5]
+    # Evaluations, goals and trainings in one query each; stats from the employee's scorecard
+    profile = Employee360(employee)
     
     context = {
         'employee': employee,
-        'evaluations': evaluations,
-        'goals': goals,
-        'trainings': trainings,
-        'avg_score': round(avg_score, 2) if avg_score else 0,
-        'total_evaluations': total_evaluations,
-        'completed_evaluations': completed_evaluations,
-        'completed_goals': completed_goals,
-        'avg_progress': round(avg_progress, 2) if avg_progress else 0,
-        'completed_trainings': completed_trainings,
-        'avg_training_score': round(avg_training_score, 2) if avg_training_score else 0,
-        'recent_activities': recent_activities,
+        'evaluations': profile.evaluations,
+        'goals': profile.goals,
+        'trainings': profile.trainings,
+        **profile.summary(),
+        'recent_activities': profile.recent_activities(),
     }
     
     return render(request, 'KPI/employee_detail.html', context)
@@ -309,75 +166,31 @@ def employee_edit(request, employee_id):
     return render(request, 'KPI/employee_form.html', context)
 
 @login_required
+@conditional_on(Evaluation, Employee, EvaluationPeriod, Department)
 def evaluation_list(request):
     """Enhanced evaluation list with comprehensive filtering"""
-    evaluations = Evaluation.objects.select_related(
-        'employee', 'employee__department', 'evaluator', 'period'
-    ).all()
-    
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        evaluations = evaluations.filter(
-            Q(employee__first_name__icontains=search_query) |
-            Q(employee__last_name__icontains=search_query) |
-            Q(evaluator__first_name__icontains=search_query) |
-            Q(evaluator__last_name__icontains=search_query)
-        )
-    
-    # Filter by department
-    department_filter = request.GET.get('department', '')
-    if department_filter:
-        evaluations = evaluations.filter(employee__department_id=department_filter)
-    
-    # Filter by status
-    status_filter = request.GET.get('status', '')
-    if status_filter:
-        evaluations = evaluations.filter(status=status_filter)
-    
-    # Filter by period
-    period_filter = request.GET.get('period', '')
-    if period_filter:
-        evaluations = evaluations.filter(period_id=period_filter)
-    
-    # Filter by performance rating
-    rating_filter = request.GET.get('rating', '')
-    if rating_filter:
-        evaluations = evaluations.filter(performance_rating=rating_filter)
-    
-    # Sort by
-    sort_by = request.GET.get('sort', '-created_at')
-    if sort_by in ['created_at', '-created_at', 'employee__first_name', 'overall_score', 'status']:
-        evaluations = evaluations.order_by(sort_by)
+    listing = listings.evaluation_listing(request.GET)
     
     # Pagination
-    paginator = Paginator(evaluations, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(listing.page_rows, listing.ordering, 20, projection=projections.EVALUATION_ROWS)
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET)
     
-    departments = Department.objects.all()
     periods = EvaluationPeriod.objects.filter(is_active=True)
     
     # Calculate statistics
-    total_evaluations = evaluations.count()
-    completed_count = evaluations.filter(status='completed').count()
-    in_progress_count = evaluations.filter(status='in_progress').count()
-    avg_score = evaluations.aggregate(Avg('overall_score'))['overall_score__avg'] or 0
+    evaluation_stats = stats.compute(listing.rows, [
+        stats.count('total_evaluations'),
+        stats.count('completed_count', status='completed'),
+        stats.count('in_progress_count', status='in_progress'),
+        stats.average('avg_score', 'overall_score'),
+    ])
     
     context = {
         'evaluations': page_obj,
-        'departments': departments,
+        'facets': facets.facet_counts('evaluation_list', request.GET),
         'periods': periods,
-        'search_query': search_query,
-        'department_filter': department_filter,
-        'status_filter': status_filter,
-        'period_filter': period_filter,
-        'rating_filter': rating_filter,
-        'sort_by': sort_by,
-        'total_evaluations': total_evaluations,
-        'completed_count': completed_count,
-        'in_progress_count': in_progress_count,
-        'avg_score': avg_score,
+        **listing.context(),
+        **evaluation_stats,
         'today': date.today(),
     }
     
@@ -496,70 +309,28 @@ def evaluation_submit(request, evaluation_id):
     return redirect('KPI:evaluation_detail', evaluation_id=evaluation.id)
 
 @login_required
+@conditional_on(Goal, Employee, Department)
 def goal_list(request):
     """Enhanced goal list with comprehensive filtering"""
-    goals = Goal.objects.select_related('employee', 'employee__department').all()
-    
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        goals = goals.filter(
-            Q(title__icontains=search_query) |
-            Q(employee__first_name__icontains=search_query) |
-            Q(employee__last_name__icontains=search_query)
-        )
-    
-    # Filter by goal type
-    goal_type_filter = request.GET.get('goal_type', '')
-    if goal_type_filter:
-        goals = goals.filter(goal_type=goal_type_filter)
-    
-    # Filter by status
-    status_filter = request.GET.get('status', '')
-    if status_filter:
-        goals = goals.filter(status=status_filter)
-    
-    # Filter by department
-    department_filter = request.GET.get('department', '')
-    if department_filter:
-        goals = goals.filter(employee__department_id=department_filter)
-    
-    # Filter by priority
-    priority_filter = request.GET.get('priority', '')
-    if priority_filter:
-        goals = goals.filter(priority=priority_filter)
-    
-    # Sort by
-    sort_by = request.GET.get('sort', '-created_at')
-    if sort_by in ['created_at', '-created_at', 'target_date', '-target_date', 'progress', '-progress', 'priority']:
-        goals = goals.order_by(sort_by)
+    listing = listings.goal_listing(request.GET)
     
     # Pagination
-    paginator = Paginator(goals, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    departments = Department.objects.all()
+    paginator = KeysetPaginator(listing.page_rows, listing.ordering, 20, projection=projections.GOAL_ROWS)
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     # Calculate statistics
-    total_goals = goals.count()
-    completed_count = goals.filter(status='completed').count()
-    in_progress_count = goals.filter(status='in_progress').count()
-    avg_progress = goals.aggregate(Avg('progress'))['progress__avg'] or 0
+    goal_stats = stats.compute(listing.rows, [
+        stats.count('total_goals'),
+        stats.count('completed_count', status='completed'),
+        stats.count('in_progress_count', status='in_progress'),
+        stats.average('avg_progress', 'progress'),
+    ])
     
     context = {
         'goals': page_obj,
-        'departments': departments,
-        'search_query': search_query,
-        'goal_type_filter': goal_type_filter,
-        'status_filter': status_filter,
-        'department_filter': department_filter,
-        'priority_filter': priority_filter,
-        'sort_by': sort_by,
-        'total_goals': total_goals,
-        'completed_count': completed_count,
-        'in_progress_count': in_progress_count,
-        'avg_progress': avg_progress,
+        'facets': facets.facet_counts('goal_list', request.GET),
+        **listing.context(),
+        **goal_stats,
         'today': date.today(),
     }
     
@@ -652,65 +423,28 @@ def goal_update_progress(request, goal_id):
     return redirect('KPI:goal_list')
 
 @login_required
+@conditional_on(Training, Employee, Department)
 def training_list(request):
     """Enhanced training list with comprehensive filtering"""
-    trainings = Training.objects.select_related('employee', 'employee__department').all()
-    
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        trainings = trainings.filter(
-            Q(title__icontains=search_query) |
-            Q(employee__first_name__icontains=search_query) |
-            Q(employee__last_name__icontains=search_query) |
-            Q(provider__icontains=search_query)
-        )
-    
-    # Filter by training type
-    training_type_filter = request.GET.get('training_type', '')
-    if training_type_filter:
-        trainings = trainings.filter(training_type=training_type_filter)
-    
-    # Filter by status
-    status_filter = request.GET.get('status', '')
-    if status_filter:
-        trainings = trainings.filter(status=status_filter)
-    
-    # Filter by department
-    department_filter = request.GET.get('department', '')
-    if department_filter:
-        trainings = trainings.filter(employee__department_id=department_filter)
-    
-    # Sort by
-    sort_by = request.GET.get('sort', '-start_date')
-    if sort_by in ['start_date', '-start_date', 'end_date', 'score']:
-        trainings = trainings.order_by(sort_by)
+    listing = listings.training_listing(request.GET)
     
     # Pagination
-    paginator = Paginator(trainings, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    departments = Department.objects.all()
+    paginator = KeysetPaginator(listing.page_rows, listing.ordering, 20, projection=projections.TRAINING_ROWS)
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     # Calculate statistics
-    total_trainings = trainings.count()
-    completed_count = trainings.filter(status='completed').count()
-    in_progress_count = trainings.filter(status='in_progress').count()
-    total_hours = trainings.aggregate(Sum('duration_hours'))['duration_hours__sum'] or 0
+    training_stats = stats.compute(listing.rows, [
+        stats.count('total_trainings'),
+        stats.count('completed_count', status='completed'),
+        stats.count('in_progress_count', status='in_progress'),
+        stats.total('total_hours', 'duration_hours'),
+    ])
     
     context = {
         'trainings': page_obj,
-        'departments': departments,
-        'search_query': search_query,
-        'training_type_filter': training_type_filter,
-        'status_filter': status_filter,
-        'department_filter': department_filter,
-        'sort_by': sort_by,
-        'total_trainings': total_trainings,
-        'completed_count': completed_count,
-        'in_progress_count': in_progress_count,
-        'total_hours': total_hours,
+        'facets': facets.facet_counts('training_list', request.GET),
+        **listing.context(),
+        **training_stats,
         'today': date.today(),
     }
     
@@ -802,13 +536,15 @@ def reports(request):
     
     # Get report statistics
     total_reports = Report.objects.count()
-    recent_reports = Report.objects.order_by('-generated_at')[:5]
+    recent_reports = Report.objects.select_related('generated_by').order_by('-generated_at')[:5]
+    recent_jobs = ReportJob.objects.filter(requested_by=request.user).select_related('report')[:5]
     
     context = {
         'departments': departments,
         'periods': periods,
         'total_reports': total_reports,
         'recent_reports': recent_reports,
+        'recent_jobs': recent_jobs,
     }
     
     return render(request, 'KPI/reports.html', context)
@@ -820,80 +556,108 @@ def generate_report(request):
         report_type = request.POST.get('report_type')
         report_format = request.POST.get('format', 'pdf')
         
-        # Get filters
-        filters = {}
-        if request.POST.get('department'):
-            filters['department'] = request.POST.get('department')
-        if request.POST.get('period'):
-            filters['period'] = request.POST.get('period')
-        if request.POST.get('status'):
-            filters['status'] = request.POST.get('status')
-        if request.POST.get('date_from'):
-            filters['date_from'] = request.POST.get('date_from')
-        if request.POST.get('date_to'):
-            filters['date_to'] = request.POST.get('date_to')
-        if request.POST.get('training_type'):
-            filters['training_type'] = request.POST.get('training_type')
-        if request.POST.get('goal_type'):
-            filters['goal_type'] = request.POST.get('goal_type')
-        if request.POST.get('priority'):
-            filters['priority'] = request.POST.get('priority')
-        
-        # Generate report
-        generator = ReportGenerator()
-        
-        if report_type == 'employee_performance':
-            report_data = generator.generate_employee_performance_report(report_format, filters)
-            filename = f"employee_performance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        elif report_type == 'department_performance':
-            report_data = generator.generate_department_performance_report(report_format, filters)
-            filename = f"department_performance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        elif report_type == 'training':
-            report_data = generator.generate_training_report(report_format, filters)
-            filename = f"training_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        elif report_type == 'goal_progress':
-            report_data = generator.generate_goal_progress_report(report_format, filters)
-            filename = f"goal_progress_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        else:
+        if report_type not in ReportGenerator.ROW_METHODS:
             messages.error(request, 'Invalid report type.')
             return redirect('KPI:reports')
         
-        if report_data:
-            # Save report record
-            Report.objects.create(
-                name=f"{report_type.replace('_', ' ').title()} Report",
-                report_type=report_type,
-                format=report_format,
-                parameters=filters,
-                generated_by=request.user
+        # Only the report's own filters, validated and normalized; Report.parameters records the result
+        try:
+            filters = report_filters.normalize(
+                report_type, {name: request.POST.get(name) for name in report_filters.field_names(report_type)}
             )
-            
-            return generate_report_response(report_data, filename, report_format)
-        else:
+        except report_filters.InvalidReportFilters as e:
+            return _report_request_error(request, f'Invalid report filters: {e}', error='Invalid filters', filters=e.errors)
+        
+        if request.POST.get('delivery') == 'stream':
+            # Small reports can still be downloaded directly, from the report cache when the data is unchanged
+            try:
+                streamed = report_cache.stream(report_type, filters, report_format)
+            except ValueError as e:
+                return _report_request_error(request, f'{e}.', error=str(e))
+            if streamed is not None:
+                path, pieces, written_format = streamed
+                filename = f"{report_type}_report_{datetime.now():%Y%m%d_%H%M%S}.{report_extension(written_format)}"
+                if path is not None:
+                    response = FileResponse(
+                        open(path, 'rb'), as_attachment=True, filename=filename,
+                        content_type=REPORT_CONTENT_TYPES[written_format],
+                    )
+                else:
+                    # Sent as it is generated, and cached on the way
+                    response = StreamingHttpResponse(pieces, content_type=REPORT_CONTENT_TYPES[written_format])
+                    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+                # Save report record
+                Report.objects.create(
+                    name=f"{report_type.replace('_', ' ').title()} Report",
+                    report_type=report_type,
+                    format=report_format,
+                    parameters=filters,
+                    generated_by=request.user
+                )
+                
+                return response
             messages.error(request, 'Failed to generate report.')
+            return redirect('KPI:reports')
+        
+        # Everything else is generated by the report worker (manage.py run_report_worker)
+        try:
+            job = report_jobs.enqueue(report_type, report_format, filters, request.user)
+        except ValueError as e:
+            return _report_request_error(request, f'{e}.', error=str(e))
+        if 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse(_report_job_data(job), status=202)
+        messages.success(request, f'Report queued (job #{job.pk}). You will be notified when it is ready.')
     
     return redirect('KPI:reports')
 
+def _report_request_error(request, message, **data):
+    """400 with `data` as JSON for API clients, `message` on the reports page for the others"""
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse(data, status=400)
+    messages.error(request, message)
+    return redirect('KPI:reports')
+
+def _report_job_data(job):
+    return {
+        'job_id': job.pk,
+        'status': job.status,
+        'report_type': job.report_type,
+        'format': job.format,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+        'error': job.error,
+        'status_url': reverse('KPI:report_job_status', args=[job.pk]),
+        'download_url': reverse('KPI:report_download', args=[job.report_id]) if job.report_id else None,
+    }
+
+@login_required
+def report_job_status(request, job_id):
+    """Status of a queued report, polled by the reports page"""
+    jobs = ReportJob.objects.all() if request.user.is_staff else ReportJob.objects.filter(requested_by=request.user)
+    job = get_object_or_404(jobs, pk=job_id)
+    return JsonResponse(_report_job_data(job))
+
 @login_required
+def report_download(request, report_id):
+    """Download a generated report file"""
+    reports = Report.objects.all() if request.user.is_staff else Report.objects.filter(generated_by=request.user)
+    report = get_object_or_404(reports.exclude(file_path=''), pk=report_id)
+    path = os.path.join(settings.MEDIA_ROOT, report.file_path)
+    if not os.path.isfile(path):
+        raise Http404('Report file not found')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=os.path.basename(path))
+
+@login_required
+@conditional_on(Employee, Department, Evaluation, Goal, Training)
 def get_employee_data(request, employee_id):
     """API endpoint to get employee data for AJAX requests"""
     try:
-        employee = Employee.objects.get(id=employee_id)
-        data = {
-            'id': employee.id,
-            'employee_id': employee.employee_id,
-            'full_name': employee.full_name,
-            'email': employee.email,
-            'department': employee.department.name,
-            'position': employee.position,
-            'hire_date': employee.hire_date.strftime('%Y-%m-%d'),
-            'status': employee.status,
-        }
-        return JsonResponse(data)
+        return JsonResponse(Employee360.load(employee_id, history=False).as_dict())
     except Employee.DoesNotExist:
         return JsonResponse({'error': 'Employee not found'}, status=404)
 
 @login_required
+@conditional_on(KPI, KPICategory)
 def get_kpi_data(request):
     """API endpoint to get KPI data for AJAX requests"""
     try:
@@ -913,6 +677,124 @@ def get_kpi_data(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 @login_required
+@conditional_on(*charts.DEPARTMENT_PERFORMANCE_MODELS)
+def chart_department_performance(request):
+    """Dashboard chart data: average score per department"""
+    return JsonResponse(charts.department_performance_chart())
+
+@login_required
+@conditional_on(*charts.EVALUATION_STATUS_MODELS)
+def chart_evaluation_status(request):
+    """Dashboard chart data: evaluations per status"""
+    return JsonResponse(charts.evaluation_status_chart())
+
+@login_required
+@conditional_on(*charts.MONTHLY_TREND_MODELS)
+def chart_monthly_trend(request):
+    """Dashboard chart data: average evaluation score for each of the last `months` months"""
+    try:
+        months = int(request.GET.get('months', 6))
+    except ValueError:
+        months = 0
+    if not 1 <= months <= 36:
+        return JsonResponse({'error': 'months must be between 1 and 36'}, status=400)
+    return JsonResponse(charts.monthly_trend_chart(months))
+
+@login_required
+def evaluation_trend_data(request):
+    """API endpoint for monthly evaluation score trends, served from the rollup table"""
+    try:
+        if request.GET.get('start') or request.GET.get('end'):
+            end = datetime.strptime(request.GET.get('end') or date.today().strftime('%Y-%m'), '%Y-%m').date()
+            start = datetime.strptime(request.GET['start'], '%Y-%m').date() if request.GET.get('start') else None
+        else:
+            end, start = date.today(), None
+        months = int(request.GET.get('months', 12))
+        department, period, category = (
+            int(request.GET[name]) if request.GET.get(name) else None for name in ('department', 'period', 'category')
+        )
+    except (KeyError, ValueError):
+        return JsonResponse({
+            'error': 'Use start/end as YYYY-MM, months as a number and department/period/category as ids'
+        }, status=400)
+    
+    if start is None:
+        if not 1 <= months <= 120:
+            return JsonResponse({'error': 'months must be between 1 and 120'}, status=400)
+        start = recent_months(months, today=end)[0]
+    if start > end:
+        return JsonResponse({'error': 'start must not be after end'}, status=400)
+    
+    group_by = request.GET.get('group_by') or None
+    if group_by and group_by not in TREND_GROUPS:
+        return JsonResponse({'error': f'group_by must be one of {", ".join(TREND_GROUPS)}'}, status=400)
+    
+    trend = evaluation_trend(
+        start, end,
+        department=department,
+        period=period,
+        category=category,
+        group_by=group_by,
+    )
+    return JsonResponse(trend)
+
+@login_required
+@conditional_on(Employee, Department)
+def employee_autocomplete(request):
+    """Employee picker suggestions for the lazy select widgets"""
+    try:
+        limit = int(request.GET.get('limit', search.AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= 50:
+        return JsonResponse({'error': 'limit must be between 1 and 50'}, status=400)
+    return JsonResponse({'results': search.autocomplete_employees(request.GET.get('q', ''), limit)})
+
+@login_required
+def list_export(request, view_name):
+    """Every row of a list page, under its filters and sort, streamed as CSV, JSON Lines or xlsx"""
+    if view_name not in exports.EXPORT_COLUMNS:
+        raise Http404('No export for this page')
+    if view_name in exports.STAFF_ONLY and not request.user.is_staff:
+        return HttpResponseForbidden('HR access required.')
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in exports.FORMATS:
+        return JsonResponse({'error': f"format must be one of {', '.join(exports.FORMATS)}"}, status=400)
+    response = StreamingHttpResponse(
+        exports.stream(view_name, request.GET, export_format), content_type=exports.FORMATS[export_format]
+    )
+    filename = f"{view_name}_{timezone.now():%Y%m%d_%H%M%S}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def _timeline_response(request, events):
+    try:
+        size = int(request.GET.get('limit', 20))
+        page = activity.timeline_page(events, cursor=request.GET.get('cursor'), size=size)
+    except ValueError:
+        # InvalidCursor is a ValueError too
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=400)
+    return JsonResponse({
+        'events': [activity.serialize_event(event) for event in page],
+        'next_cursor': page.next_cursor,
+    })
+
+@login_required
+def employee_timeline(request, employee_id):
+    """API endpoint for an employee's activity feed, newest first, keyset-paginated"""
+    if not Employee.objects.filter(pk=employee_id).exists():
+        return JsonResponse({'error': 'Employee not found'}, status=404)
+    return _timeline_response(request, activity.timeline(employee=employee_id))
+
+@login_required
+def department_timeline(request, department_id):
+    """API endpoint for a department's activity feed, newest first, keyset-paginated"""
+    if not Department.objects.filter(pk=department_id).exists():
+        return JsonResponse({'error': 'Department not found'}, status=404)
+    return _timeline_response(request, activity.timeline(department=department_id))
+
+@login_required
+@conditional_on(Competency)
 def competency_list(request):
     """List competencies"""
     competencies = Competency.objects.filter(is_active=True).order_by('category', 'name')
@@ -924,6 +806,7 @@ def competency_list(request):
     return render(request, 'KPI/competency_list.html', context)
 
 @login_required
+@conditional_on(PerformanceImprovementPlan, Employee, Evaluation)
 def performance_improvement_plans(request):
     """List performance improvement plans"""
     pips = PerformanceImprovementPlan.objects.select_related('employee', 'evaluation').order_by('-created_at')
@@ -1364,44 +1247,24 @@ def employee_change_password(request):
 
 # Admin Management Views for Employee Data
 @login_required
+@conditional_on(EmployeeProfile, Employee, Department)
 def admin_employee_profiles(request):
     """Admin view of all employee profiles"""
-    profiles = EmployeeProfile.objects.select_related('employee', 'employee__department').all()
-    
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        profiles = profiles.filter(
-            Q(employee__first_name__icontains=search_query) |
-            Q(employee__last_name__icontains=search_query) |
-            Q(employee__employee_id__icontains=search_query)
-        )
-    
-    # Filter by department
-    department_filter = request.GET.get('department', '')
-    if department_filter:
-        profiles = profiles.filter(employee__department_id=department_filter)
-    
-    # Filter by profile completion
-    completion_filter = request.GET.get('completion', '')
-    if completion_filter == 'complete':
-        profiles = profiles.filter(is_profile_complete=True)
-    elif completion_filter == 'incomplete':
-        profiles = profiles.filter(is_profile_complete=False)
+    listing = listings.employee_profile_listing(request.GET)
     
     # Pagination
-    paginator = Paginator(profiles, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(
+        listing.page_rows, listing.ordering, 20,
+        count_namespaces=(EmployeeProfile, Employee, Department),
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     departments = Department.objects.all()
     
     context = {
         'profiles': page_obj,
         'departments': departments,
-        'search_query': search_query,
-        'department_filter': department_filter,
-        'completion_filter': completion_filter,
+        **listing.context(),
     }
     
     return render(request, 'KPI/admin_employee_profiles.html', context)
@@ -1461,23 +1324,12 @@ def leave_management_dashboard(request):
     current_year = timezone.now().year
     
     # Leave statistics
-    total_leave_requests = EmployeeLeaveRequest.objects.filter(
-        submitted_at__year=current_year
-    ).count()
-    
-    pending_approvals = EmployeeLeaveRequest.objects.filter(
-        status__in=['submitted', 'first_approval_pending', 'first_approved', 'second_approval_pending']
-    ).count()
-    
-    approved_leaves = EmployeeLeaveRequest.objects.filter(
-        status='approved',
-        submitted_at__year=current_year
-    ).count()
-    
-    rejected_leaves = EmployeeLeaveRequest.objects.filter(
-        status='rejected',
-        submitted_at__year=current_year
-    ).count()
+    leave_stats = stats.compute(EmployeeLeaveRequest.objects.all(), [
+        stats.count('total_leave_requests', submitted_at__year=current_year),
+        stats.count('pending_approvals', status__in=EmployeeLeaveRequest.PENDING_STATUSES),
+        stats.count('approved_leaves', status='approved', submitted_at__year=current_year),
+        stats.count('rejected_leaves', status='rejected', submitted_at__year=current_year),
+    ])
     
     # Department-wise leave requests
     department_leaves = Department.objects.annotate(
@@ -1492,10 +1344,7 @@ def leave_management_dashboard(request):
     ).order_by('-submitted_at')[:10]
     
     context = {
-        'total_leave_requests': total_leave_requests,
-        'pending_approvals': pending_approvals,
-        'approved_leaves': approved_leaves,
-        'rejected_leaves': rejected_leaves,
+        **leave_stats,
         'department_leaves': department_leaves,
         'recent_requests': recent_requests,
         'current_year': current_year,
@@ -1504,51 +1353,23 @@ def leave_management_dashboard(request):
     return render(request, 'KPI/leave_management_dashboard.html', context)
 
 @login_required
+@hr_required
+@conditional_on(EmployeeLeaveRequest, Employee, Department, LeaveType)
 def leave_requests_list(request):
     """List all leave requests for HR/Managers"""
-    if not request.user.is_staff:
-        messages.error(request, 'Access denied. HR access required.')
-        return redirect('KPI:dashboard')
-    
-    # Get filter parameters
-    status_filter = request.GET.get('status', '')
-    department_filter = request.GET.get('department', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    
-    # Base queryset
-    leave_requests = EmployeeLeaveRequest.objects.select_related(
-        'employee', 'employee__department', 'leave_type'
-    ).order_by('-submitted_at')
-    
-    # Apply filters
-    if status_filter:
-        leave_requests = leave_requests.filter(status=status_filter)
-    
-    if department_filter:
-        leave_requests = leave_requests.filter(employee__department_id=department_filter)
-    
-    if date_from:
-        leave_requests = leave_requests.filter(start_date__gte=date_from)
-    
-    if date_to:
-        leave_requests = leave_requests.filter(end_date__lte=date_to)
+    listing = listings.leave_request_listing(request.GET)
     
     # Pagination
-    paginator = Paginator(leave_requests, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Get departments for filter
-    departments = Department.objects.all()
+    paginator = KeysetPaginator(
+        listing.page_rows, listing.ordering, 20,
+        count_namespaces=(EmployeeLeaveRequest, Employee),
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     context = {
         'page_obj': page_obj,
-        'departments': departments,
-        'status_filter': status_filter,
-        'department_filter': department_filter,
-        'date_from': date_from,
-        'date_to': date_to,
+        'facets': facets.facet_counts('leave_requests_list', request.GET),
+        **listing.context(),
     }
     
     return render(request, 'KPI/leave_requests_list.html', context)
@@ -0,0 +1,201 @@
+"""
+Streaming xlsx writer
+
+An xlsx workbook is a zip of XML parts.  Libraries such as openpyxl build
+the sheet in memory (or, in write-only mode, in a temporary file) before
+zipping it; this writer instead writes each row's XML straight into the
+deflate stream of the sheet's zip entry, so memory stays flat whatever the
+number of rows:
+
+    StreamingHttpResponse(xlsx_chunks(header, rows), content_type=CONTENT_TYPE)
+
+Strings are written inline (t="inlineStr") rather than through the
+shared-strings table, which would have to be complete before the sheet.
+Numbers, booleans, dates and datetimes are written as native cells; None
+leaves the cell empty.  The zip is written with data descriptors, so the
+output can go to a socket as well as to a file.
+"""
+
+import re
+import zipfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Bytes of compressed output collected before a chunk is handed on
+CHUNK_SIZE = 64 * 1024
+
+# Rows of XML joined per write into the zip entry
+ROWS_PER_WRITE = 100
+
+EPOCH = datetime(1899, 12, 30)
+
+# Characters XML 1.0 cannot carry
+_ILLEGAL_CHARACTERS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+# Cell styles (indexes into cellXfs in STYLES)
+STYLE_HEADER = 1
+STYLE_DATE = 2
+STYLE_DATETIME = 3
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+</Types>"""
+
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="4">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>
+<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+</cellXfs>
+</styleSheet>"""
+
+SHEET_START = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>
+<sheetData>"""
+
+SHEET_END = '</sheetData>\n</worksheet>'
+
+
+def column_letter(index):
+    """Column letters for a 0-based column index: 0 -> A, 26 -> AA"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _text(value):
+    return escape(_ILLEGAL_CHARACTERS.sub('', value))
+
+
+def _serial(value):
+    """Excel's serial number for a date or datetime"""
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value)
+        delta = value - EPOCH
+        return delta.days + delta.seconds / 86400 + delta.microseconds / 86400000000
+    return (value - EPOCH.date()).days
+
+
+def cell(reference, value, style=0):
+    """The <c> element for one value (empty string for None)"""
+    styled = f' s="{style}"' if style else ''
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"{styled}><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{reference}"{styled}><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        return f'<c r="{reference}" s="{STYLE_DATETIME}"><v>{_serial(value)}</v></c>'
+    if isinstance(value, date):
+        return f'<c r="{reference}" s="{STYLE_DATE}"><v>{_serial(value)}</v></c>'
+    if isinstance(value, (time, timedelta)):
+        value = str(value)
+    return f'<c r="{reference}" t="inlineStr"{styled}><is><t xml:space="preserve">{_text(str(value))}</t></is></c>'
+
+
+def row_xml(number, values, columns, style=0):
+    cells = ''.join(cell(f'{column}{number}', value, style) for column, value in zip(columns, values))
+    return f'<row r="{number}">{cells}</row>'
+
+
+class _Sink:
+    """Write-only file object zipfile writes to; take() hands over what was written"""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts, self.size = [], 0
+        return data
+
+
+def _write(output, header, rows, sheet_name):
+    """write_xlsx(), pausing after each batch of rows so callers can drain `output`"""
+    columns = [column_letter(index) for index in range(len(header))]
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr('[Content_Types].xml', CONTENT_TYPES)
+        workbook.writestr('_rels/.rels', ROOT_RELS)
+        workbook.writestr('xl/workbook.xml', WORKBOOK.format(name=_text(sheet_name)[:31]))
+        workbook.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        workbook.writestr('xl/styles.xml', STYLES)
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(SHEET_START.encode())
+            sheet.write(row_xml(1, header, columns, STYLE_HEADER).encode())
+            batch = []
+            for number, values in enumerate(rows, start=2):
+                batch.append(row_xml(number, values, columns))
+                if len(batch) >= ROWS_PER_WRITE:
+                    sheet.write(''.join(batch).encode())
+                    batch = []
+                    yield
+            sheet.write(''.join(batch).encode())
+            sheet.write(SHEET_END.encode())
+
+
+def write_xlsx(output, header, rows, sheet_name='Sheet1'):
+    """
+    Write a one-sheet workbook to the binary file object `output`: a bold,
+    frozen `header` row, then `rows` (sequences of values).  `output` only
+    needs write(); it is not seeked.
+    """
+    for _ in _write(output, header, rows, sheet_name):
+        pass
+
+
+def xlsx_chunks(header, rows, sheet_name='Sheet1', size=CHUNK_SIZE):
+    """The workbook's bytes (see write_xlsx), in chunks of about `size` bytes"""
+    sink = _Sink()
+    for _ in _write(sink, header, rows, sheet_name):
+        if sink.size >= size:
+            yield sink.take()
+    if sink.size:
+        yield sink.take()
@@ -140,10 +140,48 @@ STATICFILES_DIRS = [
 # Enable WhiteNoise compression and caching
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# CACHE_BACKEND selects locmem (per-process, the default), file (shared by the
+# gunicorn workers on one host) or redis (shared across hosts; needs the
+# `redis` package and CACHE_URL, e.g. redis://127.0.0.1:6379/1).  It only holds
+# cached entries: the namespace versions that invalidate them are kept in the
+# database (KPI.cache), so every process agrees on them whatever the backend.
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('CACHE_URL', default='redis://127.0.0.1:6379/1'),
+            'KEY_PREFIX': 'mentiga',
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'mentiga',
+        }
+    }
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Generated reports cached under MEDIA_ROOT/report_cache/ (see KPI.report_cache)
+REPORT_CACHE_MAX_FILES = config('REPORT_CACHE_MAX_FILES', default=500, cast=int)
+REPORT_CACHE_MAX_BYTES = config('REPORT_CACHE_MAX_BYTES', default=256 * 1024 * 1024, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 